@@ -4,3 +4,25 @@ from django.apps import AppConfig
 class FocusConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'focus'
+
+    def ready(self):
+        """
+        Moves the owner on to a new data version whenever a focus is
+        saved or deleted so cached lists are never served stale. Users are
+        moved on too when saved so a reused user id starts afresh. The
+        search entries of the focus's tasks are kept up to date and the
+        change is published to the owner's event streams.
+        """
+        from django.conf import settings
+        from django.db.models.signals import post_save, post_delete
+        from take_control_api.cache import (
+            bump_owner_version, bump_user_version
+        )
+        from take_control_api.events import publish_deleted, publish_saved
+        from take_control_api.search import focus_saved
+        post_save.connect(bump_owner_version, sender='focus.Focus')
+        post_save.connect(focus_saved, sender='focus.Focus')
+        post_delete.connect(bump_owner_version, sender='focus.Focus')
+        post_save.connect(bump_user_version, sender=settings.AUTH_USER_MODEL)
+        post_save.connect(publish_saved, sender='focus.Focus')
+        post_delete.connect(publish_deleted, sender='focus.Focus')
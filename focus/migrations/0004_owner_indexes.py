@@ -0,0 +1,17 @@
+# Generated by Django 3.2.24 on 2026-10-18 15:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('focus', '0003_alter_focus_image'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='focus',
+            index=models.Index(fields=['owner', 'rank', 'created_at'], name='focus_owner_rank_idx'),
+        ),
+    ]
@@ -19,9 +19,38 @@ class Focus(models.Model):
     image = models.ImageField(
         upload_to='images/', default='../default-focus_bpca53', blank=True
     )
+    task_count = models.PositiveIntegerField(default=0)
+    active_task_count = models.PositiveIntegerField(default=0)
+    achieved_task_count = models.PositiveIntegerField(default=0)
+    overdue_task_count = models.PositiveIntegerField(default=0)
+    overdue_checked_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['owner', 'rank', 'created_at'],
+                name='focus_owner_rank_idx'),
+            models.Index(
+                fields=['owner', 'updated_at'],
+                name='focus_owner_updated_idx'),
+        ]
 
     def __str__(self):
         return f'{self.id} {self.name}'
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remembers the image and name the focus was loaded with so a change
+        can be passed on to its tasks when it is saved
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._saved_image = instance.__dict__.get('image')
+        instance._saved_name = instance.__dict__.get('name')
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._saved_image = self.image.name
+        self._saved_name = self.name
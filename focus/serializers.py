@@ -1,15 +1,23 @@
 from rest_framework import serializers
+from take_control_api.fast import FastListSerializerMixin
+from take_control_api.serializers import SparseFieldsMixin
 from .models import Focus
 
 
-class FocusSerializer(serializers.ModelSerializer):
+class FocusSerializer(
+        SparseFieldsMixin, FastListSerializerMixin,
+        serializers.ModelSerializer):
     """
     Serializer for the Focus model. It changes owner.id into owner.username,
     adds an extra field is_owner, prevents large images being saved to the
-    database and changes date fields into an easier format
+    database and changes date fields into an easier format. The task
+    counters are kept up to date by the server so are read only. GET
+    requests can choose the fields returned with fields or omit.
+    fast_is_owner gives is_owner for the fast list path.
     """
     owner = serializers.ReadOnlyField(source='owner.username')
     is_owner = serializers.SerializerMethodField()
+    fast_method_values = {'is_owner': ['owner_id']}
 
     def validate_image(self, value):
         """
@@ -32,7 +40,10 @@ class FocusSerializer(serializers.ModelSerializer):
 
     def get_is_owner(self, obj):
         request = self.context['request']
-        return request.user == obj.owner
+        return request.user.pk == obj.owner_id
+
+    def fast_is_owner(self, row):
+        return self.context['request'].user.pk == row['owner_id']
 
     class Meta:
         model = Focus
@@ -45,5 +56,14 @@ class FocusSerializer(serializers.ModelSerializer):
             'rank',
             'why',
             'image',
-            'is_owner'
+            'is_owner',
+            'task_count',
+            'active_task_count',
+            'achieved_task_count',
+            'overdue_task_count',
+            'overdue_checked_at',
+        ]
+        read_only_fields = [
+            'task_count', 'active_task_count', 'achieved_task_count',
+            'overdue_task_count', 'overdue_checked_at'
         ]
@@ -1,5 +1,10 @@
+from unittest import mock
 from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from .models import Focus
+from .views import FocusList
+from take_control_api.cache import get_cache
 from rest_framework import status
 from rest_framework.test import APITestCase
 
@@ -119,11 +124,11 @@ class FocusDetailViewTests(APITestCase):
     def test_logged_in_denied_get_focus_dont_own(self):
         """
         Logged in user sending get request for focus they don't own,
-        should return access denied
+        should return 404 not found as if it didn't exist
         """
         self.client.login(username='FirstTester', password='pass')
         response = self.client.get('/focus/2')
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_logged_in_owner_can_edit_their_focus(self):
         """
@@ -139,11 +144,11 @@ class FocusDetailViewTests(APITestCase):
     def test_logged_in_owner_denied_edit_focus_dont_own(self):
         """
         Logged in user sending a put request for focus they dont own,
-        should return access denied
+        should return 404 not found as if it didn't exist
         """
         self.client.login(username='FirstTester', password='pass')
         response = self.client.put('/focus/2', {'name': 'name changed'})
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_logged_in_owner_can_delete_their_focus(self):
         """
@@ -159,8 +164,158 @@ class FocusDetailViewTests(APITestCase):
     def test_logged_in_owner_denied_delete_focus_dont_own(self):
         """
         Logged in user sending a delete request for focus they don't own,
-        should return access denied
+        should return 404 not found as if it didn't exist
         """
         self.client.login(username='FirstTester', password='pass')
         response = self.client.delete('/focus/2')
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_focus_detail_query_count(self):
+        """
+        Logged in user requesting a focus they own uses 4 queries: the
+        session, the user, the ETag check and the focus joined to its
+        owner. The owner is never loaded separately to check ownership.
+        """
+        self.client.login(username='FirstTester', password='pass')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/focus/1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 4)
+
+
+class FocusIndexTests(APITestCase):
+    """
+    Tests that the database planner uses the owner index for the
+    ordering used by the focus list view
+    """
+    def test_focus_list_uses_owner_rank_index(self):
+        """
+        Listing a user's focus areas by rank uses the owner rank index
+        """
+        tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        plan = tester.focus.order_by('rank', 'created_at').explain()
+        self.assertIn('focus_owner_rank_idx', plan)
+
+
+class FocusCursorPaginationTests(APITestCase):
+    """
+    Tests for the opt-in cursor pagination of the focus list view
+    """
+    def test_cursor_pages_follow_rank_order(self):
+        """
+        Logged in user following cursor links receives all of their focus
+        areas once, by rank with unranked focus areas last
+        """
+        tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        for i in range(32):
+            Focus.objects.create(
+                owner=tester, name=f'Focus {i}', rank=i if i % 2 else None)
+        self.client.login(username='FirstTester', password='pass')
+        response = self.client.get('/focus/?cursor=')
+        ranks = [focus['rank'] for focus in response.data['results']]
+        response = self.client.get(response.data['next'])
+        ranks += [focus['rank'] for focus in response.data['results']]
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(ranks, list(range(1, 32, 2)) + [None] * 16)
+
+
+class FocusListCacheTests(APITestCase):
+    """
+    Tests for the cached focus list
+    """
+    def test_delete_invalidates_cache(self):
+        """
+        Logged in user deleting a focus no longer receives it in the list
+        """
+        tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        Focus.objects.create(owner=tester, name="Focus", why="Why")
+        self.client.login(username='FirstTester', password='pass')
+        self.client.get('/focus/')
+        self.assertEqual(self.client.get('/focus/')['X-Cache'], 'HIT')
+        self.client.delete('/focus/1')
+        response = self.client.get('/focus/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 0)
+
+
+class FocusConditionalRequestTests(APITestCase):
+    """
+    Tests for ETag and conditional requests on the focus views
+    """
+    def test_unchanged_focus_list_not_modified(self):
+        """
+        Logged in user sending the ETag of their focus list receives 304
+        until a focus is deleted
+        """
+        tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        Focus.objects.create(owner=tester, name="Focus", why="Why")
+        self.client.login(username='FirstTester', password='pass')
+        etag = self.client.get('/focus/')['ETag']
+        response = self.client.get('/focus/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.client.delete('/focus/1')
+        response = self.client.get('/focus/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class FocusSparseFieldsTests(APITestCase):
+    """
+    Tests for choosing the focus fields returned with fields and omit
+    """
+    def setUp(self):
+        """
+        Create a user with a focus
+        """
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        self.focus = Focus.objects.create(
+            owner=self.tester, name="Focus", why="Why")
+        self.client.login(username='FirstTester', password='pass')
+
+    def test_focus_fields_and_omit(self):
+        """
+        Logged in user can list focus areas with only the fields they need
+        or leave out the image
+        """
+        response = self.client.get('/focus/?fields=id,name')
+        self.assertEqual(response.data['results'], [
+            {'id': self.focus.id, 'name': 'Focus'}])
+        response = self.client.get(f'/focus/{self.focus.id}?omit=image')
+        self.assertEqual(response.data['name'], 'Focus')
+        self.assertNotIn('image', response.data)
+
+
+class FocusFastListTests(APITestCase):
+    """
+    Tests that the fast focus list gives exactly the same JSON as the
+    standard serializer
+    """
+    def setUp(self):
+        """
+        Create a user with ranked and unranked focus areas
+        """
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        for i, rank in enumerate([2, None, 1]):
+            Focus.objects.create(
+                owner=self.tester, name=f'Focus {i}', rank=rank,
+                why=None if rank is None else 'Why')
+        self.client.login(username='FirstTester', password='pass')
+
+    def test_fast_list_matches_standard(self):
+        """
+        The focus list matches the standard list byte for byte
+        """
+        for url in ['/focus/', '/focus/?cursor=', '/focus/?omit=image']:
+            with self.subTest(url=url):
+                get_cache().clear()
+                fast = self.client.get(url)
+                get_cache().clear()
+                with mock.patch.object(FocusList, 'fast_list', False):
+                    standard = self.client.get(url)
+                self.assertEqual(fast.status_code, status.HTTP_200_OK)
+                self.assertEqual(fast.content, standard.content)
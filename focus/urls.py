@@ -1,7 +1,10 @@
+from django.conf import settings
 from django.urls import path
 from focus import views
 
+list_view = views.AsyncFocusList if settings.ASYNC_VIEWS else views.FocusList
+
 urlpatterns = [
-    path('focus/', views.FocusList.as_view()),
+    path('focus/', list_view.as_view()),
     path('focus/<int:pk>', views.FocusDetail.as_view()),
 ]
@@ -1,15 +1,29 @@
 from .models import Focus
 from .serializers import FocusSerializer
 from rest_framework import generics
-from take_control_api.permissions import OwnerOnly
+from rest_framework.permissions import IsAuthenticated
+from take_control_api.asyncviews import AsyncViewMixin
+from take_control_api.cache import CachedListMixin
+from take_control_api.conditional import (
+    ConditionalListMixin, ConditionalDetailMixin
+)
+from take_control_api.fast import FastListMixin
+from take_control_api.pagination import KeysetPaginationMixin
+from take_control_api.permissions import OwnedQuerysetMixin, OwnerOnly
 
 
-class FocusList(generics.ListCreateAPIView):
+class FocusList(
+        ConditionalListMixin,
+        CachedListMixin,
+        KeysetPaginationMixin,
+        FastListMixin,
+        generics.ListCreateAPIView):
     """
     View to return a list of focus areas for the logged in user
     and also create a new focus area
     """
     serializer_class = FocusSerializer
+    keyset_ordering = ['rank', 'created_at']
 
     def perform_create(self, serializer):
         """
@@ -26,10 +40,19 @@ class FocusList(generics.ListCreateAPIView):
         return self.request.user.focus.all().order_by('rank', 'created_at')
 
 
-class FocusDetail(generics.RetrieveUpdateDestroyAPIView):
+class AsyncFocusList(AsyncViewMixin, FocusList):
+    """
+    The list of focus areas as an async view, for the ASGI application
+    """
+
+
+class FocusDetail(
+        OwnedQuerysetMixin,
+        ConditionalDetailMixin,
+        generics.RetrieveUpdateDestroyAPIView):
     """
     View to return a specific focus where pk will be the id of the focus
     """
     serializer_class = FocusSerializer
-    permission_classes = [OwnerOnly]
-    queryset = Focus.objects.all()
+    permission_classes = [IsAuthenticated, OwnerOnly]
+    queryset = Focus.objects.select_related('owner')
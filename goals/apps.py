@@ -4,3 +4,21 @@ from django.apps import AppConfig
 class GoalsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'goals'
+
+    def ready(self):
+        """
+        Moves the owner on to a new data version whenever a goal is
+        saved or deleted so cached lists are never served stale, keeps
+        the search entries of the goal and its tasks up to date and
+        publishes the change to the owner's event streams
+        """
+        from django.db.models.signals import post_save, post_delete
+        from take_control_api.cache import bump_owner_version
+        from take_control_api.events import publish_deleted, publish_saved
+        from take_control_api.search import goal_saved, goal_deleted
+        post_save.connect(bump_owner_version, sender='goals.Goal')
+        post_delete.connect(bump_owner_version, sender='goals.Goal')
+        post_save.connect(goal_saved, sender='goals.Goal')
+        post_delete.connect(goal_deleted, sender='goals.Goal')
+        post_save.connect(publish_saved, sender='goals.Goal')
+        post_delete.connect(publish_deleted, sender='goals.Goal')
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Exists, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from goals.models import Goal
+
+
+class Command(BaseCommand):
+    """
+    Sets children and child_count on every goal from its nested goals.
+    Used to backfill existing goals and to repair any drift.
+    """
+    help = 'Recalculate children and child_count for every goal'
+
+    def handle(self, *args, **options):
+        nested = Goal.objects.filter(parent=OuterRef('pk'))
+        counts = nested.order_by().values('parent').annotate(
+            count=Count('id')).values('count')
+        updated = Goal.objects.update(
+            child_count=Coalesce(Subquery(counts), 0),
+            children=Exists(nested))
+        self.stdout.write(
+            self.style.SUCCESS(f'Updated {updated} goals'))
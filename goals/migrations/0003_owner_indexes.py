@@ -0,0 +1,25 @@
+# Generated by Django 3.2.24 on 2026-10-18 15:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0002_alter_goal_active'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(fields=['owner', 'deadline', 'created_at'], name='goal_owner_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(condition=models.Q(('parent', None)), fields=['owner', 'deadline', 'created_at'], name='goal_owner_top_level_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(fields=['owner', 'focus'], name='goal_owner_focus_idx'),
+        ),
+    ]
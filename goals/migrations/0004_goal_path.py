@@ -0,0 +1,35 @@
+# Generated by Django 3.2.24 on 2026-10-18 15:59
+
+from django.db import migrations, models
+
+
+def fill_paths(apps, schema_editor):
+    """
+    Sets the path of every existing goal, one level of nesting at a time
+    """
+    Goal = apps.get_model('goals', 'Goal')
+    paths = {}
+    level = list(Goal.objects.filter(parent=None))
+    while level:
+        for goal in level:
+            goal.path = f'{paths.get(goal.parent_id, "")}{goal.id}/'
+            paths[goal.id] = goal.path
+        Goal.objects.bulk_update(level, ['path'])
+        level = list(Goal.objects.filter(
+            parent_id__in=[goal.id for goal in level]))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0003_owner_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goal',
+            name='path',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255),
+        ),
+        migrations.RunPython(fill_paths, migrations.RunPython.noop),
+    ]
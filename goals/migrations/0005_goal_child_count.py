@@ -0,0 +1,18 @@
+# Generated by Django 3.2.24 on 2026-10-18 16:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0004_goal_path'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goal',
+            name='child_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
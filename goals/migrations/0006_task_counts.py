@@ -0,0 +1,49 @@
+# Generated by Django 3.2.24 on 2026-10-18 16:07
+
+from django.db import migrations, models
+from tasks.models import recount_tasks
+
+
+def fill_task_counts(apps, schema_editor):
+    """
+    Sets the task counters of every existing goal from its tasks
+    """
+    Goal = apps.get_model('goals', 'Goal')
+    recount_tasks(Goal, Goal.objects.all())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0005_goal_child_count'),
+        ('tasks', '0007_owner_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='goal',
+            name='achieved_task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='goal',
+            name='active_task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='goal',
+            name='overdue_checked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='goal',
+            name='overdue_task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='goal',
+            name='task_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_task_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.24 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('goals', '0006_task_counts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='goal',
+            index=models.Index(fields=['owner', 'updated_at'], name='goal_owner_updated_idx'),
+        ),
+    ]
@@ -1,8 +1,47 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Concat, Greatest, Substr
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import User
+from django.utils import timezone
 from focus.models import Focus
 
 
+def path_ancestor_ids(path):
+    """
+    Returns the ids of the ancestors held in a goal path, leaving out the
+    goal itself
+    """
+    return [int(id) for id in path.split('/')[:-2]]
+
+
+def goal_path(user, goal_id):
+    """
+    Returns the path of one of the user's goals, or None if the goal isn't
+    theirs
+    """
+    if not goal_id.isdigit():
+        return None
+    return user.goal.filter(pk=goal_id).values_list('path', flat=True).first()
+
+
+def change_child_count(goal_id, change):
+    """
+    Adds change to a goal's child_count in the database, keeping children
+    true only while the goal has nested goals. updated_at moves on so the
+    change is picked up by sync.
+    """
+    if goal_id is None:
+        return
+    Goal.objects.filter(pk=goal_id).update(
+        child_count=Greatest(F('child_count') + change, 0),
+        children=Case(
+            When(child_count__gt=-change, then=Value(True)),
+            default=Value(False)),
+        updated_at=timezone.now())
+
+
 class Goal(models.Model):
     """
     Goal model
@@ -17,6 +56,7 @@ class Goal(models.Model):
         on_delete=models.CASCADE,
         related_name="goal_for_focus")
     children = models.BooleanField(default=False)
+    child_count = models.PositiveIntegerField(default=0)
     parent = models.ForeignKey(
         'self',
         on_delete=models.CASCADE,
@@ -31,9 +71,111 @@ class Goal(models.Model):
     description = models.CharField(max_length=100, blank=True, null=True)
     value = models.CharField(max_length=100, blank=True, null=True)
     criteria = models.CharField(max_length=100, blank=True, null=True)
+    path = models.CharField(
+        max_length=255, blank=True, default='', editable=False,
+        db_index=True)
+    task_count = models.PositiveIntegerField(default=0)
+    active_task_count = models.PositiveIntegerField(default=0)
+    achieved_task_count = models.PositiveIntegerField(default=0)
+    overdue_task_count = models.PositiveIntegerField(default=0)
+    overdue_checked_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['owner', 'deadline', 'created_at'],
+                name='goal_owner_deadline_idx'),
+            models.Index(
+                fields=['owner', 'deadline', 'created_at'],
+                condition=models.Q(parent=None),
+                name='goal_owner_top_level_idx'),
+            models.Index(
+                fields=['owner', 'focus'],
+                name='goal_owner_focus_idx'),
+            models.Index(
+                fields=['owner', 'updated_at'],
+                name='goal_owner_updated_idx'),
+        ]
 
     def __str__(self):
         return f'{self.id} {self.title}'
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remembers the parent the goal was loaded with so a move can be
+        spotted when it is saved, and the title and deadline its tasks show
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._saved_parent_id = instance.__dict__.get('parent_id')
+        instance._saved_task_info = instance.task_info()
+        return instance
+
+    def task_info(self):
+        """
+        The fields of the goal shown with each of its tasks
+        """
+        return (self.__dict__.get('title'), self.__dict__.get('deadline'))
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the goal, then sets its path and its parents' child counts
+        when it is created or moved to a new parent
+        """
+        created = self.pk is None
+        old_parent_id = getattr(self, '_saved_parent_id', self.parent_id)
+        moved = not created and self.parent_id != old_parent_id
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if moved or not self.path:
+                self.update_path()
+            if moved:
+                change_child_count(old_parent_id, -1)
+            if created or moved:
+                change_child_count(self.parent_id, 1)
+        self._saved_parent_id = self.parent_id
+        self._saved_task_info = self.task_info()
+
+    def update_path(self):
+        """
+        Sets the goal's path, the ids of its ancestors and itself such as
+        1/5/12/, and moves the paths of all its nested goals along with it
+        """
+        parent_path = ''
+        if self.parent_id:
+            parent_path = Goal.objects.filter(
+                pk=self.parent_id).values_list('path', flat=True).first()
+        old_path = self.path
+        new_path = f'{parent_path}{self.pk}/'
+        if old_path == new_path:
+            return
+        Goal.objects.filter(pk=self.pk).update(path=new_path)
+        if old_path:
+            Goal.objects.filter(path__startswith=old_path).update(
+                path=Concat(
+                    models.Value(new_path),
+                    Substr('path', len(old_path) + 1)))
+        self.path = new_path
+
+    def get_descendants(self):
+        """
+        Returns every goal nested under this goal, at any depth
+        """
+        return Goal.objects.filter(
+            path__startswith=self.path).exclude(pk=self.pk)
+
+    def get_ancestors(self):
+        """
+        Returns every goal this goal is nested under, from the top down
+        """
+        ids = path_ancestor_ids(self.path)
+        return Goal.objects.filter(pk__in=ids).order_by('path')
+
+
+@receiver(post_delete, sender=Goal)
+def goal_deleted(sender, instance, **kwargs):
+    """
+    Takes a deleted goal off its parent's child_count
+    """
+    change_child_count(instance.parent_id, -1)
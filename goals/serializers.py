@@ -1,33 +1,69 @@
 from rest_framework import serializers
-from datetime import datetime, timezone
+from take_control_api.deadlines import get_now, days_remaining
+from take_control_api.fast import FastListSerializerMixin
+from take_control_api.serializers import OwnedLinksMixin, SparseFieldsMixin
 from .models import Goal
 
 
-class GoalSerializer(serializers.ModelSerializer):
+class GoalSerializer(
+        SparseFieldsMixin, OwnedLinksMixin, FastListSerializerMixin,
+        serializers.ModelSerializer):
     """
     Serializer for the Goal model. It changes owner.id into owner.username,
-    adds extra fields is_owner, days_remaining and deadline_near
+    adds extra fields is_owner, days_remaining and deadline_near. children
+    and child_count are kept up to date by the server so are read only, as
+    are the task counters. Only the user's own focus areas and goals can
+    be linked. GET requests can choose the fields returned
+    with fields or omit. The fast_ methods give the same fields for the
+    fast list path.
     """
     owner = serializers.ReadOnlyField(source='owner.username')
     is_owner = serializers.SerializerMethodField()
     days_remaining = serializers.SerializerMethodField()
     deadline_near = serializers.SerializerMethodField()
+    fast_method_values = {
+        'is_owner': ['owner_id'],
+        'days_remaining': ['deadline'],
+        'deadline_near': ['deadline'],
+    }
+    owned_links = ['focus', 'parent']
+
+    def validate_parent(self, value):
+        """
+        Prevents a goal being nested inside itself or one of its own
+        nested goals
+        """
+        if value and self.instance and value.path.startswith(
+                self.instance.path):
+            raise serializers.ValidationError(
+                'A goal cannot be nested inside itself'
+            )
+        return value
 
     def get_is_owner(self, obj):
         request = self.context['request']
-        return request.user == obj.owner
+        return request.user.pk == obj.owner_id
+
+    def fast_is_owner(self, row):
+        return self.context['request'].user.pk == row['owner_id']
 
     def get_days_remaining(self, obj):
         """
         Generates a new field containing the number of days remaining until
-        the deadline.
+        the deadline. The result is kept on the goal so deadline_near can
+        reuse it.
         """
-        future_deadline = obj.deadline
-        if future_deadline:
-            today_naive = datetime.now()
-            today_aware = today_naive.replace(tzinfo=timezone.utc)
-            days_remaining = (future_deadline - today_aware).days
-            return days_remaining
+        if not hasattr(obj, '_days_remaining'):
+            obj._days_remaining = self.days_until(obj.deadline)
+        return obj._days_remaining
+
+    def fast_days_remaining(self, row):
+        return self.days_until(row['deadline'])
+
+    def days_until(self, deadline):
+        if deadline:
+            now = get_now(self.context)
+            return days_remaining(deadline, now)
         else:
             return None
 
@@ -37,7 +73,12 @@ class GoalSerializer(serializers.ModelSerializer):
         than 7 days, or false if their is no deadline or the deadline is
         more than 7 days away.
         """
-        days_remaining = self.get_days_remaining(obj)
+        return self.is_deadline_near(self.get_days_remaining(obj))
+
+    def fast_deadline_near(self, row):
+        return self.is_deadline_near(self.days_until(row['deadline']))
+
+    def is_deadline_near(self, days_remaining):
         if days_remaining is not None:
             if days_remaining <= 7:
                 return True
@@ -54,6 +95,7 @@ class GoalSerializer(serializers.ModelSerializer):
             'is_owner',
             'focus',
             'children',
+            'child_count',
             'parent',
             'created_at',
             'updated_at',
@@ -64,5 +106,14 @@ class GoalSerializer(serializers.ModelSerializer):
             'value',
             'criteria',
             'deadline_near',
-            'days_remaining'
+            'days_remaining',
+            'task_count',
+            'active_task_count',
+            'achieved_task_count',
+            'overdue_task_count',
+            'overdue_checked_at',
+        ]
+        read_only_fields = [
+            'children', 'child_count', 'task_count', 'active_task_count',
+            'achieved_task_count', 'overdue_task_count', 'overdue_checked_at'
         ]
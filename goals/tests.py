@@ -1,6 +1,15 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from unittest import mock
 from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from .models import Goal
 from focus.models import Focus
+from tasks.models import Task
+from take_control_api.cache import get_cache
+from .views import GoalList
 from rest_framework import status
 from rest_framework.test import APITestCase
 
@@ -189,11 +198,11 @@ class GoalDetailViewTests(APITestCase):
     def test_logged_in_denied_goal_dont_own(self):
         """
         Logged in user sending get request for goal they don't own,
-        should return access denied
+        should return 404 not found as if it didn't exist
         """
         self.client.login(username='FirstTester', password='pass')
         response = self.client.get('/goals/2')
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_invalid_goal_request_handled(self):
         """
@@ -219,11 +228,11 @@ class GoalDetailViewTests(APITestCase):
     def test_logged_in_owner_denied_edit_goal_dont_own(self):
         """
         Logged in user sending a patch request for goal they dont own,
-        should return access denied
+        should return 404 not found as if it didn't exist
         """
         self.client.login(username='FirstTester', password='pass')
         response = self.client.patch('/goals/2', {'title': 'name changed'})
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_logged_in_owner_can_delete_their_goal(self):
         """
@@ -239,8 +248,568 @@ class GoalDetailViewTests(APITestCase):
     def test_logged_in_owner_denied_delete_goal_dont_own(self):
         """
         Logged in user sending a delete request for goal they don't own,
-        should return access denied
+        should return 404 not found as if it didn't exist
         """
         self.client.login(username='FirstTester', password='pass')
         response = self.client.delete('/goals/2')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_goal_detail_query_count(self):
+        """
+        Logged in user requesting a goal they own uses 4 queries: the
+        session, the user, the ETag check and the goal joined to its
+        owner. The owner is never loaded separately to check ownership.
+        """
+        self.client.login(username='FirstTester', password='pass')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/goals/1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 4)
+
+
+class GoalIndexTests(APITestCase):
+    """
+    Tests that the database planner uses the owner indexes for the
+    orderings and filters used by the goal list view
+    """
+    def setUp(self):
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+
+    def test_goal_list_uses_owner_deadline_index(self):
+        """
+        Listing a user's goals by deadline uses the owner deadline index
+        """
+        plan = self.tester.goal.order_by('deadline', 'created_at').explain()
+        self.assertIn('goal_owner_deadline_idx', plan)
+
+    def test_top_level_filter_uses_partial_index(self):
+        """
+        Filtering a user's goals with no parent uses the partial index
+        """
+        plan = self.tester.goal.filter(parent=None).order_by(
+            'deadline', 'created_at').explain()
+        self.assertIn('goal_owner_top_level_idx', plan)
+
+
+class GoalCursorPaginationTests(APITestCase):
+    """
+    Tests for the opt-in cursor pagination of the goal list view
+    """
+    def test_cursor_pages_return_every_goal_once(self):
+        """
+        Logged in user following cursor links receives all of their goals
+        once
+        """
+        tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        focus = Focus.objects.create(owner=tester, name="Focus", why="Why")
+        for i in range(32):
+            Goal.objects.create(owner=tester, title=f'Goal {i}', focus=focus)
+        self.client.login(username='FirstTester', password='pass')
+        response = self.client.get('/goals/?cursor=')
+        ids = [goal['id'] for goal in response.data['results']]
+        response = self.client.get(response.data['next'])
+        ids += [goal['id'] for goal in response.data['results']]
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(sorted(ids), list(range(1, 33)))
+
+
+class GoalDeadlineTests(APITestCase):
+    """
+    Tests for the days_remaining and deadline_near fields
+    """
+    def test_days_remaining_and_deadline_near(self):
+        """
+        Logged in user receives the days remaining until a goal's deadline
+        and whether the deadline is near
+        """
+        tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        focus = Focus.objects.create(owner=tester, name="Focus", why="Why")
+        now = datetime(2030, 6, 15, 12, 0)
+        for days in [3, 30]:
+            Goal.objects.create(
+                owner=tester,
+                title=f'{days} days',
+                focus=focus,
+                deadline=now.replace(tzinfo=timezone.utc) + timedelta(
+                    days=days, hours=1)
+            )
+        self.client.login(username='FirstTester', password='pass')
+        with mock.patch('take_control_api.deadlines.datetime') as clock:
+            clock.now.return_value = now
+            response = self.client.get('/goals/')
+        goals = {goal['title']: goal for goal in response.data['results']}
+        self.assertEqual(goals['3 days']['days_remaining'], 3)
+        self.assertTrue(goals['3 days']['deadline_near'])
+        self.assertEqual(goals['30 days']['days_remaining'], 30)
+        self.assertFalse(goals['30 days']['deadline_near'])
+        self.assertEqual(clock.now.call_count, 1)
+
+
+class GoalListCacheTests(APITestCase):
+    """
+    Tests for the cached goal list
+    """
+    def test_edit_invalidates_cache(self):
+        """
+        Logged in user editing a goal receives the change in the next list
+        """
+        tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        focus = Focus.objects.create(owner=tester, name="Focus", why="Why")
+        Goal.objects.create(owner=tester, title='Goal', focus=focus)
+        self.client.login(username='FirstTester', password='pass')
+        self.client.get('/goals/')
+        self.assertEqual(self.client.get('/goals/')['X-Cache'], 'HIT')
+        self.client.patch('/goals/1', {'title': 'title changed'})
+        response = self.client.get('/goals/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['title'], 'title changed')
+
+
+class GoalConditionalRequestTests(APITestCase):
+    """
+    Tests for ETag and conditional requests on the goal views
+    """
+    def test_unchanged_goal_not_modified(self):
+        """
+        Logged in user sending the ETag of their goal receives 304 until
+        the goal is changed
+        """
+        tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        focus = Focus.objects.create(owner=tester, name="Focus", why="Why")
+        Goal.objects.create(owner=tester, title='Goal', focus=focus)
+        self.client.login(username='FirstTester', password='pass')
+        etag = self.client.get('/goals/1')['ETag']
+        response = self.client.get('/goals/1', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.client.patch('/goals/1', {'title': 'title changed'})
+        response = self.client.get('/goals/1', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class GoalTreeViewTests(APITestCase):
+    """
+    Tests for the Goal tree view
+    """
+    def setUp(self):
+        """
+        Create a user with two focus areas. The first focus has two top
+        level goals, one with a nested goal which itself has a nested goal
+        with a task. Create a second user with a focus.
+        """
+        tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        focus = Focus.objects.create(owner=tester, name="Focus", why="Why")
+        other_focus = Focus.objects.create(
+            owner=tester, name="Other focus", why="Why")
+        top = Goal.objects.create(owner=tester, title='Top', focus=focus)
+        Goal.objects.create(owner=tester, title='Second top', focus=focus)
+        middle = Goal.objects.create(
+            owner=tester, title='Middle', focus=focus, parent=top)
+        bottom = Goal.objects.create(
+            owner=tester, title='Bottom', focus=focus, parent=middle)
+        Goal.objects.create(
+            owner=tester, title='Other focus goal', focus=other_focus)
+        Task.objects.create(owner=tester, name='Task', goal=bottom)
+        second_tester = User.objects.create_user(
+            username='SecondTester', password='word')
+        Focus.objects.create(owner=second_tester, name="Test", why="Why")
+
+    def test_logged_out_no_goal_tree(self):
+        """
+        Logged out user requesting a goal tree should return 403 error
+        """
+        response = self.client.get('/goals/tree/1')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_goal_tree_nests_goals(self):
+        """
+        Logged in user receives the whole goal tree for a focus, with
+        nested goals inside their parents, in one request
+        """
+        self.client.login(username='FirstTester', password='pass')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/goals/tree/1')
+        goals = response.data['goals']
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            sorted(goal['title'] for goal in goals), ['Second top', 'Top'])
+        top = [goal for goal in goals if goal['title'] == 'Top'][0]
+        middle = top['nested_goals'][0]
+        self.assertEqual(middle['title'], 'Middle')
+        self.assertEqual(middle['nested_goals'][0]['title'], 'Bottom')
+        self.assertEqual(middle['nested_goals'][0]['nested_goals'], [])
+        self.assertEqual(len(context.captured_queries), 4)
+
+    def test_goal_tree_task_counts(self):
+        """
+        Logged in user can request the number of tasks for each goal
+        """
+        self.client.login(username='FirstTester', password='pass')
+        response = self.client.get('/goals/tree/1?task_counts=True')
+        top = [
+            goal for goal in response.data['goals'] if goal['title'] == 'Top'
+        ][0]
+        self.assertEqual(top['task_count'], 0)
+        bottom = top['nested_goals'][0]['nested_goals'][0]
+        self.assertEqual(bottom['task_count'], 1)
+
+    def test_goal_tree_denied_focus_dont_own(self):
+        """
+        Logged in user requesting the goal tree of a focus they don't own
+        should return 404 not found
+        """
+        self.client.login(username='FirstTester', password='pass')
+        response = self.client.get('/goals/tree/3')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_goal_tree_level_by_level_fallback(self):
+        """
+        Databases without recursive queries receive the same goal tree
+        """
+        self.client.login(username='FirstTester', password='pass')
+        response = self.client.get('/goals/tree/1?task_counts=True')
+        with mock.patch(
+                'goals.tree.supports_recursive_cte', return_value=False):
+            fallback = self.client.get('/goals/tree/1?task_counts=True')
+        self.assertEqual(fallback.data, response.data)
+
+
+class GoalPathTests(APITestCase):
+    """
+    Tests for the goal path and the descendant_of and ancestor_of filters
+    """
+    def setUp(self):
+        """
+        Create a user with a focus, a top goal with a nested middle goal
+        which has a nested bottom goal, and a second top goal
+        """
+        tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        focus = Focus.objects.create(owner=tester, name="Focus", why="Why")
+        self.top = Goal.objects.create(
+            owner=tester, title='Top', focus=focus)
+        self.middle = Goal.objects.create(
+            owner=tester, title='Middle', focus=focus, parent=self.top)
+        self.bottom = Goal.objects.create(
+            owner=tester, title='Bottom', focus=focus, parent=self.middle)
+        self.second_top = Goal.objects.create(
+            owner=tester, title='Second top', focus=focus)
+        second_tester = User.objects.create_user(
+            username='SecondTester', password='word')
+        Focus.objects.create(owner=second_tester, name="Test", why="Why")
+
+    def test_paths_set_on_create(self):
+        """
+        Goals are given the path of their parent followed by their own id
+        """
+        self.assertEqual(self.top.path, '1/')
+        self.assertEqual(Goal.objects.get(id=3).path, '1/2/3/')
+
+    def test_move_updates_nested_paths(self):
+        """
+        Moving a goal to a new parent moves the paths of its nested goals
+        """
+        self.client.login(username='FirstTester', password='pass')
+        self.client.patch('/goals/2', {'parent': 4})
+        self.assertEqual(Goal.objects.get(id=2).path, '4/2/')
+        self.assertEqual(Goal.objects.get(id=3).path, '4/2/3/')
+        self.assertEqual(
+            list(self.second_top.get_descendants().order_by('id')),
+            [self.middle, self.bottom])
+
+    def test_goal_cannot_nest_in_itself(self):
+        """
+        Logged in user nesting a goal inside its own nested goal should
+        return 400 error
+        """
+        self.client.login(username='FirstTester', password='pass')
+        response = self.client.patch('/goals/1', {'parent': 3})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Goal.objects.get(id=1).path, '1/')
+
+    def test_filter_by_descendant_of(self):
+        """
+        Logged in user can request every goal nested under a goal
+        """
+        self.client.login(username='FirstTester', password='pass')
+        response = self.client.get('/goals/?descendant_of=1')
+        titles = sorted(goal['title'] for goal in response.data['results'])
+        self.assertEqual(titles, ['Bottom', 'Middle'])
+
+    def test_filter_by_ancestor_of(self):
+        """
+        Logged in user can request every goal a goal is nested under
+        """
+        self.client.login(username='FirstTester', password='pass')
+        response = self.client.get('/goals/?ancestor_of=3')
+        titles = sorted(goal['title'] for goal in response.data['results'])
+        self.assertEqual(titles, ['Middle', 'Top'])
+        self.assertEqual(
+            list(self.bottom.get_ancestors()), [self.top, self.middle])
+
+    def test_filter_by_descendant_of_goal_dont_own(self):
+        """
+        Logged in user filtering by a goal they don't own receives nothing
+        """
+        self.client.login(username='SecondTester', password='word')
+        response = self.client.get('/goals/?descendant_of=1')
+        self.assertEqual(response.data['count'], 0)
+
+
+class GoalChildrenTests(APITestCase):
+    """
+    Tests for the server maintained children and child_count fields
+    """
+    def setUp(self):
+        """
+        Create a user with a focus and two top level goals
+        """
+        tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        focus = Focus.objects.create(owner=tester, name="Focus", why="Why")
+        Goal.objects.create(owner=tester, title='First', focus=focus)
+        Goal.objects.create(owner=tester, title='Second', focus=focus)
+        self.client.login(username='FirstTester', password='pass')
+
+    def test_nesting_goal_sets_children(self):
+        """
+        Creating a nested goal sets children and child_count on its parent
+        """
+        self.client.post(
+            '/goals/', {"title": "nested", "focus": 1, "parent": 1})
+        response = self.client.get('/goals/1')
+        self.assertTrue(response.data['children'])
+        self.assertEqual(response.data['child_count'], 1)
+
+    def test_moving_goal_updates_both_parents(self):
+        """
+        Moving a nested goal to a new parent updates both parents
+        """
+        self.client.post(
+            '/goals/', {"title": "nested", "focus": 1, "parent": 1})
+        self.client.patch('/goals/3', {"parent": 2})
+        first = Goal.objects.get(id=1)
+        second = Goal.objects.get(id=2)
+        self.assertFalse(first.children)
+        self.assertEqual(first.child_count, 0)
+        self.assertTrue(second.children)
+        self.assertEqual(second.child_count, 1)
+
+    def test_deleting_goal_updates_parent(self):
+        """
+        Deleting a nested goal takes it off its parent's child count
+        """
+        self.client.post(
+            '/goals/', {"title": "nested", "focus": 1, "parent": 1})
+        self.client.post(
+            '/goals/', {"title": "nested again", "focus": 1, "parent": 1})
+        self.client.delete('/goals/3')
+        first = Goal.objects.get(id=1)
+        self.assertTrue(first.children)
+        self.assertEqual(first.child_count, 1)
+
+    def test_children_read_only(self):
+        """
+        Logged in user sending children is ignored
+        """
+        self.client.patch('/goals/1', {"children": True})
+        self.assertFalse(Goal.objects.get(id=1).children)
+
+    def test_sync_goal_children_command(self):
+        """
+        The sync_goal_children command repairs children and child_count
+        """
+        self.client.post(
+            '/goals/', {"title": "nested", "focus": 1, "parent": 1})
+        Goal.objects.update(children=False, child_count=0)
+        Goal.objects.filter(id=2).update(children=True, child_count=4)
+        call_command('sync_goal_children', stdout=StringIO())
+        first = Goal.objects.get(id=1)
+        second = Goal.objects.get(id=2)
+        self.assertTrue(first.children)
+        self.assertEqual(first.child_count, 1)
+        self.assertFalse(second.children)
+        self.assertEqual(second.child_count, 0)
+
+
+class GoalSearchTests(APITestCase):
+    """
+    Tests for full text search of goals and the rebuild_search_index
+    command
+    """
+    def setUp(self):
+        """
+        Create two users, each with a focus and a goal mentioning a
+        marathon, and a further goal for the first user
+        """
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        focus = Focus.objects.create(
+            owner=self.tester, name="Fitness", why="Why")
+        Goal.objects.create(
+            owner=self.tester, title='Run a marathon', focus=focus,
+            description='Finish in under four hours')
+        Goal.objects.create(
+            owner=self.tester, title='Learn Spanish', focus=focus,
+            value='Talk to family', criteria='Hold a conversation')
+        second_tester = User.objects.create_user(
+            username='SecondTester', password='word')
+        other_focus = Focus.objects.create(
+            owner=second_tester, name="Other", why="Why")
+        Goal.objects.create(
+            owner=second_tester, title='Marathon', focus=other_focus)
+        self.client.login(username='FirstTester', password='pass')
+
+    def search(self, term):
+        response = self.client.get(f'/goals/?search={term}')
+        return [goal['title'] for goal in response.data['results']]
+
+    def test_search_goals(self):
+        """
+        Goals are found by their title, description, value and criteria
+        """
+        self.assertEqual(self.search('marathon'), ['Run a marathon'])
+        self.assertEqual(self.search('hours'), ['Run a marathon'])
+        self.assertEqual(self.search('family'), ['Learn Spanish'])
+        self.assertEqual(self.search('conversa'), ['Learn Spanish'])
+
+    def test_deleted_goal_not_found(self):
+        """
+        A deleted goal is removed from the search index
+        """
+        self.tester.goal.get(title='Learn Spanish').delete()
+        self.assertEqual(self.search('spanish'), [])
+
+    def test_rebuild_search_index(self):
+        """
+        The command reindexes goals and tasks created without signals
+        """
+        Task.objects.bulk_create([
+            Task(owner=self.tester, name='Buy trainers')])
+        self.assertEqual(self.client.get(
+            '/tasks/?search=trainers').data['count'], 0)
+        out = StringIO()
+        call_command('rebuild_search_index', stdout=out)
+        self.assertIn('Indexed 1 tasks and 3 goals', out.getvalue())
+        self.assertEqual(self.client.get(
+            '/tasks/?search=trainers').data['count'], 1)
+
+
+class GoalSparseFieldsTests(APITestCase):
+    """
+    Tests for choosing the goal fields returned with fields and omit
+    """
+    def setUp(self):
+        """
+        Create a user with a focus and a goal
+        """
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        focus = Focus.objects.create(
+            owner=self.tester, name="Focus", why="Why")
+        self.goal = Goal.objects.create(
+            owner=self.tester, title='Goal', focus=focus,
+            description='Description', value='Value', criteria='Criteria')
+        self.client.login(username='FirstTester', password='pass')
+
+    def test_goal_fields_and_omit(self):
+        """
+        Logged in user can list goals with only the fields they need or
+        leave out the longer text fields
+        """
+        response = self.client.get('/goals/?fields=id,title')
+        self.assertEqual(response.data['results'], [
+            {'id': self.goal.id, 'title': 'Goal'}])
+        response = self.client.get(
+            f'/goals/{self.goal.id}?omit=description,value,criteria')
+        self.assertEqual(response.data['title'], 'Goal')
+        self.assertNotIn('description', response.data)
+        self.assertNotIn('criteria', response.data)
+
+
+class GoalFastListTests(APITestCase):
+    """
+    Tests that the fast goal list gives exactly the same JSON as the
+    standard serializer
+    """
+    def setUp(self):
+        """
+        Create a user with nested goals with deadlines near, far and none
+        """
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        focus = Focus.objects.create(
+            owner=self.tester, name="Focus", why="Why")
+        now = datetime.now(timezone.utc)
+        parent = None
+        for i, days in enumerate([None, -2, 0, 3, 30]):
+            parent = Goal.objects.create(
+                owner=self.tester, title=f'Goal {i}', focus=focus,
+                parent=parent if i % 2 else None, description='Description',
+                deadline=None if days is None
+                else now + timedelta(days=days))
+        Task.objects.create(owner=self.tester, name='Task', goal=parent)
+        self.client.login(username='FirstTester', password='pass')
+
+    def test_fast_list_matches_standard(self):
+        """
+        The goal list, with and without options, matches the standard list
+        byte for byte
+        """
+        for url in [
+            '/goals/', '/goals/?parent=None', '/goals/?cursor=',
+            '/goals/?fields=id,deadline_near,days_remaining',
+        ]:
+            with self.subTest(url=url):
+                get_cache().clear()
+                fast = self.client.get(url)
+                get_cache().clear()
+                with mock.patch.object(GoalList, 'fast_list', False):
+                    standard = self.client.get(url)
+                self.assertEqual(fast.status_code, status.HTTP_200_OK)
+                self.assertEqual(fast.content, standard.content)
+
+
+class GoalOwnedLinksTests(APITestCase):
+    """
+    Tests that goals can only link to the user's own focus areas and goals
+    """
+    def setUp(self):
+        """
+        Create two users, each with a focus and goal
+        """
+        tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        other = User.objects.create_user(
+            username='SecondTester', password='pass')
+        self.focus = Focus.objects.create(owner=tester, name='Focus')
+        self.goal = Goal.objects.create(
+            owner=tester, focus=self.focus, title='Goal')
+        self.other_focus = Focus.objects.create(owner=other, name='Other')
+        self.other_goal = Goal.objects.create(
+            owner=other, focus=self.other_focus, title='Other')
+        self.client.login(username='FirstTester', password='pass')
+
+    def test_links_to_other_users_refused(self):
+        """
+        Creating or moving a goal into another user's focus or goal
+        returns 400
+        """
+        response = self.client.post(
+            '/goals/', {'title': 'New', 'focus': self.other_focus.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('focus', response.data)
+        response = self.client.patch(
+            f'/goals/{self.goal.id}', {'parent': self.other_goal.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('parent', response.data)
+        response = self.client.post(
+            '/goals/',
+            {'title': 'New', 'focus': self.focus.id, 'parent': self.goal.id})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
@@ -0,0 +1,76 @@
+import sqlite3
+from django.db import connection
+from .models import Goal
+
+
+def supports_recursive_cte():
+    """
+    Postgres always supports WITH RECURSIVE, SQLite from version 3.8.3
+    """
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        return sqlite3.sqlite_version_info >= (3, 8, 3)
+    return False
+
+
+def tree_sql():
+    """
+    Builds the recursive query returning every goal under a focus, starting
+    from the goals without a parent, with the depth of each goal
+    """
+    goal_table = Goal._meta.db_table
+    return f'''
+        WITH RECURSIVE tree (id, depth) AS (
+            SELECT id, 0 FROM {goal_table}
+            WHERE owner_id = %s AND focus_id = %s AND parent_id IS NULL
+            UNION ALL
+            SELECT child.id, tree.depth + 1 FROM {goal_table} child
+            INNER JOIN tree ON child.parent_id = tree.id
+            WHERE child.owner_id = %s
+        )
+        SELECT {goal_table}.*, tree.depth
+        FROM {goal_table} INNER JOIN tree ON {goal_table}.id = tree.id
+        ORDER BY tree.depth, {goal_table}.deadline, {goal_table}.created_at
+    '''
+
+
+def load_goal_tree(owner, focus_id):
+    """
+    Returns every goal in the owner's goal tree for a focus, parents before
+    their nested goals. A single recursive query is used where the
+    database supports it, otherwise one query for each level of the tree.
+    """
+    if supports_recursive_cte():
+        goals = list(Goal.objects.raw(
+            tree_sql(), [owner.pk, focus_id, owner.pk]))
+    else:
+        goals = []
+        level = owner.goal.filter(focus_id=focus_id, parent=None)
+        while True:
+            nodes = list(level.order_by('deadline', 'created_at'))
+            if not nodes:
+                break
+            goals += nodes
+            level = owner.goal.filter(parent__in=nodes)
+    for goal in goals:
+        goal.owner = owner
+    return goals
+
+
+def build_tree(goals, rows):
+    """
+    Nests each serialized goal inside its parent's nested_goals, returning
+    the goals without a parent. Parents must come before their nested goals.
+    """
+    by_id = {}
+    roots = []
+    for goal, row in zip(goals, rows):
+        row['nested_goals'] = []
+        by_id[goal.id] = row
+        parent = by_id.get(goal.parent_id)
+        if parent is None:
+            roots.append(row)
+        else:
+            parent['nested_goals'].append(row)
+    return roots
@@ -1,7 +1,11 @@
+from django.conf import settings
 from django.urls import path
 from goals import views
 
+list_view = views.AsyncGoalList if settings.ASYNC_VIEWS else views.GoalList
+
 urlpatterns = [
-    path('goals/', views.GoalList.as_view()),
+    path('goals/', list_view.as_view()),
     path('goals/<int:pk>', views.GoalDetail.as_view()),
+    path('goals/tree/<int:focus_id>', views.GoalTree.as_view()),
 ]
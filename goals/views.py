@@ -1,35 +1,76 @@
-from .models import Goal
+from django.shortcuts import get_object_or_404
+from .models import Goal, goal_path, path_ancestor_ids
 from .serializers import GoalSerializer
+from .tree import load_goal_tree, build_tree
 from rest_framework import generics, filters
-from take_control_api.permissions import OwnerOnly
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from take_control_api.asyncviews import AsyncViewMixin
+from take_control_api.cache import CachedListMixin
+from take_control_api.conditional import (
+    ConditionalListMixin, ConditionalDetailMixin
+)
+from take_control_api.fast import FastListMixin
+from take_control_api.pagination import KeysetPaginationMixin
+from take_control_api.permissions import OwnedQuerysetMixin, OwnerOnly
+from take_control_api.search import FullTextSearchFilter
 
 
 class ListFilter(filters.BaseFilterBackend):
     """
-    Custom filter to filter goal list by no parent, parent_id or focus_id
+    Custom filter to filter goal list by no parent, parent_id, focus_id,
+    descendant_of (all goals nested under a goal) or ancestor_of (all goals
+    a goal is nested under)
     """
     def filter_queryset(self, request, queryset, view):
         parent_id = request.query_params.get('parent_id')
         parent = request.query_params.get('parent')
         focus_id = request.query_params.get('focus_id')
+        descendant_of = request.query_params.get('descendant_of')
+        ancestor_of = request.query_params.get('ancestor_of')
         if parent_id:
             queryset = queryset.filter(parent_id=parent_id)
         if parent:
             queryset = queryset.filter(parent=None)
         if focus_id:
             queryset = queryset.filter(focus_id=focus_id)
+        if descendant_of:
+            path = goal_path(request.user, descendant_of)
+            if path is None:
+                return queryset.none()
+            queryset = queryset.filter(
+                path__startswith=path).exclude(path=path)
+        if ancestor_of:
+            path = goal_path(request.user, ancestor_of)
+            if path is None:
+                return queryset.none()
+            queryset = queryset.filter(id__in=path_ancestor_ids(path))
         return queryset
 
 
-class GoalList(generics.ListCreateAPIView):
+class GoalList(
+        ConditionalListMixin,
+        CachedListMixin,
+        KeysetPaginationMixin,
+        FastListMixin,
+        generics.ListCreateAPIView):
     """
     View to return a list of goals for the logged in user
     and also create a new goal
     """
     serializer_class = GoalSerializer
+    keyset_ordering = ['deadline', 'created_at']
     filter_backends = [
-        ListFilter
+        ListFilter,
+        FullTextSearchFilter,
     ]
+    search_fields = [
+        'title',
+        'description',
+        'value',
+        'criteria',
+    ]
+    search_kind = 'goal'
 
     def perform_create(self, serializer):
         """
@@ -46,10 +87,37 @@ class GoalList(generics.ListCreateAPIView):
         return self.request.user.goal.all().order_by('deadline', 'created_at')
 
 
-class GoalDetail(generics.RetrieveUpdateDestroyAPIView):
+class AsyncGoalList(AsyncViewMixin, GoalList):
+    """
+    The list of goals as an async view, for the ASGI application
+    """
+
+
+class GoalDetail(
+        OwnedQuerysetMixin,
+        ConditionalDetailMixin,
+        generics.RetrieveUpdateDestroyAPIView):
     """
     View to return a specific goal where pk will be the id of the goal
     """
     serializer_class = GoalSerializer
-    permission_classes = [OwnerOnly]
-    queryset = Goal.objects.all()
+    permission_classes = [IsAuthenticated, OwnerOnly]
+    queryset = Goal.objects.select_related('owner')
+
+
+class GoalTree(generics.GenericAPIView):
+    """
+    View to return the whole goal tree for one of the logged in user's
+    focus areas, where focus_id is the id of the focus. Each goal holds
+    its nested goals, and each goal gives its stored task counters.
+    """
+    serializer_class = GoalSerializer
+
+    def get(self, request, focus_id):
+        get_object_or_404(request.user.focus, pk=focus_id)
+        goals = load_goal_tree(request.user, focus_id)
+        rows = self.get_serializer(goals, many=True).data
+        return Response({
+            'focus': focus_id,
+            'goals': build_tree(goals, rows),
+        })
@@ -4,3 +4,17 @@ from django.apps import AppConfig
 class LabelsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'labels'
+
+    def ready(self):
+        """
+        Moves the owner on to a new data version whenever a label is
+        saved or deleted so cached lists are never served stale, and
+        publishes the change to the owner's event streams
+        """
+        from django.db.models.signals import post_save, post_delete
+        from take_control_api.cache import bump_owner_version
+        from take_control_api.events import publish_deleted, publish_saved
+        post_save.connect(bump_owner_version, sender='labels.Label')
+        post_delete.connect(bump_owner_version, sender='labels.Label')
+        post_save.connect(publish_saved, sender='labels.Label')
+        post_delete.connect(publish_deleted, sender='labels.Label')
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.24 on 2026-10-18 15:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labels', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='label',
+            index=models.Index(fields=['owner', 'created_at'], name='label_owner_created_idx'),
+        ),
+    ]
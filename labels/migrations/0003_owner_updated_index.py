@@ -0,0 +1,17 @@
+# Generated by Django 3.2.24 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labels', '0002_owner_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='label',
+            index=models.Index(fields=['owner', 'updated_at'], name='label_owner_updated_idx'),
+        ),
+    ]
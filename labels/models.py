@@ -31,6 +31,14 @@ class Label(models.Model):
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['owner', 'created_at'],
+                name='label_owner_created_idx'),
+            models.Index(
+                fields=['owner', 'updated_at'],
+                name='label_owner_updated_idx'),
+        ]
 
     def __str__(self):
-        return f'{self.id} {self.title}'
+        return f'{self.id} {self.name}'
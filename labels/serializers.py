@@ -0,0 +1,48 @@
+from rest_framework import serializers
+from take_control_api.fast import FastListSerializerMixin
+from take_control_api.serializers import SparseFieldsMixin
+from .models import Label
+
+
+class LabelSerializer(
+        SparseFieldsMixin, FastListSerializerMixin,
+        serializers.ModelSerializer):
+    """
+    Serializer for the Label model. It changes owner.id into owner.username
+    and adds an extra field is_owner. GET requests can choose the fields
+    returned with fields or omit. fast_is_owner gives is_owner for the fast
+    list path.
+    """
+    owner = serializers.ReadOnlyField(source='owner.username')
+    is_owner = serializers.SerializerMethodField()
+    fast_method_values = {'is_owner': ['owner_id']}
+
+    def get_is_owner(self, obj):
+        request = self.context['request']
+        return request.user.pk == obj.owner_id
+
+    def fast_is_owner(self, row):
+        return self.context['request'].user.pk == row['owner_id']
+
+    class Meta:
+        model = Label
+        fields = [
+            'id',
+            'owner',
+            'is_owner',
+            'created_at',
+            'updated_at',
+            'name',
+            'colour',
+        ]
+
+
+class LabelSummarySerializer(
+        FastListSerializerMixin, serializers.ModelSerializer):
+    """
+    The name and colour of a label, embedded in each task so a list of
+    tasks can show its labels without looking each one up
+    """
+    class Meta:
+        model = Label
+        fields = ['id', 'name', 'colour']
@@ -1,3 +1,140 @@
-from django.test import TestCase
+from unittest import mock
+from django.contrib.auth.models import User
+from .models import Label
+from .views import LabelList
+from take_control_api.cache import get_cache
+from rest_framework import status
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+
+class LabelListViewTests(APITestCase):
+    """
+    Tests for the Label List view
+    """
+    def setUp(self):
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+
+    def test_logged_out_no_view_label_list(self):
+        """
+        Not logged in user sending HTTP get request, should return 403 error
+        """
+        response = self.client.get('/labels/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_logged_in_can_create_label(self):
+        """
+        Logged in user sending a post request with name and colour,
+        should return 201 and create
+        """
+        self.client.login(username='FirstTester', password='pass')
+        response = self.client.post(
+            '/labels/', {'name': 'Home', 'colour': 'lime'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['owner'], 'FirstTester')
+        self.assertEqual(Label.objects.get().name, 'Home')
+
+    def test_label_create_bad_colour_throws_error(self):
+        """
+        Logged in user sending a colour not in the choices,
+        should return 400 error
+        """
+        self.client.login(username='FirstTester', password='pass')
+        response = self.client.post(
+            '/labels/', {'name': 'Home', 'colour': 'brown'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Label.objects.exists())
+
+    def test_label_view_own_labels_only_by_name(self):
+        """
+        Logged in user sending get request, receives only their labels in
+        order of name
+        """
+        other = User.objects.create_user(
+            username='SecondTester', password='word')
+        Label.objects.create(owner=other, name='Other', colour='pink')
+        for name in ['Work', 'Home']:
+            Label.objects.create(owner=self.tester, name=name, colour='lime')
+        self.client.login(username='FirstTester', password='pass')
+        response = self.client.get('/labels/')
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(
+            [label['name'] for label in response.data['results']],
+            ['Home', 'Work'])
+
+    def test_fast_list_matches_standard(self):
+        """
+        The fast label list gives exactly the same JSON as the standard
+        serializer
+        """
+        for name in ['Work', 'Home', 'Gym']:
+            Label.objects.create(owner=self.tester, name=name, colour='lime')
+        self.client.login(username='FirstTester', password='pass')
+        get_cache().clear()
+        fast = self.client.get('/labels/')
+        get_cache().clear()
+        with mock.patch.object(LabelList, 'fast_list', False):
+            standard = self.client.get('/labels/')
+        self.assertEqual(fast.content, standard.content)
+
+
+class LabelDetailViewTests(APITestCase):
+    """
+    Tests for the Label Detail view
+    """
+    def setUp(self):
+        tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        self.label = Label.objects.create(
+            owner=tester, name='Home', colour='lime')
+        other = User.objects.create_user(
+            username='SecondTester', password='word')
+        self.other_label = Label.objects.create(
+            owner=other, name='Other', colour='pink')
+        self.client.login(username='FirstTester', password='pass')
+
+    def test_logged_in_can_get_their_label_detail(self):
+        """
+        Logged in user sending a get request for a label they own,
+        should return the label
+        """
+        response = self.client.get(f'/labels/{self.label.id}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['name'], 'Home')
+        self.assertTrue(response.data['is_owner'])
+
+    def test_logged_in_owner_can_edit_their_label(self):
+        """
+        Logged in user sending a patch request for owned label,
+        should return ok and make changes
+        """
+        response = self.client.patch(
+            f'/labels/{self.label.id}', {'colour': 'gold'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.label.refresh_from_db()
+        self.assertEqual(self.label.colour, 'gold')
+
+    def test_logged_in_owner_can_delete_their_label(self):
+        """
+        Logged in user sending a delete request for owned label,
+        should return no content and delete the label
+        """
+        response = self.client.delete(f'/labels/{self.label.id}')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(Label.objects.count(), 1)
+
+    def test_logged_in_denied_label_dont_own(self):
+        """
+        Logged in user sending requests for a label they don't own,
+        should return 404 not found as if it didn't exist
+        """
+        url = f'/labels/{self.other_label.id}'
+        self.assertEqual(
+            self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(
+            self.client.patch(url, {'name': 'Mine'}).status_code,
+            status.HTTP_404_NOT_FOUND)
+        self.assertEqual(
+            self.client.delete(url).status_code, status.HTTP_404_NOT_FOUND)
+        self.other_label.refresh_from_db()
+        self.assertEqual(self.other_label.name, 'Other')
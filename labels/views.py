@@ -1,3 +1,50 @@
-from django.shortcuts import render
+from .models import Label
+from .serializers import LabelSerializer
+from rest_framework import generics
+from rest_framework.permissions import IsAuthenticated
+from take_control_api.cache import CachedListMixin
+from take_control_api.conditional import (
+    ConditionalListMixin, ConditionalDetailMixin
+)
+from take_control_api.fast import FastListMixin
+from take_control_api.pagination import KeysetPaginationMixin
+from take_control_api.permissions import OwnedQuerysetMixin, OwnerOnly
 
-# Create your views here.
+
+class LabelList(
+        ConditionalListMixin,
+        CachedListMixin,
+        KeysetPaginationMixin,
+        FastListMixin,
+        generics.ListCreateAPIView):
+    """
+    View to return a list of labels for the logged in user
+    and also create a new label
+    """
+    serializer_class = LabelSerializer
+    keyset_ordering = ['name', 'created_at']
+
+    def perform_create(self, serializer):
+        """
+        Adds owner data to the object before it is saved
+        """
+        serializer.save(owner=self.request.user)
+
+    def get_queryset(self):
+        """
+        Pulls all of the labels that belong to the current user and only
+        those, in order of name and then created_at
+        """
+        return self.request.user.label.all().order_by('name', 'created_at')
+
+
+class LabelDetail(
+        OwnedQuerysetMixin,
+        ConditionalDetailMixin,
+        generics.RetrieveUpdateDestroyAPIView):
+    """
+    View to return a specific label where pk will be the id of the label
+    """
+    serializer_class = LabelSerializer
+    permission_classes = [IsAuthenticated, OwnerOnly]
+    queryset = Label.objects.select_related('owner')
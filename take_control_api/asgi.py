@@ -9,8 +9,16 @@ https://docs.djangoproject.com/en/3.2/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'take_control_api.settings')
+os.environ.setdefault('ASYNC_VIEWS', '1')
 
-application = get_asgi_application()
+django.setup(set_prefix=False)
+
+from take_control_api.asyncviews import StreamingASGIHandler  # noqa: E402
+from take_control_api.events import EventStreamRouter  # noqa: E402
+
+django_application = StreamingASGIHandler()
+
+application = EventStreamRouter(django_application)
@@ -0,0 +1,111 @@
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections
+
+_executor = None
+
+
+def get_executor():
+    """
+    Returns the pool of ASYNC_VIEW_THREADS threads async views run in.
+    Each thread keeps its own database connection, so the pool size
+    limits the connections each process opens.
+    """
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            settings.ASYNC_VIEW_THREADS, thread_name_prefix='async-view')
+    return _executor
+
+
+def run_view(view, request, *args, **kwargs):
+    """
+    Runs a view and renders its response in the calling thread, looking
+    after the thread's database connection as Django does at the start
+    and end of each request
+    """
+    close_old_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render') and callable(response.render):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+class AsyncViewMixin:
+    """
+    Makes a view async for the ASGI application. Under ASGI, Django 3.2
+    runs every sync view on the same single thread, so one slow query or
+    Cloudinary upload holds up every other request in the process. An
+    async view instead runs the view and renders its response in a thread
+    from a pool, behind a single sync_to_async boundary as the ORM is
+    sync only, and the event loop carries on serving other requests
+    while it waits.
+    """
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        run = sync_to_async(
+            functools.partial(run_view, view),
+            thread_sensitive=False, executor=get_executor())
+
+        async def async_view(request, *args, **kwargs):
+            return await run(request, *args, **kwargs)
+
+        functools.update_wrapper(async_view, view)
+        return async_view
+
+
+def response_headers(response):
+    """
+    Returns a response's headers and cookies as ASGI sends them
+    """
+    headers = [
+        (header.encode('ascii'), value.encode('latin1'))
+        for header, value in response.items()
+    ]
+    for cookie in response.cookies.values():
+        headers.append(
+            (b'Set-Cookie', cookie.output(header='').encode('ascii').strip()))
+    return headers
+
+
+class StreamingASGIHandler(ASGIHandler):
+    """
+    Django's ASGI handler, reading streaming responses in the thread sync
+    views run in. Django 3.2 reads them on the event loop, so a stream that
+    queries the database as it is sent, such as the export, would raise
+    SynchronousOnlyOperation. Each part is read behind sync_to_async in the
+    same thread, which keeps the stream's database cursors on the
+    connection that opened them, and the response is closed there after.
+    """
+    async def send_response(self, response, send):
+        if not response.streaming:
+            await super().send_response(response, send)
+            return
+        read = sync_to_async(next, thread_sensitive=True)
+        parts = iter(response)
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': response.status_code,
+                'headers': response_headers(response),
+            })
+            while True:
+                part = await read(parts, None)
+                if part is None:
+                    break
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+            await send({'type': 'http.response.body'})
+        finally:
+            await sync_to_async(response.close, thread_sensitive=True)()
@@ -0,0 +1,132 @@
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.response import Response
+
+HITS_KEY = 'list-cache:hits'
+MISSES_KEY = 'list-cache:misses'
+
+
+def get_cache():
+    return caches[settings.LIST_CACHE_ALIAS]
+
+
+def version_key(user_id):
+    return f'list-cache:version:{user_id}'
+
+
+def get_data_version(user_id):
+    """
+    Returns the user's current data version. A user without a version
+    (new, or evicted from the cache) starts from the current time so it
+    can never match an older cached entry.
+    """
+    cache = get_cache()
+    key = version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_data_version(user_id):
+    """
+    Moves the user on to a new data version so none of their cached
+    lists will be served again. Inside a transaction the version is moved
+    on again once it commits, as a request made before then reads the old
+    rows and may cache them under the version moved to here.
+    """
+    move_data_version(user_id)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: move_data_version(user_id))
+
+
+def move_data_version(user_id):
+    cache = get_cache()
+    key = version_key(user_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, time.time_ns(), None)
+
+
+def bump_owner_version(sender, instance, **kwargs):
+    """
+    Signal receiver for the owned models, connected in each app's ready
+    """
+    bump_data_version(instance.owner_id)
+
+
+def bump_user_version(sender, instance, **kwargs):
+    """
+    Signal receiver for the User model so a recreated user id never
+    picks up cached lists left by a previous user
+    """
+    bump_data_version(instance.pk)
+
+
+def count(key):
+    """
+    Adds one to a counter, in a single call to the cache once it exists
+    """
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def cache_stats():
+    """
+    Returns the list cache hit and miss counters, reported by the
+    cache_stats command
+    """
+    cache = get_cache()
+    return {
+        'hits': cache.get(HITS_KEY, 0),
+        'misses': cache.get(MISSES_KEY, 0),
+    }
+
+
+def reset_cache_stats():
+    get_cache().delete_many([HITS_KEY, MISSES_KEY])
+
+
+class CachedListMixin:
+    """
+    Caches the response of a list view per user. The key holds the user's
+    data version, so any save or delete of their data means the next
+    request misses and is rebuilt. Nothing is cached unless
+    LIST_CACHE_ENABLED, which needs a cache shared by every process.
+    """
+    def get_list_cache_key(self, request):
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values
+        )
+        raw = f'{request.get_host()}{request.path}?{params}'
+        digest = hashlib.md5(raw.encode('utf-8')).hexdigest()
+        version = get_data_version(request.user.pk)
+        return f'list-cache:{request.user.pk}:{version}:{digest}'
+
+    def list(self, request, *args, **kwargs):
+        if not settings.LIST_CACHE_ENABLED:
+            return super().list(request, *args, **kwargs)
+        cache = get_cache()
+        key = self.get_list_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            count(HITS_KEY)
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        count(MISSES_KEY)
+        response = super().list(request, *args, **kwargs)
+        cache.set(key, response.data, settings.LIST_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
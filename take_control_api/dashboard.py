@@ -0,0 +1,96 @@
+from datetime import timedelta
+from django.db.models import Count, Q
+from django.db.models.functions import Coalesce
+from take_control_api.deadlines import start_of_day
+from tasks.models import Task
+
+COUNT_FIELDS = ['total', 'achieved', 'open', 'today', 'due_today', 'overdue']
+
+
+def task_counts(now):
+    """
+    Returns the conditional counts used by every dashboard group. Overdue
+    and due today only count tasks which haven't been achieved. The
+    counts are named count_<field> as some share a name with a task field.
+    """
+    start_of_today = start_of_day(now)
+    start_of_tomorrow = start_of_today + timedelta(days=1)
+    still_open = Q(achieved=False)
+    counts = {
+        'total': Count('id'),
+        'achieved': Count('id', filter=Q(achieved=True)),
+        'open': Count('id', filter=still_open),
+        'today': Count('id', filter=still_open & Q(today=True)),
+        'due_today': Count('id', filter=still_open & Q(
+            deadline__gte=start_of_today, deadline__lt=start_of_tomorrow)),
+        'overdue': Count('id', filter=still_open & Q(
+            deadline__lt=start_of_today)),
+    }
+    return {f'count_{field}': count for field, count in counts.items()}
+
+
+def grouped_counts(queryset, group, aggregates):
+    """
+    Returns the counts for each value of group as a dictionary
+    """
+    return {
+        row[group]: {
+            field: row[f'count_{field}'] for field in COUNT_FIELDS
+        }
+        for row in queryset.values(group).annotate(**aggregates)
+    }
+
+
+def empty_counts():
+    return dict.fromkeys(COUNT_FIELDS, 0)
+
+
+def progress(counts):
+    """
+    Returns the percentage of tasks achieved, rounded down
+    """
+    if not counts['total']:
+        return 0
+    return counts['achieved'] * 100 // counts['total']
+
+
+def build_summary(user, now):
+    """
+    Returns the user's dashboard: task counts overall, for each focus area
+    and for each goal. Tasks linked to a goal count towards the goal's
+    focus area. Two grouped queries count the tasks and two more fetch the
+    focus names and goal titles, whatever the number of tasks.
+    """
+    tasks = Task.objects.filter(owner=user).order_by()
+    aggregates = task_counts(now)
+    by_focus = grouped_counts(
+        tasks.annotate(focus_key=Coalesce('focus_id', 'goal__focus_id')),
+        'focus_key', aggregates)
+    by_goal = grouped_counts(
+        tasks.filter(goal__isnull=False), 'goal_id', aggregates)
+
+    totals = empty_counts()
+    for counts in by_focus.values():
+        for field in COUNT_FIELDS:
+            totals[field] += counts[field]
+
+    focus_areas = []
+    for focus in user.focus.order_by('rank', 'created_at').values(
+            'id', 'name'):
+        focus.update(by_focus.get(focus['id'], empty_counts()))
+        focus['progress'] = progress(focus)
+        focus_areas.append(focus)
+
+    goals = []
+    for goal in user.goal.order_by('deadline', 'created_at').values(
+            'id', 'title', 'focus_id', 'parent_id'):
+        goal.update(by_goal.get(goal['id'], empty_counts()))
+        goal['progress'] = progress(goal)
+        goals.append(goal)
+
+    return {
+        'tasks': totals,
+        'unlinked': by_focus.get(None, empty_counts()),
+        'focus': focus_areas,
+        'goals': goals,
+    }
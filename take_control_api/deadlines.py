@@ -0,0 +1,60 @@
+from datetime import datetime, time, timedelta, timezone
+
+OVERDUE = 'overdue'
+TODAY = 'today'
+TOMORROW = 'tomorrow'
+DUE = 'due'
+
+
+def get_now(context):
+    """
+    Returns the 'now' snapshot stored in the serializer context, taking
+    it the first time it is asked for. Every row serialized for a request
+    then shares the same now, so a page is consistent and the clock is
+    only read once.
+    """
+    now = context.get('now')
+    if now is None:
+        now = context['now'] = datetime.now()
+    return now
+
+
+def start_of_day(now):
+    """
+    Returns midnight UTC at the start of now's day. Tasks with a deadline
+    before this are overdue.
+    """
+    return datetime.combine(now.date(), time.min, tzinfo=timezone.utc)
+
+
+def days_remaining(deadline, now):
+    """
+    Returns the number of whole days from now until the deadline
+    """
+    return (deadline - now.replace(tzinfo=timezone.utc)).days
+
+
+def deadline_bucket(deadline, now):
+    """
+    Sorts a deadline into overdue, today, tomorrow or due
+    """
+    days = days_remaining(deadline, now)
+    if days < -1:
+        return OVERDUE
+    if days < 3:
+        today = now.date()
+        if deadline.day == today.day:
+            return TODAY
+        tomorrow = today + timedelta(days=1)
+        if deadline.day == tomorrow.day:
+            return TOMORROW
+    return DUE
+
+
+def deadline_info(deadline, now, messages):
+    """
+    Returns the message for the deadline's bucket followed by the
+    deadline as an easy to read date
+    """
+    easy_date = deadline.strftime('%d/%m/%y')
+    return f'{messages[deadline_bucket(deadline, now)]} {easy_date}'
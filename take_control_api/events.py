@@ -0,0 +1,277 @@
+import asyncio
+import json
+from collections import defaultdict
+from io import BytesIO
+from threading import Lock
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core import signals
+from django.core.handlers.asgi import ASGIRequest
+from django.db import transaction
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+RETRY_MS = 5000
+HEARTBEAT = b': heartbeat\n\n'
+# Sent in place of events a client fell too far behind to be sent, and
+# for changes made in bulk. The client catches up with sync.
+SYNC_EVENT = {'action': 'sync'}
+
+
+class Subscription:
+    """
+    One client's stream of a user's events, held in a queue of at most
+    queue_size events. If the client can't keep up and the queue fills,
+    the waiting events are dropped for a single sync event, so a slow
+    client never holds up publishing or grows without limit.
+    """
+    def __init__(self, broker, user_id, queue_size):
+        self.broker = broker
+        self.user_id = user_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(queue_size)
+
+    def put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(SYNC_EVENT)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """
+    Passes events to the streams open in this process. publish can be
+    called from any thread, such as a sync view's, and hands each event to
+    the loop of every stream subscribed to the user. A broker shared by
+    several processes, over Redis for example, would offer the same
+    subscribe, unsubscribe and publish and be set in EVENTS_BROKER.
+    """
+    def __init__(self):
+        self.subscriptions = defaultdict(set)
+        self.lock = Lock()
+
+    def subscribe(self, user_id):
+        """
+        Returns a new subscription to the user's events, or None if they
+        already have EVENTS_MAX_STREAMS streams open
+        """
+        with self.lock:
+            if len(self.subscriptions[user_id]) >= settings.EVENTS_MAX_STREAMS:
+                return None
+            subscription = Subscription(
+                self, user_id, settings.EVENTS_QUEUE_SIZE)
+            self.subscriptions[user_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self.lock:
+            subscriptions = self.subscriptions.get(subscription.user_id)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self.subscriptions[subscription.user_id]
+
+    def publish(self, user_id, event):
+        with self.lock:
+            subscriptions = list(self.subscriptions.get(user_id, ()))
+        for subscription in subscriptions:
+            subscription.loop.call_soon_threadsafe(subscription.put, event)
+
+
+_broker = None
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        _broker = import_string(settings.EVENTS_BROKER)()
+    return _broker
+
+
+def publish(user_id, event):
+    """
+    Publishes the event to the user's streams once the current
+    transaction commits, so clients never fetch a change not yet saved
+    """
+    transaction.on_commit(lambda: get_broker().publish(user_id, event))
+
+
+def publish_sync(user_id):
+    """
+    Tells the user's streams that many changes have been made at once
+    """
+    publish(user_id, SYNC_EVENT)
+
+
+def publish_saved(sender, instance, **kwargs):
+    """
+    Signal receiver for the owned models, connected in each app's ready
+    """
+    publish(instance.owner_id, {
+        'type': sender._meta.model_name,
+        'id': instance.pk,
+        'action': 'saved',
+        'updated_at': instance.updated_at.isoformat(),
+    })
+
+
+def publish_deleted(sender, instance, **kwargs):
+    """
+    Signal receiver for the owned models, connected in each app's ready
+    """
+    publish(instance.owner_id, {
+        'type': sender._meta.model_name,
+        'id': instance.pk,
+        'action': 'deleted',
+    })
+
+
+def format_event(event):
+    return b'data: ' + json.dumps(event, separators=(',', ':')).encode() + (
+        b'\n\n')
+
+
+def no_response(request):
+    return None
+
+
+def authenticate(scope):
+    """
+    Returns the user logged in by a request's cookies, using the API's own
+    authentication classes, or None. Runs as the start and end of a
+    request so database connections are looked after as for any view.
+    """
+    signals.request_started.send(sender=authenticate, scope=scope)
+    try:
+        request = ASGIRequest(scope, BytesIO())
+        SessionMiddleware(no_response).process_request(request)
+        AuthenticationMiddleware(no_response).process_request(request)
+        request = Request(request, authenticators=[
+            authenticator()
+            for authenticator in api_settings.DEFAULT_AUTHENTICATION_CLASSES
+        ])
+        try:
+            user = request.user
+        except APIException:
+            return None
+        return user if user.is_authenticated else None
+    finally:
+        signals.request_finished.send(sender=authenticate)
+
+
+def cors_headers(scope):
+    """
+    Returns the CORS headers for a request from an allowed origin, as
+    the corsheaders middleware gives every other response
+    """
+    origin = dict(scope['headers']).get(b'origin', b'').decode('latin1')
+    if origin not in settings.CORS_ALLOWED_ORIGINS:
+        return []
+    headers = [(b'access-control-allow-origin', origin.encode('latin1'))]
+    if settings.CORS_ALLOW_CREDENTIALS:
+        headers.append((b'access-control-allow-credentials', b'true'))
+    return headers + [(b'vary', b'Origin')]
+
+
+async def send_error(send, status, detail, headers=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), *headers],
+    })
+    await send({
+        'type': 'http.response.body',
+        'body': json.dumps({'detail': detail}).encode(),
+    })
+
+
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def stream_events(scope, receive, send):
+    """
+    ASGI application streaming the logged in user's changes as server-sent
+    events. Each event is a line of JSON giving the type, id and action,
+    saved or deleted, of a focus, goal, label or task, or a sync action
+    when the client should catch up with the sync endpoint. A comment is
+    sent every EVENTS_HEARTBEAT_SECONDS so proxies keep the stream open
+    and a closed connection is noticed.
+    """
+    cors = cors_headers(scope)
+    if scope['method'] != 'GET':
+        await send_error(send, 405, f'Method "{scope["method"]}" not allowed.')
+        return
+    user = await sync_to_async(authenticate)(scope)
+    if user is None:
+        await send_error(
+            send, 403, 'Authentication credentials were not provided.', cors)
+        return
+    subscription = get_broker().subscribe(user.pk)
+    if subscription is None:
+        await send_error(send, 429, 'Too many event streams open.', cors)
+        return
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+                *cors,
+            ],
+        })
+        message = f'retry: {RETRY_MS}\n\n'.encode()
+        while True:
+            await send({
+                'type': 'http.response.body',
+                'body': message,
+                'more_body': True,
+            })
+            event = asyncio.ensure_future(subscription.get())
+            done, _ = await asyncio.wait(
+                {event, disconnected},
+                timeout=settings.EVENTS_HEARTBEAT_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED)
+            if event in done:
+                message = format_event(event.result())
+            else:
+                event.cancel()
+                message = HEARTBEAT
+            if disconnected in done:
+                break
+    finally:
+        subscription.close()
+        disconnected.cancel()
+
+
+class EventStreamRouter:
+    """
+    Serves the event stream at EVENTS_PATH and passes every other request
+    to the Django application. The stream is plain ASGI, as Django 3.2's
+    handler reads a streaming response synchronously and would block the
+    event loop while waiting for events.
+    """
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['path'] == settings.EVENTS_PATH:
+            await stream_events(scope, receive, send)
+        else:
+            await self.application(scope, receive, send)
@@ -0,0 +1,137 @@
+import csv
+from datetime import datetime
+from focus.models import Focus
+from goals.models import Goal
+from labels.models import Label
+from tasks.models import Task
+from .renderers import NDJSONRenderer
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+# The fields exported for each type of record, in the order they're
+# written. Goals come parent first and tasks after everything they link
+# to, so an export can be read back in a single pass.
+EXPORT_FIELDS = {
+    'focus': [
+        'id', 'created_at', 'updated_at', 'name', 'rank', 'why', 'image'],
+    'label': ['id', 'created_at', 'updated_at', 'name', 'colour'],
+    'goal': [
+        'id', 'focus_id', 'parent_id', 'created_at', 'updated_at', 'active',
+        'deadline', 'title', 'description', 'value', 'criteria'],
+    'task': [
+        'id', 'focus_id', 'goal_id', 'created_at', 'updated_at', 'today',
+        'achieved', 'name', 'deadline', 'active', 'image', 'labels'],
+}
+EXPORT_COLUMNS = ['type'] + list(dict.fromkeys(
+    field for fields in EXPORT_FIELDS.values() for field in fields))
+
+
+def rows(queryset, kind, chunk_size):
+    """
+    Streams the values of each row from a server-side cursor, chunk_size
+    rows at a time, so only one chunk is ever held in memory
+    """
+    return queryset.values(*EXPORT_FIELDS[kind]).iterator(chunk_size)
+
+
+def task_rows(user, chunk_size):
+    """
+    Streams the user's tasks with the ids of their labels. The tasks and
+    their label links are read from two cursors in task order and merged
+    as they go, rather than a query for each task.
+    """
+    fields = [field for field in EXPORT_FIELDS['task'] if field != 'labels']
+    links = Task.labels.through.objects.filter(task__owner=user).order_by(
+        'task_id', 'label_id').values_list(
+        'task_id', 'label_id').iterator(chunk_size)
+    link = next(links, None)
+    tasks = Task.objects.filter(owner=user).order_by('id').values(*fields)
+    for row in tasks.iterator(chunk_size):
+        row['labels'] = []
+        while link is not None and link[0] <= row['id']:
+            if link[0] == row['id']:
+                row['labels'].append(link[1])
+            link = next(links, None)
+        yield row
+
+
+def export_records(user, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields every focus, label, goal and task belonging to the user as a
+    dictionary, its type given under 'type'
+    """
+    sources = [
+        ('focus', rows(
+            Focus.objects.filter(owner=user).order_by('id'),
+            'focus', chunk_size)),
+        ('label', rows(
+            Label.objects.filter(owner=user).order_by('id'),
+            'label', chunk_size)),
+        ('goal', rows(
+            Goal.objects.filter(owner=user).order_by('path', 'id'),
+            'goal', chunk_size)),
+        ('task', task_rows(user, chunk_size)),
+    ]
+    for kind, source in sources:
+        for row in source:
+            yield {'type': kind, **row}
+
+
+def ndjson_lines(records):
+    render = NDJSONRenderer().render
+    for record in records:
+        yield render(record)
+
+
+class Echo:
+    """
+    A file-like object handing back each line csv.writer writes to it
+    """
+    def write(self, value):
+        return value
+
+
+def csv_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, list):
+        return ' '.join(str(item) for item in value)
+    return value
+
+
+def csv_lines(records):
+    """
+    CSV with a column for every field of every type of record. Fields a
+    record's type doesn't have are left empty and label ids are separated
+    by spaces.
+    """
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_COLUMNS).encode()
+    for record in records:
+        yield writer.writerow([
+            csv_value(record.get(column)) for column in EXPORT_COLUMNS
+        ]).encode()
+
+
+EXPORT_FORMATS = {'ndjson': ndjson_lines, 'csv': csv_lines}
+
+
+def export_stream(user, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yields the user's export in the format given, ndjson or csv, as chunks
+    of about EXPORT_BUFFER_SIZE bytes. Lines are gathered into chunks so a
+    compressed response isn't flushed after every line.
+    """
+    buffer = []
+    size = 0
+    for line in EXPORT_FORMATS[export_format](
+            export_records(user, chunk_size)):
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_BUFFER_SIZE:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b''.join(buffer)
@@ -0,0 +1,371 @@
+from collections import Counter, defaultdict
+from django.db import connection, transaction
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from focus.models import Focus
+from goals.models import Goal, change_child_count
+from labels.models import Label
+from tasks.models import MISCELLANEOUS_IMAGE, Task, recount_tasks
+from tasks.serializers import TaskBulkCreateSerializer
+from .cache import bump_data_version
+from .events import publish_sync
+from .search import index_goals, index_tasks
+
+IMPORT_BATCH_SIZE = 500
+IMPORT_LIMIT = 10000
+IMPORT_ERROR_LIMIT = 100
+
+# Links are named as in the export. Each names the type of record it
+# points to, which is either in the same import or already the user's.
+FIELD_NAMES = {'focus_id': 'focus', 'goal_id': 'goal', 'parent_id': 'parent'}
+REFERENCES = {
+    'goal': {'focus': 'focus', 'parent': 'goal'},
+    'task': {'focus': 'focus', 'goal': 'goal', 'labels': 'label'},
+}
+# What is kept of each of the user's own records linked to
+OWNED_VALUES = {'focus': 'image', 'label': 'id', 'goal': 'path'}
+
+
+class FocusImportSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+    image = serializers.CharField(required=False, max_length=100)
+
+    class Meta:
+        model = Focus
+        fields = ['id', 'name', 'rank', 'why', 'image']
+
+
+class LabelImportSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+
+    class Meta:
+        model = Label
+        fields = ['id', 'name', 'colour']
+
+
+class GoalImportSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+    focus = serializers.IntegerField()
+    parent = serializers.IntegerField(required=False, allow_null=True)
+
+    class Meta:
+        model = Goal
+        fields = [
+            'id', 'focus', 'parent', 'title', 'description', 'value',
+            'criteria', 'deadline', 'active']
+
+
+class TaskImportSerializer(TaskBulkCreateSerializer):
+    id = serializers.IntegerField(required=False)
+
+    class Meta:
+        model = Task
+        fields = ['id'] + TaskBulkCreateSerializer.Meta.fields
+
+
+IMPORT_SERIALIZERS = {
+    'focus': FocusImportSerializer,
+    'label': LabelImportSerializer,
+    'goal': GoalImportSerializer,
+    'task': TaskImportSerializer,
+}
+
+
+class Importer:
+    """
+    Imports focus areas, labels, goals and tasks in the format of the
+    export, given as line numbers and records. Records are validated a
+    batch at a time and links between them are resolved in memory, so
+    each type is inserted with bulk_create in a single transaction.
+    Links to records not in the import must be to the user's own data.
+    Nothing is imported if any record is invalid.
+    """
+    def __init__(self, user, batch_size=IMPORT_BATCH_SIZE, limit=None,
+                 progress=None):
+        self.user = user
+        self.batch_size = batch_size
+        self.limit = limit
+        self.progress = progress or (lambda message: None)
+        self.rows = defaultdict(list)
+        self.pending = defaultdict(list)
+        self.source_ids = defaultdict(set)
+        self.errors = defaultdict(dict)
+        self.count = 0
+
+    def run(self, records):
+        """
+        Validates and imports the records, returning the number of each
+        type created or raising a ValidationError listing the problems
+        """
+        for line, record in records:
+            self.add(line, record)
+        for kind in IMPORT_SERIALIZERS:
+            self.validate_batch(kind)
+        if not self.count:
+            raise ValidationError({'records': ['No records given']})
+        self.raise_errors(force=True)
+        self.progress(f'Validated {self.count} records')
+        self.check_references()
+        levels = self.goal_levels()
+        self.raise_errors(force=True)
+        self.new_ids = defaultdict(dict)
+        with transaction.atomic():
+            self.create_focus_areas()
+            self.create_labels()
+            self.create_goals(levels)
+            self.create_tasks()
+        bump_data_version(self.user.pk)
+        publish_sync(self.user.pk)
+        return {kind: len(rows) for kind, rows in self.rows.items()}
+
+    def error(self, line, errors):
+        self.errors[line].update(errors)
+
+    def raise_errors(self, force=False):
+        """
+        Raises the errors found so far, by line number, once there are too
+        many to go on or when forced
+        """
+        if self.errors and (force or len(self.errors) >= IMPORT_ERROR_LIMIT):
+            lines = sorted(self.errors)[:IMPORT_ERROR_LIMIT]
+            raise ValidationError(
+                {'records': {line: self.errors[line] for line in lines}})
+
+    def add(self, line, record):
+        self.count += 1
+        if self.limit is not None and self.count > self.limit:
+            raise ValidationError(
+                {'records': [f'No more than {self.limit} records']})
+        kind = record.get('type')
+        if kind not in IMPORT_SERIALIZERS:
+            self.error(line, {'type': [
+                f'Must be one of: {", ".join(IMPORT_SERIALIZERS)}']})
+        else:
+            record = {
+                FIELD_NAMES.get(field, field): value
+                for field, value in record.items()
+            }
+            self.pending[kind].append((line, record))
+            if len(self.pending[kind]) >= self.batch_size:
+                self.validate_batch(kind)
+        self.raise_errors()
+
+    def validate_batch(self, kind):
+        """
+        Validates the records of one type waiting in pending together
+        """
+        batch, self.pending[kind] = self.pending[kind], []
+        if not batch:
+            return
+        serializer = IMPORT_SERIALIZERS[kind](
+            data=[record for _, record in batch], many=True)
+        if not serializer.is_valid():
+            for (line, _), errors in zip(batch, serializer.errors):
+                if errors:
+                    self.error(line, errors)
+            return
+        for (line, _), row in zip(batch, serializer.validated_data):
+            source_id = row.pop('id', None)
+            if source_id is not None:
+                if source_id in self.source_ids[kind]:
+                    self.error(line, {'id': ['Used more than once']})
+                    continue
+                self.source_ids[kind].add(source_id)
+            self.rows[kind].append((line, source_id, row))
+
+    def references(self):
+        """
+        Yields every link: the line, type and field it is on, the type it
+        points to and the id given
+        """
+        for kind, fields in REFERENCES.items():
+            for line, _, row in self.rows[kind]:
+                for field, target in fields.items():
+                    values = row.get(field)
+                    if not isinstance(values, list):
+                        values = [values]
+                    for value in values:
+                        if value is not None:
+                            yield line, kind, field, target, value
+
+    def check_references(self):
+        """
+        Checks that every link not to a record in the import is to the
+        user's own data, with one query for each type linked to. Keeps the
+        image of each focus and path of each goal found for later.
+        """
+        outside = defaultdict(set)
+        for _, _, _, target, value in self.references():
+            if value not in self.source_ids[target]:
+                outside[target].add(value)
+        self.existing = {
+            target: dict(getattr(self.user, target).filter(
+                id__in=outside[target]).values_list('id', field))
+            if outside[target] else {}
+            for target, field in OWNED_VALUES.items()
+        }
+        for line, kind, field, target, value in self.references():
+            if (value not in self.source_ids[target]
+                    and value not in self.existing[target]):
+                self.error(line, {field: [f'Not found: {value}']})
+
+    def goal_levels(self):
+        """
+        Groups the goals by how deeply they are nested below goals not in
+        the import, so parents can be created before their nested goals.
+        Goals nested inside themselves are reported.
+        """
+        parents = {
+            source_id: row.get('parent')
+            for _, source_id, row in self.rows['goal']
+            if source_id is not None
+        }
+        depths = {}
+        levels = defaultdict(list)
+        for line, source_id, row in self.rows['goal']:
+            chain = []
+            parent = row.get('parent')
+            while parent in parents and parent not in depths:
+                if parent in chain:
+                    self.error(line, {
+                        'parent': ['A goal cannot be nested inside itself']})
+                    break
+                chain.append(parent)
+                parent = parents[parent]
+            else:
+                depth = depths[parent] + 1 if parent in depths else 0
+                for goal in reversed(chain):
+                    depths[goal] = depth
+                    depth += 1
+                if source_id is not None:
+                    depths[source_id] = depth
+                levels[depth].append((line, source_id, row))
+        return [levels[depth] for depth in sorted(levels)]
+
+    def link(self, target, value):
+        """
+        Returns the id of the record a link points to, from the import if
+        it is there and otherwise the user's own
+        """
+        if value is None or value not in self.source_ids[target]:
+            return value
+        return self.new_ids[target][value]
+
+    def insert(self, model, objects):
+        """
+        Inserts the objects with bulk_create and sets their ids. Postgres
+        returns the ids. SQLite can't, but the insert holds the database's
+        write lock until the transaction ends, so the newest ids in the
+        table are the rows just inserted. Elsewhere each is saved in turn.
+        """
+        if connection.features.can_return_rows_from_bulk_insert:
+            model.objects.bulk_create(objects)
+        elif connection.vendor == 'sqlite':
+            model.objects.bulk_create(objects)
+            ids = model.objects.order_by('-pk').values_list(
+                'pk', flat=True)[:len(objects)]
+            for obj, pk in zip(objects, reversed(ids)):
+                obj.pk = pk
+        else:
+            for obj in objects:
+                obj.save()
+
+    def create(self, kind, model, rows, build):
+        """
+        Inserts the rows a batch at a time, remembering the new id given to
+        each source id. Returns the objects created, in the order of rows.
+        """
+        created = []
+        for start in range(0, len(rows), self.batch_size):
+            batch = rows[start:start + self.batch_size]
+            objects = [
+                build(source_id, dict(row)) for _, source_id, row in batch]
+            self.insert(model, objects)
+            for (_, source_id, _), obj in zip(batch, objects):
+                if source_id is not None:
+                    self.new_ids[kind][source_id] = obj.pk
+            created += objects
+            self.progress(
+                f'Created {len(created)} of {len(self.rows[kind])} '
+                f'{kind} records')
+        return created
+
+    def create_focus_areas(self):
+        focus_areas = self.create(
+            'focus', Focus, self.rows['focus'],
+            lambda source_id, row: Focus(owner=self.user, **row))
+        self.focus_images = {
+            **self.existing['focus'],
+            **{focus.pk: focus.image.name for focus in focus_areas},
+        }
+
+    def create_labels(self):
+        self.create(
+            'label', Label, self.rows['label'],
+            lambda source_id, row: Label(owner=self.user, **row))
+
+    def create_goals(self, levels):
+        """
+        Inserts the goals a level at a time so every parent has its id
+        before its nested goals, then sets their paths, the child counts
+        of goals they are nested under and their search entries
+        """
+        child_counts = Counter(
+            row.get('parent') for _, _, row in self.rows['goal'])
+
+        def build(source_id, row):
+            count = child_counts[source_id] if source_id is not None else 0
+            return Goal(
+                owner=self.user,
+                focus_id=self.link('focus', row.pop('focus')),
+                parent_id=self.link('goal', row.pop('parent', None)),
+                child_count=count,
+                children=count > 0,
+                **row)
+
+        goals = []
+        for level in levels:
+            goals += self.create('goal', Goal, level, build)
+        paths = dict(self.existing['goal'])
+        for goal in goals:
+            goal.path = f'{paths.get(goal.parent_id, "")}{goal.pk}/'
+            paths[goal.pk] = goal.path
+        Goal.objects.bulk_update(goals, ['path'], self.batch_size)
+        for parent_id, count in child_counts.items():
+            if parent_id in self.existing['goal']:
+                change_child_count(parent_id, count)
+        for start in range(0, len(goals), self.batch_size):
+            index_goals(Goal.objects.filter(id__in=[
+                goal.pk for goal in goals[start:start + self.batch_size]]))
+
+    def create_tasks(self):
+        """
+        Inserts the tasks, each with the image of its focus as when a task
+        is created, then their label links, the task counters of the focus
+        areas and goals they link to and their search entries
+        """
+        def build(source_id, row):
+            focus_id = self.link('focus', row.pop('focus', None))
+            row.pop('labels', None)
+            return Task(
+                owner=self.user,
+                focus_id=focus_id,
+                goal_id=self.link('goal', row.pop('goal', None)),
+                image=self.focus_images.get(focus_id, MISCELLANEOUS_IMAGE),
+                **row)
+
+        rows = self.rows['task']
+        tasks = self.create('task', Task, rows, build)
+        Task.labels.through.objects.bulk_create([
+            Task.labels.through(
+                task_id=task.pk, label_id=self.link('label', label))
+            for (_, _, row), task in zip(rows, tasks)
+            for label in set(row.get('labels', []))
+        ], self.batch_size)
+        recount_tasks(Focus, Focus.objects.filter(
+            id__in={task.focus_id for task in tasks} - {None}))
+        recount_tasks(Goal, Goal.objects.filter(
+            id__in={task.goal_id for task in tasks} - {None}))
+        for start in range(0, len(tasks), self.batch_size):
+            index_tasks(Task.objects.filter(id__in=[
+                task.pk for task in tasks[start:start + self.batch_size]]))
@@ -0,0 +1,185 @@
+import re
+import zlib
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ETAG_SUFFIX = re.compile(r'-(?:gzip|br|zstd)(?=")')
+
+
+class GzipCompressor:
+    def __init__(self, level):
+        self.compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return (
+            self.compressor.compress(data)
+            + self.compressor.flush(zlib.Z_SYNC_FLUSH))
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliCompressor:
+    def __init__(self, level):
+        self.compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data):
+        return self.compressor.process(data) + self.compressor.flush()
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+class ZstdCompressor:
+    def __init__(self, level):
+        self.compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data):
+        return self.compressor.compress(data) + self.compressor.flush(
+            zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+def available_compressors():
+    """
+    Returns the compressor for each encoding whose library is installed
+    """
+    compressors = {'gzip': GzipCompressor}
+    if brotli is not None:
+        compressors['br'] = BrotliCompressor
+    if zstandard is not None:
+        compressors['zstd'] = ZstdCompressor
+    return compressors
+
+
+def compress(encoding, data, level=None):
+    """
+    Compresses the whole of data with the encoding given
+    """
+    if level is None:
+        level = settings.COMPRESSION_LEVELS[encoding]
+    compressor = available_compressors()[encoding](level)
+    return compressor.compress(data) + compressor.finish()
+
+
+def accepted_encodings(header):
+    """
+    Returns the quality given to each encoding in an Accept-Encoding header
+    """
+    accepted = {}
+    for part in header.split(','):
+        name, *params = [value.strip() for value in part.split(';')]
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition('=')
+            if key.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+    return accepted
+
+
+def choose_encoding(header):
+    """
+    Returns the first encoding in COMPRESSION_ENCODINGS that is installed
+    and accepted by the client, or None
+    """
+    accepted = accepted_encodings(header)
+    compressors = available_compressors()
+    for encoding in settings.COMPRESSION_ENCODINGS:
+        quality = accepted.get(encoding, accepted.get('*', 0.0))
+        if encoding in compressors and quality > 0:
+            return encoding
+    return None
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """
+    Compresses responses with gzip, or brotli or zstd when installed, as
+    preferred in COMPRESSION_ENCODINGS and accepted by the client. Only
+    content types in COMPRESSION_CONTENT_TYPES are compressed, and only
+    when at least COMPRESSION_MIN_SIZE bytes. Streaming responses are
+    compressed chunk by chunk so they still stream.
+
+    Paths in COMPRESSION_EXCLUDED_PATHS, the login and token endpoints,
+    are never compressed, so a response holding a JWT alongside text from
+    the request can't be used to guess the token from its size (BREACH).
+
+    A compressed response's ETag gets the encoding added, as in
+    "abc-gzip", as it is a different set of bytes. The suffix is removed
+    from If-None-Match and If-Match before the view sees them, so
+    conditional requests work whichever encoding the client received.
+    """
+    def process_request(self, request):
+        request.etag_encoding = False
+        for header in ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MATCH'):
+            value = request.META.get(header)
+            if value and ETAG_SUFFIX.search(value):
+                request.etag_encoding = True
+                request.META[header] = ETAG_SUFFIX.sub('', value)
+
+    def process_response(self, request, response):
+        if response.has_header('Content-Encoding'):
+            return response
+        if any(request.path.startswith(path)
+               for path in settings.COMPRESSION_EXCLUDED_PATHS):
+            return response
+        encoding = choose_encoding(
+            request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if response.status_code == 304:
+            if encoding and getattr(request, 'etag_encoding', False):
+                self.suffix_etag(response, encoding)
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if content_type.strip() not in settings.COMPRESSION_CONTENT_TYPES:
+            return response
+        if (not response.streaming
+                and len(response.content) < settings.COMPRESSION_MIN_SIZE):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if encoding is None:
+            return response
+        level = settings.COMPRESSION_LEVELS[encoding]
+        if response.streaming:
+            response.streaming_content = self.compress_stream(
+                response.streaming_content, encoding, level)
+            del response['Content-Length']
+        else:
+            compressed = compress(encoding, response.content, level)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+        self.suffix_etag(response, encoding)
+        response['Content-Encoding'] = encoding
+        return response
+
+    def compress_stream(self, chunks, encoding, level):
+        compressor = available_compressors()[encoding](level)
+        for chunk in chunks:
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+
+    def suffix_etag(self, response, encoding):
+        etag = response.get('ETag')
+        if etag and etag.endswith('"'):
+            response['ETag'] = f'{etag[:-1]}-{encoding}"'
@@ -0,0 +1,151 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from django.core.exceptions import ValidationError
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination keyed on the view's keyset_ordering, with id as a
+    tie-breaker. Each page is fetched with a WHERE clause on the last row of
+    the previous page instead of an OFFSET, and no COUNT is run, so every
+    page costs the same however deep the user scrolls.
+    Null values are always sorted last, matching the ordering used by
+    the frontend.
+    """
+    page_size = api_settings.PAGE_SIZE
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.model = queryset.model
+        self.fields = list(view.keyset_ordering) + ['id']
+        position = self.decode_cursor(request)
+        queryset = queryset.order_by(
+            *[F(field).asc(nulls_last=True) for field in self.fields])
+        if position is not None:
+            queryset = queryset.filter(self.after(self.fields, position))
+        results = list(queryset[:self.page_size + 1])
+        self.has_next = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                },
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        last = self.page[-1]
+        position = [
+            self.get_value(last, field) for field in self.fields
+        ]
+        url = self.request.build_absolute_uri()
+        return replace_query_param(
+            url, self.cursor_query_param, self.encode_cursor(position))
+
+    def after(self, fields, position):
+        """
+        Builds the filter for rows that come after the given position.
+        With nulls last, a null value is only followed by other nulls.
+        """
+        field, value = fields[0], position[0]
+        if len(fields) == 1:
+            return Q(**{f'{field}__gt': value})
+        rest = self.after(fields[1:], position[1:])
+        if value is None:
+            return Q(**{f'{field}__isnull': True}) & rest
+        return (
+            Q(**{f'{field}__gt': value})
+            | Q(**{f'{field}__isnull': True})
+            | (Q(**{field: value}) & rest)
+        )
+
+    def get_value(self, obj, field):
+        """
+        Follows a field path such as goal__deadline on an instance, or
+        looks it up in a row from a values() query
+        """
+        if isinstance(obj, dict):
+            return obj[field]
+        for attr in field.split('__'):
+            obj = getattr(obj, attr)
+            if obj is None:
+                return None
+        return obj
+
+    def get_field(self, field):
+        """
+        Follows a field path such as goal__deadline on the model
+        """
+        model = self.model
+        for attr in field.split('__'):
+            model_field = model._meta.get_field(attr)
+            model = model_field.related_model
+        return model_field
+
+    def encode_cursor(self, position):
+        values = [
+            value.isoformat() if hasattr(value, 'isoformat') else value
+            for value in position
+        ]
+        encoded = json.dumps(values, separators=(',', ':')).encode('ascii')
+        return urlsafe_b64encode(encoded).decode('ascii')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            values = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            if len(values) != len(self.fields):
+                raise ValueError
+            return [
+                None if value is None
+                else self.get_field(field).to_python(value)
+                for field, value in zip(self.fields, values)
+            ]
+        except (TypeError, ValueError, ValidationError, BinasciiError):
+            raise NotFound(self.invalid_cursor_message)
+
+
+class KeysetPaginationMixin:
+    """
+    Opt-in keyset pagination for list views. Sending the cursor query
+    parameter (empty for the first page) switches the view from page number
+    pagination to KeysetPagination. Views set keyset_ordering to their
+    stable ordering.
+    """
+    keyset_ordering = None
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            cursor_param = KeysetPagination.cursor_query_param
+            if cursor_param in self.request.query_params:
+                self._paginator = KeysetPagination()
+            else:
+                self._paginator = super().paginator
+        return self._paginator
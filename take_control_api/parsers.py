@@ -0,0 +1,87 @@
+import codecs
+import csv
+import json
+from io import BytesIO
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+from .renderers import FastJSONRenderer, orjson
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSON parser using orjson for UTF-8 bodies where it is installed. Any
+    body orjson rejects, such as integers too large for 64 bits, is given
+    to the standard parser, which also reports genuinely invalid JSON.
+    """
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(BytesIO(body), media_type, parser_context)
+
+
+def read_ndjson(lines):
+    """
+    Yields the line number and object of each non-blank line of NDJSON
+    as the lines are read
+    """
+    loads = orjson.loads if orjson is not None else json.loads
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = loads(line)
+        except ValueError:
+            raise ParseError(f'Line {number}: invalid JSON')
+        if not isinstance(record, dict):
+            raise ParseError(f'Line {number}: expected an object')
+        yield number, record
+
+
+def read_csv(lines):
+    """
+    Yields the line number and values of each CSV row as the lines are
+    read, leaving out empty values and splitting labels on spaces
+    """
+    reader = csv.DictReader(codecs.iterdecode(lines, 'utf-8-sig'))
+    try:
+        for row in reader:
+            record = {
+                column: value for column, value in row.items()
+                if column is not None and value not in ('', None)
+            }
+            if 'labels' in record:
+                record['labels'] = record['labels'].split()
+            yield reader.line_num, record
+    except (csv.Error, UnicodeDecodeError) as exc:
+        raise ParseError(f'Line {reader.line_num}: {exc}')
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses newline delimited JSON lazily, giving an iterator of line
+    numbers and objects, so a large upload is read as it is used
+    """
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return read_ndjson(stream if stream is not None else [])
+
+
+class CSVParser(BaseParser):
+    """
+    Parses CSV with a header row lazily, giving an iterator of line numbers
+    and rows, so a large upload is read as it is used
+    """
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return read_csv(stream if stream is not None else [])
@@ -4,7 +4,19 @@ from rest_framework import permissions
 class OwnerOnly(permissions.BasePermission):
     """
     Overrides the base permission and checks that the user is the owner
-    of the object. If not permission will be denied.
+    of the object. If not permission will be denied. The ids are compared
+    so the owner is never loaded just for the check.
     """
     def has_object_permission(self, request, view, obj):
-        return obj.owner == request.user
+        return obj.owner_id == request.user.pk
+
+
+class OwnedQuerysetMixin:
+    """
+    Limits a view's queryset to the logged in user's own objects by
+    owner_id in the query itself. Another user's object is then not found
+    at all, giving 404 as for an id that doesn't exist rather than 403,
+    which would show that it does.
+    """
+    def get_queryset(self):
+        return super().get_queryset().filter(owner_id=self.request.user.pk)
@@ -0,0 +1,73 @@
+import csv
+import io
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer using orjson where it is installed, giving the same bytes
+    as DRF's JSONRenderer: compact UTF-8 with U+2028 and U+2029 escaped.
+    Datetimes and any types orjson doesn't know are encoded by DRF's
+    JSONEncoder, so raw datetimes match too. Indented output, asked for by
+    the browsable API or an indent media type parameter, and data orjson
+    can't encode fall back to the standard renderer.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or not self.compact
+                or self.ensure_ascii or self.get_indent(
+                    accepted_media_type, renderer_context or {}) is not None):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data, default=self.encoder_class().default,
+                option=ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        return ret.replace(
+            b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    """
+    Newline delimited JSON, one compact object a line. Used by the export,
+    which streams its lines itself, so this renders single objects such as
+    error responses.
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        line = super().render(data, accepted_media_type, renderer_context)
+        return line + b'\n'
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    CSV with a header row of the keys of the first object. Used by the
+    export, which streams its rows itself, so this renders single objects
+    such as error responses.
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, list) else [data]
+        buffer = io.StringIO()
+        writer = csv.DictWriter(
+            buffer, fieldnames=list(rows[0]) if rows else [])
+        writer.writeheader()
+        writer.writerows(rows)
+        return buffer.getvalue().encode(self.charset)
@@ -0,0 +1,212 @@
+import re
+from django.db import connection
+from rest_framework import filters
+
+SEARCH_TABLE = 'search_index'
+
+
+def task_document(task):
+    """
+    The text a task is found by: its name, linked focus name and linked
+    goal title
+    """
+    return ' '.join(filter(None, [
+        task.name,
+        task.focus.name if task.focus_id else None,
+        task.goal.title if task.goal_id else None,
+    ]))
+
+
+def goal_document(goal):
+    """
+    The text a goal is found by: its title, description, value and criteria
+    """
+    return ' '.join(filter(None, [
+        goal.title, goal.description, goal.value, goal.criteria
+    ]))
+
+
+def search_terms(term):
+    """
+    Splits a search into words, each of which is matched as a prefix
+    so partial words still find results. Words aren't stemmed, as a
+    stemmed word is no longer a prefix of what was typed.
+    """
+    return re.findall(r'\w+', term)
+
+
+class PostgresSearch:
+    """
+    Search backed by a tsvector column with a GIN index
+    """
+    def index(self, cursor, kind, rows):
+        cursor.executemany(
+            f'''INSERT INTO {SEARCH_TABLE}
+            (kind, object_id, owner_id, document)
+            VALUES (%s, %s, %s, to_tsvector('simple', %s))
+            ON CONFLICT (kind, object_id)
+            DO UPDATE SET owner_id = EXCLUDED.owner_id,
+            document = EXCLUDED.document''',
+            [(kind, *row) for row in rows])
+
+    def remove(self, cursor, kind, ids):
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE kind = %s '
+            f'AND object_id = ANY(%s)', [kind, list(ids)])
+
+    def search(self, queryset, kind, owner_id, terms):
+        query = ' & '.join(f'{term}:*' for term in terms)
+        return join_index(
+            queryset, kind, owner_id,
+            f"{SEARCH_TABLE}.document @@ to_tsquery('simple', %s)", [query],
+            f"ts_rank({SEARCH_TABLE}.document, to_tsquery('simple', %s))",
+            [query], '-search_rank')
+
+
+class SqliteSearch:
+    """
+    Search backed by an SQLite FTS5 table, used in development and tests
+    """
+    def index(self, cursor, kind, rows):
+        self.remove(cursor, kind, [row[0] for row in rows])
+        cursor.executemany(
+            f'INSERT INTO {SEARCH_TABLE} (kind, object_id, owner_id, document)'
+            f' VALUES (%s, %s, %s, %s)',
+            [(kind, *row) for row in rows])
+
+    def remove(self, cursor, kind, ids):
+        ids = list(ids)
+        placeholders = ', '.join(['%s'] * len(ids))
+        cursor.execute(
+            f'DELETE FROM {SEARCH_TABLE} WHERE kind = %s '
+            f'AND object_id IN ({placeholders})', [kind, *ids])
+
+    def search(self, queryset, kind, owner_id, terms):
+        query = ' AND '.join(f'"{term}"*' for term in terms)
+        return join_index(
+            queryset, kind, owner_id, f'{SEARCH_TABLE} MATCH %s', [query],
+            f'{SEARCH_TABLE}.rank', [], 'search_rank')
+
+
+def get_backend():
+    """
+    Returns the search backend for the database in use, or None if it has
+    no full text search, in which case searches fall back to icontains
+    """
+    if connection.vendor == 'postgresql':
+        return PostgresSearch()
+    if connection.vendor == 'sqlite':
+        return SqliteSearch()
+    return None
+
+
+def index_objects(kind, objects, document):
+    """
+    Adds or replaces the search entries for the objects given
+    """
+    backend = get_backend()
+    rows = [(obj.pk, obj.owner_id, document(obj)) for obj in objects]
+    if backend is None or not rows:
+        return
+    with connection.cursor() as cursor:
+        backend.index(cursor, kind, rows)
+
+
+def index_tasks(queryset):
+    index_objects(
+        'task', queryset.select_related('focus', 'goal'), task_document)
+
+
+def index_goals(queryset):
+    index_objects('goal', queryset, goal_document)
+
+
+def remove_objects(kind, ids):
+    backend = get_backend()
+    if backend is None or not ids:
+        return
+    with connection.cursor() as cursor:
+        backend.remove(cursor, kind, ids)
+
+
+def join_index(queryset, kind, owner_id, match, match_params, rank,
+               rank_params, ordering):
+    """
+    Joins the queryset to its search entries matching the search, so only
+    matching rows are returned, and selects each one's rank as
+    search_rank. Returns the queryset and the ordering for best match
+    first.
+    """
+    table = connection.ops.quote_name(queryset.model._meta.db_table)
+    queryset = queryset.extra(
+        tables=[SEARCH_TABLE],
+        where=[
+            f'{SEARCH_TABLE}.kind = %s',
+            f'{SEARCH_TABLE}.object_id = {table}.id',
+            f'{SEARCH_TABLE}.owner_id = %s',
+            match,
+        ],
+        params=[kind, owner_id, *match_params],
+        select={'search_rank': rank},
+        select_params=rank_params)
+    return queryset, ordering
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    Search filter using the full text search index for the view's
+    search_kind. The index is joined in the list's own query, so every
+    match is returned and counted, ordered best match first by the
+    database unless an ordering is given. Databases without full text
+    search fall back to the icontains search over the view's
+    search_fields.
+    """
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, '')
+        if not term.strip():
+            return queryset
+        backend = get_backend()
+        if backend is None:
+            return super().filter_queryset(request, queryset, view)
+        terms = search_terms(term)
+        if not terms:
+            return queryset.none()
+        queryset, ordering = backend.search(
+            queryset, view.search_kind, request.user.pk, terms)
+        if 'ordering' not in request.query_params:
+            queryset = queryset.order_by(ordering)
+        return queryset
+
+
+def task_saved(sender, instance, **kwargs):
+    """
+    Signal receivers keeping the index up to date, connected in each
+    app's ready. A goal's title or focus's name is part of its tasks'
+    text, so a save changing it reindexes its tasks too, compared with
+    the value the goal or focus was loaded with.
+    """
+    index_tasks(sender.objects.filter(pk=instance.pk))
+
+
+def goal_saved(sender, instance, created=False, **kwargs):
+    from tasks.models import Task
+    index_goals(sender.objects.filter(pk=instance.pk))
+    saved_title = getattr(instance, '_saved_task_info', (None, None))[0]
+    if created or instance.title == saved_title:
+        return
+    index_tasks(Task.objects.filter(goal=instance))
+
+
+def focus_saved(sender, instance, created=False, **kwargs):
+    from tasks.models import Task
+    if created or instance.name == getattr(instance, '_saved_name', None):
+        return
+    index_tasks(Task.objects.filter(focus=instance))
+
+
+def task_deleted(sender, instance, **kwargs):
+    remove_objects('task', [instance.pk])
+
+
+def goal_deleted(sender, instance, **kwargs):
+    remove_objects('goal', [instance.pk])
@@ -0,0 +1,51 @@
+from rest_framework.permissions import SAFE_METHODS
+
+
+def field_names(value):
+    return {name.strip() for name in value.split(',') if name.strip()}
+
+
+class SparseFieldsMixin:
+    """
+    Lets a GET request choose the fields returned. ?fields=id,name returns
+    only the fields listed and ?omit=image leaves out the fields listed.
+    Fields left out are dropped before serializing, so their
+    SerializerMethodFields are never run. Unknown names are ignored and
+    other requests always use every field.
+    """
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return fields
+        wanted = field_names(request.query_params.get('fields', ''))
+        omitted = field_names(request.query_params.get('omit', ''))
+        if wanted:
+            fields = {
+                name: field for name, field in fields.items()
+                if name in wanted
+            }
+        for name in omitted:
+            fields.pop(name, None)
+        return fields
+
+
+class OwnedLinksMixin:
+    """
+    Limits the related fields named in owned_links to the requesting
+    user's own objects, filtered by owner_id in the validation query. An
+    id belonging to another user is refused as if it didn't exist.
+    """
+    owned_links = []
+
+    def get_fields(self):
+        fields = super().get_fields()
+        request = self.context.get('request')
+        if request is None:
+            return fields
+        for name in self.owned_links:
+            if name not in fields:
+                continue
+            field = getattr(fields[name], 'child_relation', fields[name])
+            field.queryset = field.queryset.filter(owner_id=request.user.pk)
+        return fields
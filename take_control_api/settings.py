@@ -39,10 +39,19 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 30,
     'DATETIME_FORMAT': '%d %b %Y',
+    'DEFAULT_RENDERER_CLASSES': [
+        'take_control_api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'take_control_api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 if 'DEV' not in os.environ:
-    REST_FRAMEWORK['DEFAULT_RENDERE_CLASSES'] = [
-        'rest_framework.rendererd.JSONRenderer',
+    REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
+        'take_control_api.renderers.FastJSONRenderer',
     ]
 
 REST_USE_JWT = True
@@ -104,6 +113,7 @@ SITE_ID = 1
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'take_control_api.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -161,6 +171,71 @@ else:
     }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# Local memory suits development and tests. In production REDIS_URL points
+# the default cache at Redis, shared by every worker and management command
+# so all of them see the same data versions. Lists and the dashboard are
+# only cached outside development when the cache is shared, as a process's
+# own memory never hears of saves made by the others.
+
+if 'REDIS_URL' in os.environ:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django_redis.cache.RedisCache',
+            'LOCATION': os.environ.get('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+LIST_CACHE_ALIAS = 'default'
+LIST_CACHE_TIMEOUT = 300
+LIST_CACHE_ENABLED = 'DEV' in os.environ or 'REDIS_URL' in os.environ
+
+# Sync, see take_control_api/sync.py. Changes are only sent once they are
+# SYNC_SETTLE_SECONDS old, so a save still being committed isn't skipped,
+# and deletions are kept for SYNC_DELETION_DAYS.
+SYNC_SETTLE_SECONDS = 2
+SYNC_DELETION_DAYS = 90
+
+# Server-sent events, see take_control_api/events.py. The stream is served
+# at EVENTS_PATH by the ASGI application only. EVENTS_BROKER can be set to
+# a broker shared by every process in place of the in-process one.
+EVENTS_PATH = '/events/'
+EVENTS_BROKER = 'take_control_api.events.LocalBroker'
+EVENTS_QUEUE_SIZE = 100
+EVENTS_HEARTBEAT_SECONDS = 15
+EVENTS_MAX_STREAMS = 5
+
+# Async views, see take_control_api/asyncviews.py. ASYNC_VIEWS is set by the
+# ASGI application, which then serves the lists with their async views.
+# Each process runs them in ASYNC_VIEW_THREADS threads, each with its own
+# database connection.
+ASYNC_VIEWS = 'ASYNC_VIEWS' in os.environ
+ASYNC_VIEW_THREADS = 8
+
+# Response compression, see take_control_api/middleware.py. Encodings are
+# in order of preference, brotli and zstd are used only when installed.
+COMPRESSION_ENCODINGS = ['br', 'zstd', 'gzip']
+COMPRESSION_LEVELS = {'br': 4, 'zstd': 3, 'gzip': 6}
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_CONTENT_TYPES = [
+    'application/json',
+    'application/x-ndjson',
+    'text/csv',
+    'text/html',
+    'text/plain',
+    'text/css',
+    'application/javascript',
+]
+COMPRESSION_EXCLUDED_PATHS = ['/dj-rest-auth/', '/api-auth/']
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -0,0 +1,150 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from focus.serializers import FocusSerializer
+from goals.serializers import GoalSerializer
+from labels.serializers import LabelSerializer
+from tasks.models import Deletion
+from tasks.serializers import TaskSerializer
+
+SYNC_LIMIT = 500
+
+# The serializer each type of record is sent with, named as in the export
+SYNC_SERIALIZERS = {
+    'focus': FocusSerializer,
+    'goal': GoalSerializer,
+    'label': LabelSerializer,
+    'task': TaskSerializer,
+}
+INVALID_CURSOR = 'Invalid cursor'
+
+
+class SyncExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = (
+        'Deletions this old are no longer kept. Sync again without a cursor.')
+    default_code = 'sync_expired'
+
+
+def encode_cursor(until, positions):
+    """
+    Encodes the time the sync was made up to and the last row sent of each
+    type, and of deletions, as an opaque string
+    """
+    values = {'until': until.isoformat()}
+    for key, position in positions.items():
+        if position is not None:
+            values[key] = [position[0].isoformat(), position[1]]
+    encoded = json.dumps(values, separators=(',', ':')).encode('ascii')
+    return urlsafe_b64encode(encoded).decode('ascii')
+
+
+def decode_cursor(encoded):
+    """
+    Returns the time and positions held in a cursor, or raises a
+    ValidationError if it wasn't made by encode_cursor
+    """
+    try:
+        values = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+        until = parse_datetime(values.pop('until'))
+        positions = {
+            key: (parse_datetime(values[key][0]), int(values[key][1]))
+            for key in [*SYNC_SERIALIZERS, 'deleted'] if key in values
+        }
+        if until is None or None in (
+                time for time, _ in positions.values()):
+            raise ValueError
+    except (AttributeError, KeyError, TypeError, ValueError,
+            BinasciiError, UnicodeError):
+        raise ValidationError({'cursor': [INVALID_CURSOR]})
+    return until, positions
+
+
+def after(position, field):
+    """
+    Filters to the rows after a position, ordered by the time field and id
+    """
+    time, pk = position
+    return Q(**{f'{field}__gt': time}) | Q(**{field: time, 'id__gt': pk})
+
+
+def changed_rows(request, kind, position, until, limit):
+    """
+    Returns the output for up to limit of the user's records of one type
+    saved after the position and no later than until, oldest first, with
+    the position of the last one. Rows come from the serializer's fast
+    path.
+    """
+    serializer = SYNC_SERIALIZERS[kind](context={'request': request})
+    queryset = serializer.Meta.model.objects.filter(
+        owner_id=request.user.pk, updated_at__lte=until)
+    if position is not None:
+        queryset = queryset.filter(after(position, 'updated_at'))
+    rows = list(serializer.fast_values(
+        queryset.order_by('updated_at', 'id'), ['updated_at'])[:limit])
+    if rows:
+        position = (rows[-1]['updated_at'], rows[-1]['id'])
+    return serializer.fast_rows(rows), position, len(rows) == limit
+
+
+def deleted_ids(user, position, until, limit):
+    """
+    Returns the ids of up to limit of the user's records deleted after
+    the position and no later than until, by type, with the position of
+    the last deletion
+    """
+    deletions = Deletion.objects.filter(
+        owner_id=user.pk, deleted_at__lte=until)
+    if position is not None:
+        deletions = deletions.filter(after(position, 'deleted_at'))
+    rows = list(deletions.order_by('deleted_at', 'id').values_list(
+        'deleted_at', 'id', 'kind', 'object_id')[:limit])
+    deleted = {kind: [] for kind in SYNC_SERIALIZERS}
+    for _, _, kind, object_id in rows:
+        deleted[kind].append(object_id)
+    if rows:
+        position = rows[-1][:2]
+    return deleted, position, len(rows) == limit
+
+
+def build_sync(request, cursor=None, limit=None):
+    """
+    Returns the user's focus areas, goals, labels and tasks saved since
+    the cursor and the ids of those deleted, with a cursor for the next
+    sync. Without a cursor everything is sent and earlier deletions are
+    left out, as the client has nothing to remove. Each type is read from
+    its (owner, updated_at) index, up to limit rows at a time; more is
+    true when there are rows left and the client should ask again at
+    once with the new cursor.
+    """
+    limit = limit or SYNC_LIMIT
+    now = timezone.now()
+    until = now - timedelta(seconds=settings.SYNC_SETTLE_SECONDS)
+    positions = {}
+    if cursor:
+        since, positions = decode_cursor(cursor)
+        if since < now - timedelta(days=settings.SYNC_DELETION_DAYS):
+            raise SyncExpired()
+        until = max(until, since)
+    data = {'changed': {}, 'deleted': {}, 'more': False}
+    for kind in SYNC_SERIALIZERS:
+        rows, positions[kind], more = changed_rows(
+            request, kind, positions.get(kind), until, limit)
+        data['changed'][kind] = rows
+        data['more'] = data['more'] or more
+    if cursor:
+        data['deleted'], positions['deleted'], more = deleted_ids(
+            request.user, positions.get('deleted'), until, limit)
+        data['more'] = data['more'] or more
+    else:
+        data['deleted'] = {kind: [] for kind in SYNC_SERIALIZERS}
+        positions['deleted'] = (until, 0)
+    data['cursor'] = encode_cursor(until, positions)
+    return data
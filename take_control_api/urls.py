@@ -16,7 +16,10 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.permissions import AllowAny
-from .views import root_route, logout_route
+from .views import (
+    root_route, logout_route, DashboardSummary, ExportData, ImportData,
+    SyncData,
+)
 
 urlpatterns = [
     path('', root_route),
@@ -28,5 +31,10 @@ urlpatterns = [
         'dj_rest_auth.registration.urls')),
     path('', include('focus.urls')),
     path('', include('goals.urls')),
+    path('', include('labels.urls')),
     path('', include('tasks.urls')),
+    path('dashboard/', DashboardSummary.as_view()),
+    path('export/', ExportData.as_view()),
+    path('import/', ImportData.as_view()),
+    path('sync/', SyncData.as_view()),
 ]
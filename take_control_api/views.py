@@ -1,6 +1,18 @@
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.utils import timezone
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
+from rest_framework import status
 from rest_framework.permissions import AllowAny
+from rest_framework.views import APIView
+from .cache import get_cache, get_data_version
+from .dashboard import build_summary
+from .export import export_stream
+from .importer import IMPORT_LIMIT, Importer
+from .parsers import CSVParser, NDJSONParser
+from .renderers import CSVRenderer, NDJSONRenderer
+from .sync import build_sync
 from .settings import (
     JWT_AUTH_COOKIE,
     JWT_AUTH_REFRESH_COOKIE,
@@ -40,3 +52,75 @@ def logout_route(request):
         secure=JWT_AUTH_SECURE,
     )
     return response
+
+
+class DashboardSummary(APIView):
+    """
+    Returns the user's dashboard counts. The summary is cached per user
+    under their data version and the date, so any save or delete of their
+    data, or a new day, means it is rebuilt. Nothing is cached unless
+    LIST_CACHE_ENABLED.
+    """
+    def get(self, request):
+        now = timezone.now()
+        if not settings.LIST_CACHE_ENABLED:
+            return Response(build_summary(request.user, now))
+        cache = get_cache()
+        version = get_data_version(request.user.pk)
+        key = f'dashboard:{request.user.pk}:{version}:{now.date()}'
+        data = cache.get(key)
+        if data is not None:
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        data = build_summary(request.user, now)
+        cache.set(key, data, settings.LIST_CACHE_TIMEOUT)
+        response = Response(data)
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class ExportData(APIView):
+    """
+    Streams all of the user's focus areas, labels, goals and tasks as
+    NDJSON, or as CSV when asked for with ?format=csv or an Accept header
+    of text/csv. Rows are read from server-side cursors and sent as they
+    are read, so memory use stays the same however much data the user has.
+    """
+    renderer_classes = [NDJSONRenderer, CSVRenderer]
+
+    def get(self, request):
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            export_stream(request.user, renderer.format),
+            content_type=renderer.media_type)
+        response['Content-Disposition'] = (
+            f'attachment; filename="take-control.{renderer.format}"')
+        return response
+
+
+class ImportData(APIView):
+    """
+    Creates focus areas, labels, goals and tasks from NDJSON or CSV in the
+    format of the export, sent with a Content-Type of application/x-ndjson
+    or text/csv. The ids in the records only link them to each other, so
+    an export can be imported again. Up to IMPORT_LIMIT records are taken
+    and nothing is created if any record is invalid.
+    """
+    parser_classes = [NDJSONParser, CSVParser]
+
+    def post(self, request):
+        created = Importer(request.user, limit=IMPORT_LIMIT).run(request.data)
+        return Response({'created': created}, status=status.HTTP_201_CREATED)
+
+
+class SyncData(APIView):
+    """
+    Returns the user's focus areas, goals, labels and tasks saved since
+    the cursor sent with ?cursor=, and the ids of those deleted, with the
+    cursor to send next time. Without a cursor everything is sent, so a
+    client downloads its data once and afterwards only what has changed.
+    """
+    def get(self, request):
+        return Response(build_sync(
+            request, request.query_params.get('cursor')))
@@ -4,3 +4,25 @@ from django.apps import AppConfig
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tasks'
+
+    def ready(self):
+        """
+        Moves the owner on to a new data version whenever a task is
+        saved, deleted or has its labels changed so cached lists are never
+        served stale, keeps the task's search entry up to date and
+        publishes the change to the owner's event streams
+        """
+        from django.db.models.signals import (
+            post_save, post_delete, m2m_changed
+        )
+        from take_control_api.cache import bump_owner_version
+        from take_control_api.events import publish_deleted, publish_saved
+        from take_control_api.search import task_saved, task_deleted
+        post_save.connect(bump_owner_version, sender='tasks.Task')
+        post_delete.connect(bump_owner_version, sender='tasks.Task')
+        post_save.connect(task_saved, sender='tasks.Task')
+        post_delete.connect(task_deleted, sender='tasks.Task')
+        post_save.connect(publish_saved, sender='tasks.Task')
+        post_delete.connect(publish_deleted, sender='tasks.Task')
+        m2m_changed.connect(
+            bump_owner_version, sender=self.get_model('Task').labels.through)
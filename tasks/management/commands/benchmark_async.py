@@ -0,0 +1,165 @@
+import http.client
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from django.conf import settings
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand, CommandError
+from django.db.backends.signals import connection_created
+from django.test import Client
+from .benchmark_lists import create_benchmark_rows
+
+SERVERS = {
+    'wsgi': ['take_control_api.wsgi'],
+    'asgi': [
+        'take_control_api.asgi:application',
+        '--worker-class', 'uvicorn.workers.UvicornWorker',
+    ],
+}
+# Loaded by each server as its gunicorn config
+GUNICORN_CONFIG = '''
+def post_worker_init(worker):
+    from tasks.management.commands.benchmark_async import slow_queries
+    slow_queries({latency})
+'''
+
+
+def slow_queries(latency):
+    """
+    Makes every query wait latency seconds first, as if the database
+    were across a network
+    """
+    def wait(execute, sql, params, many, context):
+        time.sleep(latency)
+        return execute(sql, params, many, context)
+
+    def add_wait(sender, connection, **kwargs):
+        if wait not in connection.execute_wrappers:
+            connection.execute_wrappers.append(wait)
+
+    if latency:
+        connection_created.connect(add_wait, weak=False)
+
+
+class Command(BaseCommand):
+    """
+    Load tests the list endpoints served by gunicorn's sync workers with
+    the WSGI application against uvicorn workers with the ASGI application
+    and its async list views, with the same number of workers. The same
+    number of clients keep requests open against each in turn. A user
+    with the benchmark rows is created and deleted afterwards.
+    --latency adds a wait before every query to show a remote database.
+    """
+    help = 'Compare list throughput and latency under WSGI and ASGI'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--clients', type=int, default=32)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--rows', type=int, default=100)
+        parser.add_argument(
+            '--latency', type=float, default=0,
+            help='Milliseconds added to every query')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument(
+            '--paths', nargs='+', default=['/focus/', '/goals/', '/tasks/'])
+
+    def handle(self, *args, **options):
+        try:
+            import uvicorn  # noqa: F401
+        except ImportError:
+            raise CommandError('uvicorn is needed to serve the ASGI app')
+        user = create_benchmark_rows(options['rows'])
+        client = Client()
+        client.force_login(user)
+        cookie = client.cookies[settings.SESSION_COOKIE_NAME].value
+        try:
+            with tempfile.TemporaryDirectory() as directory:
+                config = Path(directory) / 'gunicorn.conf.py'
+                config.write_text(GUNICORN_CONFIG.format(
+                    latency=options['latency'] / 1000))
+                self.stdout.write(
+                    f'{"server":<8}{"workers":>8}{"clients":>8}'
+                    f'{"req/s":>9}{"p50 ms":>9}{"p99 ms":>9}{"errors":>8}')
+                for name, arguments in SERVERS.items():
+                    self.compare(name, arguments, config, cookie, options)
+        finally:
+            Session.objects.filter(session_key=cookie).delete()
+            user.delete()
+
+    def compare(self, name, arguments, config, cookie, options):
+        environ = dict(os.environ)
+        environ.pop('ASYNC_VIEWS', None)
+        server = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', *arguments,
+             '--config', str(config),
+             '--workers', str(options['workers']),
+             '--bind', f'127.0.0.1:{options["port"]}',
+             '--log-level', 'critical'],
+            cwd=settings.BASE_DIR, env=environ)
+        try:
+            self.wait_until_up(server, options['port'])
+            headers = {'Cookie': f'{settings.SESSION_COOKIE_NAME}={cookie}'}
+            paths = options['paths']
+            # Warm each worker's connections and caches first
+            self.load(
+                options['port'], headers, paths, options['clients'],
+                options['clients'] * 2)
+            start = time.perf_counter()
+            results = self.load(
+                options['port'], headers, paths, options['clients'],
+                options['requests'])
+            elapsed = time.perf_counter() - start
+        finally:
+            server.terminate()
+            server.wait()
+        times = sorted(latency for ok, latency in results if ok)
+        if not times:
+            raise CommandError(f'Every request to the {name} server failed')
+        p99 = times[min(len(times) - 1, int(len(times) * 0.99))]
+        self.stdout.write(
+            f'{name:<8}{options["workers"]:>8}{options["clients"]:>8}'
+            f'{len(results) / elapsed:>9.1f}'
+            f'{statistics.median(times) * 1000:>9.1f}{p99 * 1000:>9.1f}'
+            f'{len(results) - len(times):>8}')
+
+    def wait_until_up(self, server, port, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError('The server did not start')
+            try:
+                socket.create_connection(('127.0.0.1', port), 1).close()
+                return
+            except OSError:
+                time.sleep(0.1)
+        raise CommandError(f'The server did not start in {timeout}s')
+
+    def load(self, port, headers, paths, clients, count):
+        """
+        Sends count requests, keeping clients of them open at once, and
+        returns whether each succeeded and how long it took
+        """
+        def get(index):
+            connection = http.client.HTTPConnection('127.0.0.1', port, 30)
+            start = time.perf_counter()
+            try:
+                connection.request(
+                    'GET', paths[index % len(paths)], headers=headers)
+                response = connection.getresponse()
+                response.read()
+                ok = response.status == 200
+            except OSError:
+                ok = False
+            finally:
+                connection.close()
+            return ok, time.perf_counter() - start
+
+        with ThreadPoolExecutor(clients) as executor:
+            return list(executor.map(get, range(count)))
@@ -0,0 +1,75 @@
+import gzip
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from take_control_api.middleware import (
+    available_compressors, brotli, compress, zstandard
+)
+from take_control_api.renderers import FastJSONRenderer
+from .benchmark_lists import create_benchmark_rows, task_page
+
+LEVELS = {'gzip': [1, 6, 9], 'br': [4, 11], 'zstd': [3, 10]}
+
+
+def decompress(encoding, data):
+    if encoding == 'gzip':
+        return gzip.decompress(data)
+    if encoding == 'br':
+        return brotli.decompress(data)
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+class Command(BaseCommand):
+    """
+    Shows the bandwidth and CPU trade-off of each installed encoding and
+    level on rendered task pages. The rows are created inside a
+    transaction which is rolled back.
+    """
+    help = 'Compare compressed sizes and times for task list pages'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, nargs='+', default=[30, 300, 3000])
+        parser.add_argument('--repeat', type=int, default=10)
+
+    def handle(self, *args, **options):
+        sizes = options['rows']
+        with transaction.atomic():
+            user = create_benchmark_rows(max(sizes))
+            bodies = {
+                size: FastJSONRenderer().render(task_page(user, size))
+                for size in sizes
+            }
+            transaction.set_rollback(True)
+        self.stdout.write(
+            f'{"rows":>6}{"encoding":>10}{"level":>7}{"bytes":>10}'
+            f'{"saved":>8}{"compress ms":>13}{"decompress ms":>15}')
+        for size, body in bodies.items():
+            self.stdout.write(
+                f'{size:>6}{"none":>10}{"-":>7}{len(body):>10}'
+                f'{"0%":>8}{"-":>13}{"-":>15}')
+            for encoding in available_compressors():
+                for level in LEVELS[encoding]:
+                    self.compare(size, body, encoding, level, options)
+
+    def compare(self, size, body, encoding, level, options):
+        compressed = compress(encoding, body, level)
+        if decompress(encoding, compressed) != body:
+            raise CommandError(f'{encoding} did not round trip')
+        compress_time = self.best_time(
+            lambda: compress(encoding, body, level), options['repeat'])
+        decompress_time = self.best_time(
+            lambda: decompress(encoding, compressed), options['repeat'])
+        saved = 1 - len(compressed) / len(body)
+        self.stdout.write(
+            f'{size:>6}{encoding:>10}{level:>7}{len(compressed):>10}'
+            f'{saved:>8.0%}{compress_time * 1000:>13.2f}'
+            f'{decompress_time * 1000:>15.2f}')
+
+    def best_time(self, run, repeat):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+        return min(times)
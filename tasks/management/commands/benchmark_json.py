@@ -0,0 +1,69 @@
+import time
+import tracemalloc
+from io import BytesIO
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from take_control_api.parsers import FastJSONParser
+from take_control_api.renderers import FastJSONRenderer
+from .benchmark_lists import create_benchmark_rows, task_page
+
+
+class Command(BaseCommand):
+    """
+    Times the standard JSON renderer and parser against the fast ones on
+    typical task pages, with the peak memory allocated by each. The rows
+    are created inside a transaction which is rolled back.
+    """
+    help = 'Compare the standard and fast JSON renderer and parser'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[30, 300])
+        parser.add_argument('--repeat', type=int, default=20)
+
+    def handle(self, *args, **options):
+        sizes = options['rows']
+        with transaction.atomic():
+            user = create_benchmark_rows(max(sizes))
+            pages = {size: task_page(user, size) for size in sizes}
+            transaction.set_rollback(True)
+        self.stdout.write(
+            f'{"step":<8}{"rows":>6}{"standard ms":>14}{"fast ms":>10}'
+            f'{"speedup":>10}{"standard KiB":>15}{"fast KiB":>11}')
+        standard, fast = JSONRenderer(), FastJSONRenderer()
+        for size, page in pages.items():
+            body = standard.render(page)
+            if fast.render(page) != body:
+                raise CommandError('The fast renderer output does not match')
+            self.compare(
+                'render', size, options['repeat'],
+                lambda: standard.render(page), lambda: fast.render(page))
+            self.compare(
+                'parse', size, options['repeat'],
+                lambda: JSONParser().parse(BytesIO(body)),
+                lambda: FastJSONParser().parse(BytesIO(body)))
+
+    def compare(self, step, size, repeat, standard, fast):
+        standard_time, standard_peak = self.measure(standard, repeat)
+        fast_time, fast_peak = self.measure(fast, repeat)
+        self.stdout.write(
+            f'{step:<8}{size:>6}{standard_time * 1000:>14.2f}'
+            f'{fast_time * 1000:>10.2f}{standard_time / fast_time:>9.1f}x'
+            f'{standard_peak / 1024:>15.1f}{fast_peak / 1024:>11.1f}')
+
+    def measure(self, run, repeat):
+        """
+        Returns the best time of repeat runs and the peak memory allocated
+        during one further run
+        """
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+        tracemalloc.start()
+        run()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return min(times), peak
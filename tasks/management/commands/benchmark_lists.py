@@ -0,0 +1,147 @@
+import time
+import uuid
+from datetime import timedelta
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from focus.models import Focus
+from focus.serializers import FocusSerializer
+from goals.models import Goal
+from goals.serializers import GoalSerializer
+from labels.models import Label
+from tasks.models import Task
+from tasks.serializers import TaskSerializer
+
+
+def create_benchmark_rows(count):
+    """
+    Creates a user with count focus areas, goals and tasks. Tasks are
+    spread across unlinked, focus and goal tasks with mixed deadlines
+    and two labels each.
+    """
+    user = User.objects.create_user(username=f'benchmark-{uuid.uuid4()}')
+    now = timezone.now()
+    Focus.objects.bulk_create([
+        Focus(owner=user, name=f'Focus {i}', why='Why', rank=i % 5)
+        for i in range(count)
+    ])
+    focus_areas = list(user.focus.all())
+    Goal.objects.bulk_create([
+        Goal(owner=user, title=f'Goal {i}', focus=focus_areas[i],
+             description='Description', value='Value',
+             criteria='Criteria',
+             deadline=now + timedelta(days=i % 20 - 5))
+        for i in range(count)
+    ])
+    goals = list(user.goal.all())
+    labels = [
+        Label.objects.create(owner=user, name=f'Label {i}', colour='lime')
+        for i in range(2)
+    ]
+    Task.objects.bulk_create([
+        Task(owner=user, name=f'Task {i}',
+             focus=focus_areas[i] if i % 3 == 1 else None,
+             goal=goals[i] if i % 3 == 2 else None,
+             deadline=now + timedelta(days=i % 10 - 3)
+             if i % 4 else None)
+        for i in range(count)
+    ])
+    Task.labels.through.objects.bulk_create([
+        Task.labels.through(task_id=task_id, label_id=label.id)
+        for task_id in user.task.values_list('id', flat=True)
+        for label in labels
+    ])
+    return user
+
+
+def task_page(user, size):
+    """
+    Returns a page of size tasks as the task list would give it
+    """
+    request = Request(APIRequestFactory().get('/tasks/'))
+    request.user = user
+    serializer = TaskSerializer(context={'request': request})
+    queryset = user.task.order_by('deadline', 'goal__deadline')
+    return {
+        'count': size,
+        'next': None,
+        'previous': None,
+        'results': serializer.fast_rows(
+            serializer.fast_values(queryset)[:size]),
+    }
+
+
+class Command(BaseCommand):
+    """
+    Times the standard serializers against the fast list path for focus
+    areas, goals and tasks. The rows are created inside a transaction
+    which is rolled back, so the database is left as it was.
+    """
+    help = 'Compare the standard and fast list serialization times'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows', type=int, nargs='+', default=[30, 300, 3000])
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        sizes = options['rows']
+        with transaction.atomic():
+            user = create_benchmark_rows(max(sizes))
+            lists = [
+                ('focus', FocusSerializer, user.focus.order_by(
+                    'rank', 'created_at')),
+                ('goals', GoalSerializer, user.goal.order_by(
+                    'deadline', 'created_at')),
+                ('tasks', TaskSerializer, user.task.select_related(
+                    'goal', 'focus').prefetch_related('labels').order_by(
+                    'deadline', 'goal__deadline')),
+            ]
+            self.stdout.write(
+                f'{"list":<8}{"rows":>8}{"standard ms":>14}'
+                f'{"fast ms":>10}{"speedup":>10}')
+            for name, serializer_class, queryset in lists:
+                for size in sizes:
+                    self.compare(
+                        user, name, serializer_class, queryset, size,
+                        options['repeat'])
+            transaction.set_rollback(True)
+
+    def compare(self, user, name, serializer_class, queryset, size, repeat):
+        """
+        Times both paths over the first size rows, keeping the best of
+        repeat runs, and checks they give the same JSON
+        """
+        request = Request(APIRequestFactory().get(f'/{name}/'))
+        request.user = user
+
+        def standard():
+            serializer = serializer_class(
+                queryset[:size], many=True, context={'request': request})
+            return serializer.data
+
+        def fast():
+            serializer = serializer_class(context={'request': request})
+            return serializer.fast_rows(
+                serializer.fast_values(queryset)[:size])
+
+        renderer = JSONRenderer()
+        if renderer.render(standard()) != renderer.render(fast()):
+            raise CommandError(f'The fast {name} list does not match')
+        standard_time = self.best_time(standard, repeat)
+        fast_time = self.best_time(fast, repeat)
+        self.stdout.write(
+            f'{name:<8}{size:>8}{standard_time * 1000:>14.1f}'
+            f'{fast_time * 1000:>10.1f}{standard_time / fast_time:>9.1f}x')
+
+    def best_time(self, build, repeat):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            build()
+            times.append(time.perf_counter() - start)
+        return min(times)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from take_control_api.cache import cache_stats, reset_cache_stats
+
+
+class Command(BaseCommand):
+    """
+    Reports the list cache's hits and misses since the counters were last
+    reset, with the share of requests served from the cache. The counters
+    are kept in the cache itself, so they cover every process sharing it.
+    """
+    help = 'Show the list cache hit and miss counters'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Set the counters back to zero after reporting them')
+
+    def handle(self, *args, **options):
+        stats = cache_stats()
+        total = stats['hits'] + stats['misses']
+        rate = stats['hits'] / total if total else 0
+        self.stdout.write(
+            f'Hits: {stats["hits"]}  Misses: {stats["misses"]}  '
+            f'Hit rate: {rate:.1%}')
+        if options['reset']:
+            reset_cache_stats()
+            self.stdout.write(self.style.SUCCESS('Counters reset'))
@@ -0,0 +1,43 @@
+from pathlib import Path
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.text import slugify
+from take_control_api.export import (
+    EXPORT_CHUNK_SIZE, EXPORT_FORMATS, export_stream
+)
+
+
+class Command(BaseCommand):
+    """
+    Writes the same export as the export endpoint for every user, or the
+    users named, to a file for each user named <id>-<username>.<format>.
+    Each file is written as it is read, so memory use stays flat.
+    """
+    help = "Export every user's data to NDJSON or CSV files"
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Directory to write the files to')
+        parser.add_argument(
+            '--format', choices=list(EXPORT_FORMATS), default='ndjson')
+        parser.add_argument('--user', nargs='+', dest='usernames')
+        parser.add_argument(
+            '--chunk-size', type=int, default=EXPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        output = Path(options['output'])
+        if not output.is_dir():
+            raise CommandError(f'{output} is not a directory')
+        users = User.objects.order_by('id')
+        if options['usernames']:
+            users = users.filter(username__in=options['usernames'])
+        count = 0
+        for user in users.iterator():
+            path = output / (
+                f'{user.pk}-{slugify(user.username)}.{options["format"]}')
+            with path.open('wb') as file:
+                for chunk in export_stream(
+                        user, options['format'], options['chunk_size']):
+                    file.write(chunk)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Exported {count} users to {output}'))
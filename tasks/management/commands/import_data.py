@@ -0,0 +1,46 @@
+import time
+from pathlib import Path
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import APIException
+from take_control_api.importer import IMPORT_BATCH_SIZE, Importer
+from take_control_api.parsers import read_csv, read_ndjson
+
+READERS = {'ndjson': read_ndjson, 'csv': read_csv}
+
+
+class Command(BaseCommand):
+    """
+    Imports a file in the format of the export for a user, as the import
+    endpoint does but without its limit on the number of records. The
+    format is taken from the file's extension unless given.
+    """
+    help = 'Import focus areas, labels, goals and tasks from NDJSON or CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=list(READERS))
+        parser.add_argument(
+            '--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'No user named {options["username"]}')
+        path = Path(options['path'])
+        export_format = options['format'] or path.suffix.lstrip('.')
+        if export_format not in READERS:
+            raise CommandError('Give the format with --format ndjson or csv')
+        importer = Importer(
+            user, batch_size=options['batch_size'],
+            progress=self.stdout.write)
+        start = time.perf_counter()
+        try:
+            with path.open('rb') as file:
+                created = importer.run(READERS[export_format](file))
+        except APIException as exc:
+            raise CommandError(exc.detail)
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {created} in {time.perf_counter() - start:.1f}s'))
@@ -0,0 +1,20 @@
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from tasks.models import Deletion
+
+
+class Command(BaseCommand):
+    """
+    Removes the records of deletions older than SYNC_DELETION_DAYS. Sync
+    refuses cursors that old, so the records are no longer needed. Run
+    daily.
+    """
+    help = 'Remove deletion records older than SYNC_DELETION_DAYS'
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=settings.SYNC_DELETION_DAYS)
+        deleted, _ = Deletion.objects.filter(deleted_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(
+            f'Removed {deleted} deletion records'))
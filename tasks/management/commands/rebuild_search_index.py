@@ -0,0 +1,24 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from goals.models import Goal
+from tasks.models import Task
+from take_control_api.cache import bump_data_version
+from take_control_api.search import index_goals, index_tasks
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds the full text search entries for every task and goal.
+    Used to fill the index for existing data and to repair it. Every
+    user's data version is moved on so no cached search is served.
+    """
+    help = 'Rebuild the full text search index for tasks and goals'
+
+    def handle(self, *args, **options):
+        index_tasks(Task.objects.all())
+        index_goals(Goal.objects.all())
+        for user_id in User.objects.values_list('id', flat=True):
+            bump_data_version(user_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {Task.objects.count()} tasks and '
+            f'{Goal.objects.count()} goals'))
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from focus.models import Focus
+from goals.models import Goal
+from tasks.models import recount_tasks
+
+
+class Command(BaseCommand):
+    """
+    Sets the task counters on every focus and goal from their tasks.
+    Used to backfill existing data, to repair any drift and, run daily,
+    to bring the overdue counts up to date.
+    """
+    help = 'Recalculate the task counters for every focus and goal'
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        focus_areas = recount_tasks(Focus, Focus.objects.all(), now)
+        goals = recount_tasks(Goal, Goal.objects.all(), now)
+        self.stdout.write(self.style.SUCCESS(
+            f'Updated {focus_areas} focus areas and {goals} goals'))
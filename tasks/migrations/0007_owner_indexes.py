@@ -0,0 +1,29 @@
+# Generated by Django 3.2.24 on 2026-10-18 15:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0006_alter_task_active'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'deadline'], name='task_owner_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'active', 'today'], name='task_owner_active_today_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('today', True)), fields=['owner', 'deadline'], name='task_owner_today_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['owner', 'achieved'], name='task_owner_achieved_idx'),
+        ),
+    ]
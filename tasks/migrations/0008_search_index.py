@@ -0,0 +1,55 @@
+from django.db import migrations
+from take_control_api.search import index_goals, index_tasks
+
+
+def create_search_index(apps, schema_editor):
+    """
+    Creates the full text search table. Postgres uses a tsvector column
+    with a GIN index, SQLite an FTS5 virtual table.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE TABLE search_index ('
+            'kind varchar(10) NOT NULL, '
+            'object_id bigint NOT NULL, '
+            'owner_id integer NOT NULL, '
+            'document tsvector NOT NULL, '
+            'PRIMARY KEY (kind, object_id))')
+        schema_editor.execute(
+            'CREATE INDEX search_index_document '
+            'ON search_index USING GIN (document)')
+        schema_editor.execute(
+            'CREATE INDEX search_index_owner ON search_index (owner_id, kind)')
+    elif vendor == 'sqlite':
+        schema_editor.execute(
+            'CREATE VIRTUAL TABLE search_index USING fts5('
+            'kind UNINDEXED, object_id UNINDEXED, owner_id UNINDEXED, '
+            "document, tokenize='unicode61')")
+
+
+def fill_search_index(apps, schema_editor):
+    """
+    Indexes every existing task and goal so they can be searched for as
+    soon as the migration has run
+    """
+    index_tasks(apps.get_model('tasks', 'Task').objects.all())
+    index_goals(apps.get_model('goals', 'Goal').objects.all())
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('postgresql', 'sqlite'):
+        schema_editor.execute('DROP TABLE search_index')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0007_owner_indexes'),
+        ('goals', '0005_goal_child_count'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,90 @@
-from django.db import models
+from collections import Counter
+from threading import local
+from django.db import models, transaction
+from django.db.models import (
+    Case, Count, F, OuterRef, Q, Subquery, Value, When
+)
+from django.db.models.functions import Coalesce, Greatest
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
 from django.contrib.auth.models import User
+from django.utils import timezone
 from focus.models import Focus
 from goals.models import Goal
 from labels.models import Label
+from take_control_api.deadlines import start_of_day
+
+COUNTED_FIELDS = ['focus_id', 'goal_id', 'active', 'achieved']
+MISCELLANEOUS_IMAGE = '../miscellaneous-tasks_b6f2gl'
+
+
+def focus_image(focus):
+    """
+    Returns the image a task takes from its focus, or the miscellaneous
+    image for a task without a focus
+    """
+    return focus.image.name if focus is not None else MISCELLANEOUS_IMAGE
+
+
+def task_counts(state, sign=1):
+    """
+    Returns what a task with the given state adds to the task counters of
+    its focus and goal
+    """
+    return Counter({
+        'task_count': sign,
+        'active_task_count': sign * state['active'],
+        'achieved_task_count': sign * state['achieved'],
+    })
+
+
+def change_task_counts(model, pk, changes):
+    """
+    Adds the changes to the task counters of a focus or goal in the
+    database, never letting a counter go below zero. updated_at moves on
+    so the change is picked up by sync.
+    """
+    changes = {field: change for field, change in changes.items() if change}
+    if pk is None or not changes:
+        return
+    model.objects.filter(pk=pk).update(updated_at=timezone.now(), **{
+        field: Greatest(F(field) + change, 0)
+        for field, change in changes.items()
+    })
+
+
+def recount_tasks(model, queryset, now=None):
+    """
+    Recalculates the stored task counters of every focus or goal in the
+    queryset from their tasks in a single update. This is also when the
+    overdue count is brought up to date. updated_at only moves on for rows
+    whose counters change, so sync doesn't send every focus and goal. The
+    tasks are read through the model's own app registry, so a migration
+    can pass its historical models.
+    """
+    now = now or timezone.now()
+    link = model._meta.model_name
+    tasks_model = model._meta.apps.get_model('tasks', 'Task')
+
+    def counted(**filters):
+        tasks = tasks_model.objects.filter(
+            **{link: OuterRef('pk')}, **filters
+        ).order_by().values(link).annotate(total=Count('id')).values('total')
+        return Coalesce(Subquery(tasks), 0)
+
+    counts = {
+        'task_count': counted(),
+        'active_task_count': counted(active=True),
+        'achieved_task_count': counted(achieved=True),
+        'overdue_task_count': counted(
+            achieved=False, deadline__lt=start_of_day(now)),
+    }
+    return queryset.update(
+        updated_at=Case(
+            When(Q(**counts), then=F('updated_at')),
+            default=Value(now)),
+        overdue_checked_at=now,
+        **counts)
 
 
 class Task(models.Model):
@@ -34,12 +116,207 @@ class Task(models.Model):
     deadline = models.DateTimeField(null=True, blank=True)
     labels = models.ManyToManyField(Label, blank=True)
     active = models.BooleanField (default=True)
-    image = models.ImageField(
-        default='../miscellaneous-tasks_b6f2gl', blank=True
-    )
+    image = models.ImageField(default=MISCELLANEOUS_IMAGE, blank=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['owner', 'deadline'],
+                name='task_owner_deadline_idx'),
+            models.Index(
+                fields=['owner', 'active', 'today'],
+                name='task_owner_active_today_idx'),
+            models.Index(
+                fields=['owner', 'deadline'],
+                condition=models.Q(today=True),
+                name='task_owner_today_idx'),
+            models.Index(
+                fields=['owner', 'achieved'],
+                name='task_owner_achieved_idx'),
+            models.Index(
+                fields=['owner', 'updated_at'],
+                name='task_owner_updated_idx'),
+        ]
 
     def __str__(self):
         return f'{self.id} {self.name}'
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Remembers the fields the task counters depend on so a change can be
+        spotted when the task is saved
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._saved_state = instance.counted_state()
+        return instance
+
+    def counted_state(self):
+        return {field: self.__dict__.get(field) for field in COUNTED_FIELDS}
+
+    def save(self, *args, **kwargs):
+        """
+        Saves the task, then moves the task counters of its focus and goal
+        on by any change to its links, active or achieved
+        """
+        created = self.pk is None
+        old_state = None if created else getattr(self, '_saved_state', None)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if created or old_state is not None:
+                self.update_task_counts(old_state)
+            else:
+                recount_tasks(Focus, Focus.objects.filter(pk=self.focus_id))
+                recount_tasks(Goal, Goal.objects.filter(pk=self.goal_id))
+        self._saved_state = self.counted_state()
+
+    def update_task_counts(self, old_state):
+        """
+        Takes the task's old state off the counters it was part of and adds
+        its new state, using one update for each focus or goal changed
+        """
+        new_state = self.counted_state()
+        if old_state == new_state:
+            return
+        for model, link in ((Focus, 'focus_id'), (Goal, 'goal_id')):
+            changes = {}
+            if old_state is not None and old_state[link] is not None:
+                changes[old_state[link]] = task_counts(old_state, -1)
+            if new_state[link] is not None:
+                changes.setdefault(new_state[link], Counter()).update(
+                    task_counts(new_state))
+            for pk, counts in changes.items():
+                change_task_counts(model, pk, counts)
+
+
+class Deletion(models.Model):
+    """
+    A record of a focus, goal, label or task being deleted, kept so sync
+    can tell clients to remove it. Deletions made by a cascade from a
+    focus or goal are recorded for each row.
+    """
+    owner = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="deletion")
+    kind = models.CharField(max_length=10)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['deleted_at', 'id']
+        indexes = [
+            models.Index(
+                fields=['owner', 'deleted_at', 'id'],
+                name='deletion_owner_deleted_idx'),
+            models.Index(
+                fields=['deleted_at'],
+                name='deletion_deleted_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.kind} {self.object_id}'
+
+
+def labelled_task_ids(label_ids, match_all=False):
+    """
+    Returns a subquery of the ids of tasks with any of the labels given, or
+    with all of them when match_all is set. Both read only the label links
+    table, the second grouping its rows by task and keeping tasks with a
+    link to every label.
+    """
+    links = Task.labels.through.objects.filter(label_id__in=label_ids)
+    if match_all:
+        links = links.values('task_id').annotate(
+            matched=Count('label_id')).filter(matched=len(set(label_ids)))
+    return links.values('task_id')
+
+
+@receiver(post_delete, sender=Task)
+def task_deleted(sender, instance, **kwargs):
+    """
+    Takes a deleted task off the counters of its focus and goal
+    """
+    counts = task_counts(instance.counted_state(), -1)
+    change_task_counts(Focus, instance.focus_id, counts)
+    change_task_counts(Goal, instance.goal_id, counts)
+
+
+# The ids of users being deleted in this thread
+deleting_owners = local()
+
+
+@receiver(pre_delete, sender=User)
+def owner_deleting(sender, instance, **kwargs):
+    """
+    Marks a user as being deleted, as their data goes with them so its
+    deletions aren't recorded
+    """
+    if not hasattr(deleting_owners, 'ids'):
+        deleting_owners.ids = set()
+    deleting_owners.ids.add(instance.pk)
+
+
+@receiver(post_delete, sender=User)
+def owner_deleted(sender, instance, **kwargs):
+    deleting_owners.ids.discard(instance.pk)
+
+
+@receiver(post_delete, sender=Focus)
+@receiver(post_delete, sender=Goal)
+@receiver(post_delete, sender=Label)
+@receiver(post_delete, sender=Task)
+def record_deletion(sender, instance, **kwargs):
+    """
+    Records the deletion for sync, unless it is part of deleting the
+    owner
+    """
+    if instance.owner_id in getattr(deleting_owners, 'ids', ()):
+        return
+    Deletion.objects.create(
+        owner_id=instance.owner_id,
+        kind=sender._meta.model_name,
+        object_id=instance.pk)
+
+
+@receiver(post_save, sender=Focus)
+def focus_image_changed(sender, instance, created, **kwargs):
+    """
+    Copies a focus's new image to its tasks in a single update. A new
+    name, shown in the context of its tasks, moves on their updated_at so
+    sync sends them again.
+    """
+    if created:
+        return
+    tasks = Task.objects.filter(focus_id=instance.pk)
+    if instance.image.name != getattr(instance, '_saved_image', None):
+        tasks.update(image=instance.image.name, updated_at=timezone.now())
+    elif instance.name != getattr(instance, '_saved_name', None):
+        tasks.update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Goal)
+def goal_task_info_changed(sender, instance, created, **kwargs):
+    """
+    Moves on the updated_at of a goal's tasks when its title or deadline,
+    shown in the context and goal_deadline_info of each, changes
+    """
+    if created or instance.task_info() == getattr(
+            instance, '_saved_task_info', None):
+        return
+    Task.objects.filter(goal_id=instance.pk).update(
+        updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Label)
+@receiver(pre_delete, sender=Label)
+def label_changed(sender, instance, created=False, **kwargs):
+    """
+    Moves on the updated_at of a label's tasks when it is renamed,
+    recoloured or deleted, as each task shows its labels' names and
+    colours in label_details
+    """
+    if created:
+        return
+    Task.objects.filter(labels=instance).update(updated_at=timezone.now())
@@ -1,87 +1,129 @@
 import os
 from rest_framework import serializers
-from datetime import datetime, timezone, date, timedelta
-from .models import Task
-from focus.models import Focus
-from goals.models import Goal
+from take_control_api.deadlines import (
+    OVERDUE, TODAY, TOMORROW, DUE, get_now, deadline_info
+)
+from take_control_api.fast import FastListSerializerMixin
+from take_control_api.serializers import OwnedLinksMixin, SparseFieldsMixin
+from labels.serializers import LabelSummarySerializer
+from .models import Task, focus_image
 
+BULK_LIMIT = 100
 
-class TaskSerializer(serializers.ModelSerializer):
+TASK_DEADLINE_MESSAGES = {
+    OVERDUE: 'Task OVERDUE!!',
+    TODAY: 'Task due TODAY',
+    TOMORROW: 'Task due tomorrow',
+    DUE: 'Task due',
+}
+GOAL_DEADLINE_MESSAGES = {
+    OVERDUE: 'GOAL OVERDUE!!',
+    TODAY: 'Goal due TODAY',
+    TOMORROW: 'Goal due TOMORROW',
+    DUE: 'Goal due',
+}
+
+
+def task_context(goal_title, focus_name):
+    """
+    Returns the context of a task from its linked goal's title or, if it
+    has no goal, its linked focus's name. Either is None when not linked.
+    """
+    if goal_title is not None:
+        return f'A step towards {goal_title}'
+    else:
+        if focus_name is not None:
+            return f'A day-to-day {focus_name} task'
+        else:
+            return "A miscellaneous task"
+
+
+class TaskSerializer(
+        SparseFieldsMixin, OwnedLinksMixin, FastListSerializerMixin,
+        serializers.ModelSerializer):
     """
     Serializer for the Task model. It changes owner.id into owner.username,
     and adds extra fields is_owner, deadline_near, goal_deadline_near,
-    focus_image and goal_name
+    focus_image and goal_name. label_details gives the name and colour of
+    each label, from the same prefetch as labels. Only the user's own focus
+    areas, goals and labels can be linked. The image is copied from the
+    linked focus when the task is created or moved to another focus. GET
+    requests can choose the fields returned with fields or omit. The fast_
+    methods give the same fields for the fast list path.
     """
     owner = serializers.ReadOnlyField(source='owner.username')
     is_owner = serializers.SerializerMethodField()
     deadline_info = serializers.SerializerMethodField()
     goal_deadline_info = serializers.SerializerMethodField()
     context = serializers.SerializerMethodField()
+    label_details = LabelSummarySerializer(
+        source='labels', many=True, read_only=True)
+    fast_method_values = {
+        'is_owner': ['owner_id'],
+        'deadline_info': ['deadline'],
+        'goal_deadline_info': ['goal_id', 'goal__deadline'],
+        'context': ['goal__title', 'focus__name'],
+    }
+    owned_links = ['focus', 'goal', 'labels']
+
+    def create(self, validated_data):
+        validated_data['image'] = focus_image(validated_data.get('focus'))
+        return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        if 'focus' in validated_data:
+            focus = validated_data['focus']
+            if getattr(focus, 'pk', None) != instance.focus_id:
+                validated_data['image'] = focus_image(focus)
+        return super().update(instance, validated_data)
 
     def get_is_owner(self, obj):
         request = self.context['request']
-        return request.user == obj.owner
+        return request.user.pk == obj.owner_id
+
+    def fast_is_owner(self, row):
+        return self.context['request'].user.pk == row['owner_id']
 
     def get_deadline_info(self, obj):
         """
         Generates a new field containing information if the deadline is
         less than 2 days away
         """
-        future_deadline = obj.deadline
-        if future_deadline:
-            today_naive = datetime.now()
-            today_aware = today_naive.replace(tzinfo=timezone.utc)
-            days_remaining = (future_deadline - today_aware).days
-            easy_date = future_deadline.strftime('%d/%m/%y')
-            if days_remaining < -1:
-                return f'Task OVERDUE!! {easy_date}'
-            elif days_remaining < 3:
-                today = date.today()
-                today_day = today.day
-                deadline_day = future_deadline.day
-                if today_day == deadline_day:
-                    return f'Task due TODAY {easy_date}'
-                tomorrow = today + timedelta(days=1)
-                tomorrow_day = tomorrow.day
-                if deadline_day == tomorrow_day:
-                    return f'Task due tomorrow {easy_date}'
-                else:
-                    return f'Task due {easy_date}'
-            else:
-                return f'Task due {easy_date}'
+        return self.task_deadline_info(obj.deadline)
+
+    def fast_deadline_info(self, row):
+        return self.task_deadline_info(row['deadline'])
+
+    def task_deadline_info(self, deadline):
+        if deadline:
+            now = get_now(self.context)
+            return deadline_info(deadline, now, TASK_DEADLINE_MESSAGES)
         else:
             return None
 
     def get_goal_deadline_info(self, obj):
         """
-        Generates a new field containing information if the linked goal is near
+        Generates a new field containing information if the linked goal is
+        near. Tasks on the same goal share the result within a request.
         """
         if obj.goal:
-            if obj.goal.deadline:
-                goal_deadline = obj.goal.deadline
-                today_naive = datetime.now()
-                today_aware = today_naive.replace(tzinfo=timezone.utc)
-                days_remaining = (goal_deadline - today_aware).days
-                easy_date = goal_deadline.strftime('%d/%m/%y')
-
-                if days_remaining < -1:
-                    return f'GOAL OVERDUE!! {easy_date}'
-                elif days_remaining < 3:
-                    today = date.today()
-                    today_day = today.day
-                    deadline_day = goal_deadline.day
-                    if today_day == deadline_day:
-                        return f'Goal due TODAY {easy_date}'
-                    tomorrow = today + timedelta(days=1)
-                    tomorrow_day = tomorrow.day
-                    if deadline_day == tomorrow_day:
-                        return f'Goal due TOMORROW {easy_date}'
-                    else:
-                        return f'Goal due {easy_date}'
-                else:
-                    return f'Goal due {easy_date}'
-            else:
-                return None
+            return self.linked_goal_deadline_info(
+                obj.goal_id, obj.goal.deadline)
+        else:
+            return None
+
+    def fast_goal_deadline_info(self, row):
+        return self.linked_goal_deadline_info(
+            row['goal_id'], row['goal__deadline'])
+
+    def linked_goal_deadline_info(self, goal_id, deadline):
+        if deadline:
+            goal_infos = self.context.setdefault('goal_deadline_info', {})
+            if goal_id not in goal_infos:
+                now = get_now(self.context)
+                goal_infos[goal_id] = deadline_info(
+                    deadline, now, GOAL_DEADLINE_MESSAGES)
+            return goal_infos[goal_id]
         else:
             return None
 
@@ -91,15 +133,12 @@ class TaskSerializer(serializers.ModelSerializer):
         if no goal but a focus handles
         if no goal and no focus handles
         """
-        if obj.goal:
-            goal_id = obj.goal.id
-            goal = Goal.objects.get(id=goal_id)
-            return f'A step towards {goal.title}'
-        else:
-            if obj.focus:
-                return f'A day-to-day {obj.focus.name} task'
-            else:
-                return "A miscellaneous task"
+        return task_context(
+            obj.goal.title if obj.goal else None,
+            obj.focus.name if obj.focus else None)
+
+    def fast_context(self, row):
+        return task_context(row['goal__title'], row['focus__name'])
 
     class Meta:
         model = Task
@@ -116,9 +155,60 @@ class TaskSerializer(serializers.ModelSerializer):
             'name',
             'deadline',
             'labels',
+            'label_details',
             'active',
             'deadline_info',
             'goal_deadline_info',
             'context',
             'image'
         ]
+
+
+class TaskBulkChangesSerializer(serializers.ModelSerializer):
+    """
+    Serializer for the changes the bulk endpoint can make to many tasks at
+    once. Links are taken as plain ids so every link in a request can be
+    checked against the user's data in a single query.
+    """
+    focus = serializers.IntegerField(required=False, allow_null=True)
+    goal = serializers.IntegerField(required=False, allow_null=True)
+
+    def validate(self, data):
+        if not data:
+            raise serializers.ValidationError('No changes given')
+        return data
+
+    class Meta:
+        model = Task
+        fields = [
+            'focus',
+            'goal',
+            'today',
+            'achieved',
+            'deadline',
+            'active',
+        ]
+
+
+class TaskBulkUpdateSerializer(serializers.Serializer):
+    """
+    Serializer for a bulk update, the ids of the tasks to change and the
+    changes to make to all of them
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=BULK_LIMIT)
+    changes = TaskBulkChangesSerializer()
+
+
+class TaskBulkCreateSerializer(TaskBulkChangesSerializer):
+    """
+    Serializer for each of the new tasks given to the bulk endpoint
+    """
+    labels = serializers.ListField(
+        child=serializers.IntegerField(), required=False)
+
+    class Meta:
+        model = Task
+        fields = TaskBulkChangesSerializer.Meta.fields + ['name', 'labels']
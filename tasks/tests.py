@@ -1,9 +1,51 @@
+import asyncio
+import csv
+import gzip
+import tempfile
+import threading
+from importlib import import_module
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from io import BytesIO, StringIO
+from pathlib import Path
+from unittest import mock
+from asgiref.sync import async_to_sync, sync_to_async
+from django.apps import apps
 from django.contrib.auth.models import User
-from .models import Task
+from django.core import signals
+from django.core.management import call_command
+from django.db import close_old_connections, connection
+from django.db.migrations.loader import MigrationLoader
+from django.http import StreamingHttpResponse
+from django.test import RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils.translation import gettext_lazy
+import orjson
+from .models import Deletion, Task
 from goals.models import Goal
 from focus.models import Focus
+from labels.models import Label
+from take_control_api.asyncviews import StreamingASGIHandler
+from take_control_api.cache import cache_stats, get_cache
+from take_control_api.events import (
+    SYNC_EVENT, EventStreamRouter, LocalBroker, get_broker
+)
+from take_control_api.export import export_stream
+from take_control_api.middleware import (
+    CompressionMiddleware, available_compressors
+)
+from take_control_api.parsers import FastJSONParser
+from take_control_api.renderers import FastJSONRenderer
+from take_control_api.search import index_tasks, remove_objects
+from take_control_api.sync import encode_cursor
+from .views import AsyncTaskList, TaskBulk, TaskList
+from focus.views import AsyncFocusList, FocusList
+from goals.views import AsyncGoalList, GoalList
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import (
+    APIRequestFactory, APITestCase, APITransactionTestCase, force_authenticate
+)
 
 
 class TaskListViewTests(APITestCase):
@@ -201,6 +243,27 @@ class TaskListViewTests(APITestCase):
         self.assertEqual(number_tasks_returned, 1)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
+    def test_filter_by_goal_subtree(self):
+        """
+        Logged in user can request all tasks linked to a goal or any goal
+        nested under it
+        """
+        self.client.login(username='FirstTester', password='pass')
+        nested_goal = Goal.objects.create(
+            owner=User.objects.get(username='FirstTester'),
+            title='Nested goal',
+            focus_id=1,
+            parent_id=1
+        )
+        Task.objects.create(
+            owner=nested_goal.owner, name="Nested goal task", goal=nested_goal
+        )
+        response = self.client.get('/tasks/?goal_subtree=1')
+        names = sorted(task['name'] for task in response.data['results'])
+        self.assertEqual(
+            names, ['First active goal backlog only', 'Nested goal task'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
     def test_filter_by_search(self):
         """
         Logged in user can filter tasks by search query
@@ -261,11 +324,11 @@ class TaskDetailViewTests(APITestCase):
     def test_logged_in_denied_task_dont_own(self):
         """
         Logged in user sending get request for task they don't own,
-        should return access denied
+        should return 404 not found as if it didn't exist
         """
         self.client.login(username='FirstTester', password='pass')
         response = self.client.get('/tasks/2')
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_invalid_task_request_handled(self):
         """
@@ -291,11 +354,11 @@ class TaskDetailViewTests(APITestCase):
     def test_logged_in_owner_denied_edit_task_dont_own(self):
         """
         Logged in user sending a patch request for task they dont own,
-        should return access denied
+        should return 404 not found as if it didn't exist
         """
         self.client.login(username='FirstTester', password='pass')
         response = self.client.patch('/tasks/2', {'name': 'name changed'})
-        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
     def test_logged_in_owner_can_delete_their_task(self):
         """
@@ -311,8 +374,2630 @@ class TaskDetailViewTests(APITestCase):
     def test_logged_in_owner_denied_delete_task_dont_own(self):
         """
         Logged in user sending a delete request for task they don't own,
-        should return access denied
+        should return 404 not found as if it didn't exist
         """
         self.client.login(username='FirstTester', password='pass')
         response = self.client.delete('/tasks/2')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_task_detail_query_count(self):
+        """
+        Logged in user requesting a task they own uses 5 queries: the
+        session, the user, the ETag check, the task joined to its owner,
+        focus and goal, and its labels. The owner is never loaded
+        separately to check ownership.
+        """
+        self.client.login(username='FirstTester', password='pass')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/tasks/1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(queries), 5)
+
+
+class TaskQueryCountTests(APITestCase):
+    """
+    Tests that the number of queries used by the task views stays flat
+    as the number of tasks returned grows
+    """
+    def setUp(self):
+        """
+        Create a user with a focus, a goal and a label
+        """
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        self.focus = Focus.objects.create(
+            owner=self.tester, name="Focus", why="Why"
+        )
+        self.goal = Goal.objects.create(
+            owner=self.tester, title='Goal', focus=self.focus
+        )
+        self.label = Label.objects.create(
+            owner=self.tester, name='Label', colour='lime'
+        )
+
+    def create_tasks(self, number):
+        """
+        Create a number of tasks each linked to the focus, goal and label
+        """
+        for i in range(number):
+            task = Task.objects.create(
+                owner=self.tester,
+                name=f'Task {i}',
+                focus=self.focus,
+                goal=self.goal
+            )
+            task.labels.add(self.label)
+
+    def count_queries(self, url):
+        """
+        Returns the number of queries run when sending a get request
+        """
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries)
+
+    def test_task_list_queries_do_not_grow_with_page(self):
+        """
+        Logged in user requesting a full page of tasks runs the same
+        number of queries as when requesting a page with few tasks
+        """
+        self.client.login(username='FirstTester', password='pass')
+        self.create_tasks(2)
+        few_tasks = self.count_queries('/tasks/')
+        self.create_tasks(28)
+        full_page = self.count_queries('/tasks/')
+        self.assertEqual(few_tasks, full_page)
+
+    def test_task_detail_queries_are_constant(self):
+        """
+        Logged in user requesting a task with a focus, goal and labels
+        does not trigger a query for each related object
+        """
+        self.client.login(username='FirstTester', password='pass')
+        self.create_tasks(1)
+        with self.assertNumQueries(5):
+            response = self.client.get('/tasks/1')
+        self.assertEqual(response.data['context'], 'A step towards Goal')
+
+
+class TaskIndexTests(APITestCase):
+    """
+    Tests that the database planner uses the owner indexes for the
+    orderings and filters used by the task list view
+    """
+    def setUp(self):
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+
+    def test_task_list_uses_owner_deadline_index(self):
+        """
+        Listing a user's tasks by deadline uses the owner deadline index
+        """
+        plan = self.tester.task.order_by(
+            'deadline', 'goal__deadline').explain()
+        self.assertIn('task_owner_deadline_idx', plan)
+
+    def test_today_filter_uses_partial_index(self):
+        """
+        Filtering a user's tasks by today uses the partial today index
+        """
+        plan = self.tester.task.filter(
+            active=True, today=True).order_by('deadline').explain()
+        self.assertIn('task_owner_today_idx', plan)
+
+
+class TaskCursorPaginationTests(APITestCase):
+    """
+    Tests for the opt-in cursor pagination of the task list view
+    """
+    def setUp(self):
+        """
+        Create a user with 35 tasks, some sharing a deadline, some linked
+        to a goal with a deadline and some with no deadline at all
+        """
+        tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        focus = Focus.objects.create(owner=tester, name="Focus", why="Why")
+        goal = Goal.objects.create(
+            owner=tester,
+            title='Goal',
+            focus=focus,
+            deadline=datetime(2030, 1, 1, tzinfo=timezone.utc)
+        )
+        for i in range(35):
+            deadline = None
+            if i % 3:
+                deadline = datetime(2030, 1, 1, tzinfo=timezone.utc) + \
+                    timedelta(days=i % 5)
+            Task.objects.create(
+                owner=tester,
+                name=f'Task {i}',
+                deadline=deadline,
+                goal=goal if i % 2 else None
+            )
+
+    def get_all_pages(self, url):
+        """
+        Follows the next links from the given url returning the ids of all
+        the tasks received
+        """
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids += [task['id'] for task in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_cursor_pages_return_every_task_once(self):
+        """
+        Logged in user following cursor links receives all of their tasks
+        once, in deadline order with tasks without a deadline last
+        """
+        self.client.login(username='FirstTester', password='pass')
+        ids = self.get_all_pages('/tasks/?cursor=')
+        self.assertEqual(len(ids), 35)
+        self.assertEqual(len(set(ids)), 35)
+        deadlines = [Task.objects.get(id=id).deadline for id in ids]
+        dated = [deadline for deadline in deadlines if deadline]
+        self.assertEqual(dated, sorted(dated))
+        self.assertEqual(deadlines[len(dated):], [None] * (35 - len(dated)))
+
+    def test_cursor_pages_do_not_count(self):
+        """
+        Logged in user requesting a cursor page does not trigger a count
+        """
+        self.client.login(username='FirstTester', password='pass')
+        with CaptureQueriesContext(connection) as context:
+            self.client.get('/tasks/?cursor=')
+        queries = [query['sql'] for query in context.captured_queries]
+        self.assertFalse([sql for sql in queries if 'COUNT(' in sql])
+
+    def test_cursor_pagination_keeps_filters(self):
+        """
+        Logged in user can combine filters with cursor pagination
+        """
+        self.client.login(username='FirstTester', password='pass')
+        ids = self.get_all_pages('/tasks/?cursor=&goal=None')
+        self.assertEqual(len(ids), 18)
+
+    def test_invalid_cursor_handled(self):
+        """
+        Logged in user sending an invalid cursor should return 404 not found
+        """
+        self.client.login(username='FirstTester', password='pass')
+        response = self.client.get('/tasks/?cursor=not-a-cursor')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TaskDeadlineInfoTests(APITestCase):
+    """
+    Tests for the deadline_info and goal_deadline_info fields
+    """
+    now = datetime(2030, 6, 15, 12, 0)
+
+    def setUp(self):
+        """
+        Create a user with a goal due tomorrow and tasks that are overdue,
+        due today, due tomorrow and due in the future
+        """
+        tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        focus = Focus.objects.create(owner=tester, name="Focus", why="Why")
+        now = self.now.replace(tzinfo=timezone.utc)
+        goal = Goal.objects.create(
+            owner=tester,
+            title='Goal',
+            focus=focus,
+            deadline=now + timedelta(days=1)
+        )
+        for name, days in [
+            ('overdue', -3), ('today', 0), ('tomorrow', 1), ('future', 10)
+        ]:
+            Task.objects.create(
+                owner=tester,
+                name=name,
+                goal=goal,
+                deadline=now + timedelta(days=days, hours=1)
+            )
+
+    def get_tasks(self):
+        """
+        Returns the task list with the clock fixed, and the number of times
+        the clock was read
+        """
+        with mock.patch('take_control_api.deadlines.datetime') as clock:
+            clock.now.return_value = self.now
+            response = self.client.get('/tasks/')
+        tasks = {task['name']: task for task in response.data['results']}
+        return tasks, clock.now.call_count
+
+    def test_deadline_info_buckets(self):
+        """
+        Logged in user receives the right deadline info for each task
+        """
+        self.client.login(username='FirstTester', password='pass')
+        tasks, _ = self.get_tasks()
+        self.assertEqual(
+            tasks['overdue']['deadline_info'], 'Task OVERDUE!! 12/06/30')
+        self.assertEqual(
+            tasks['today']['deadline_info'], 'Task due TODAY 15/06/30')
+        self.assertEqual(
+            tasks['tomorrow']['deadline_info'], 'Task due tomorrow 16/06/30')
+        self.assertEqual(
+            tasks['future']['deadline_info'], 'Task due 25/06/30')
+        self.assertEqual(
+            tasks['future']['goal_deadline_info'],
+            'Goal due TOMORROW 16/06/30')
+
+    def test_clock_read_once_per_request(self):
+        """
+        Logged in user requesting a list of tasks shares one now
+        across every task on the page
+        """
+        self.client.login(username='FirstTester', password='pass')
+        _, clock_reads = self.get_tasks()
+        self.assertEqual(clock_reads, 1)
+
+
+class TaskListCacheTests(APITestCase):
+    """
+    Tests for the cached task list
+    """
+    def setUp(self):
+        """
+        Create two users, the first with a task and a label
+        """
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        self.task = Task.objects.create(owner=self.tester, name="Task")
+        self.label = Label.objects.create(
+            owner=self.tester, name='Label', colour='lime')
+        self.other_tester = User.objects.create_user(
+            username='SecondTester', password='word')
+        self.client.login(username='FirstTester', password='pass')
+
+    def test_repeat_request_served_from_cache(self):
+        """
+        Logged in user repeating a request is served from the cache
+        without loading their tasks again
+        """
+        stats = cache_stats()
+        first = self.client.get('/tasks/?today=False')
+        with CaptureQueriesContext(connection) as context:
+            second = self.client.get('/tasks/?today=False')
+        queries = [query['sql'] for query in context.captured_queries]
+        self.assertEqual(first['X-Cache'], 'MISS')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(first.data, second.data)
+        self.assertFalse([sql for sql in queries if '"name"' in sql])
+        self.assertEqual(cache_stats()['hits'], stats['hits'] + 1)
+        self.assertEqual(cache_stats()['misses'], stats['misses'] + 1)
+
+    def test_cache_stats_command(self):
+        """
+        The cache_stats command reports the hits and misses and can set
+        them back to zero
+        """
+        call_command('cache_stats', reset=True, stdout=StringIO())
+        self.client.get('/tasks/')
+        self.client.get('/tasks/')
+        out = StringIO()
+        call_command('cache_stats', reset=True, stdout=out)
+        self.assertIn('Hits: 1  Misses: 1  Hit rate: 50.0%', out.getvalue())
+        self.assertEqual(cache_stats(), {'hits': 0, 'misses': 0})
+
+    def test_query_params_cached_separately(self):
+        """
+        Logged in user sending different filters is not served another
+        filter's cached list
+        """
+        self.client.get('/tasks/?today=False')
+        response = self.client.get('/tasks/?today=True')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 0)
+
+    def test_create_invalidates_cache(self):
+        """
+        Logged in user creating a task receives it in the next list
+        """
+        self.client.get('/tasks/')
+        self.client.post('/tasks/', {"name": "New task"})
+        response = self.client.get('/tasks/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['count'], 2)
+
+    def test_label_change_invalidates_cache(self):
+        """
+        Adding a label to a task means the next list is rebuilt
+        """
+        self.client.get('/tasks/')
+        self.task.labels.add(self.label)
+        response = self.client.get('/tasks/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['results'][0]['labels'], [1])
+
+    def test_other_users_changes_keep_cache(self):
+        """
+        Another user saving a task does not invalidate the cached list
+        """
+        self.client.get('/tasks/')
+        Task.objects.create(owner=self.other_tester, name="Other task")
+        response = self.client.get('/tasks/')
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_list_read_before_commit_not_served(self):
+        """
+        A list cached while a save's transaction is still open, from rows
+        read before it commits, is not served once it has committed
+        """
+        self.client.get('/tasks/')
+        with self.captureOnCommitCallbacks(execute=True):
+            Task.objects.create(owner=self.tester, name='New task')
+            self.assertEqual(self.client.get('/tasks/')['X-Cache'], 'MISS')
+            self.assertEqual(self.client.get('/tasks/')['X-Cache'], 'HIT')
+        response = self.client.get('/tasks/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+
+    @override_settings(LIST_CACHE_ENABLED=False)
+    def test_nothing_cached_when_disabled(self):
+        """
+        Without a shared cache the list and dashboard are built for every
+        request, so a save made by another process is never missed
+        """
+        self.client.get('/tasks/')
+        self.client.get('/dashboard/')
+        with mock.patch('take_control_api.cache.bump_data_version'):
+            Task.objects.create(owner=self.tester, name='Another task')
+        response = self.client.get('/tasks/')
+        self.assertNotIn('X-Cache', response)
+        self.assertEqual(response.data['count'], 2)
+        response = self.client.get('/dashboard/')
+        self.assertNotIn('X-Cache', response)
+        self.assertEqual(response.data['tasks']['total'], 2)
+
+
+class TaskConditionalRequestTests(APITestCase):
+    """
+    Tests for ETag and conditional requests on the task views
+    """
+    def setUp(self):
+        """
+        Create two users, each with a task
+        """
+        first_tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        Task.objects.create(owner=first_tester, name="First task")
+        second_tester = User.objects.create_user(
+            username='SecondTester', password='word')
+        Task.objects.create(owner=second_tester, name="Second task")
+        self.client.login(username='FirstTester', password='pass')
+
+    def test_unchanged_list_not_modified(self):
+        """
+        Logged in user sending the ETag of their task list receives 304
+        without their tasks being loaded
+        """
+        etag = self.client.get('/tasks/')['ETag']
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/tasks/', HTTP_IF_NONE_MATCH=etag)
+        queries = [query['sql'] for query in context.captured_queries]
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertIn('Last-Modified', response)
+        self.assertFalse([sql for sql in queries if '"name"' in sql])
+
+    def test_changed_list_returned(self):
+        """
+        Logged in user sending an old ETag after creating a task receives
+        the full list
+        """
+        etag = self.client.get('/tasks/')['ETag']
+        self.client.post('/tasks/', {"name": "New task"})
+        response = self.client.get('/tasks/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_unchanged_task_not_modified(self):
+        """
+        Logged in user sending the ETag of their task receives 304
+        """
+        etag = self.client.get('/tasks/1')['ETag']
+        response = self.client.get('/tasks/1', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_stale_if_match_rejected(self):
+        """
+        Logged in user editing a task with an out of date ETag receives
+        412 and the task is not changed
+        """
+        etag = self.client.get('/tasks/1')['ETag']
+        self.client.patch('/tasks/1', {'name': 'first change'})
+        response = self.client.patch(
+            '/tasks/1', {'name': 'second change'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(
+            response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.assertEqual(Task.objects.get(id=1).name, 'first change')
+
+    def test_current_if_match_accepted(self):
+        """
+        Logged in user editing a task with its current ETag makes the
+        change and receives the new ETag
+        """
+        etag = self.client.get('/tasks/1')['ETag']
+        response = self.client.patch(
+            '/tasks/1', {'name': 'name changed'}, HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(
+            self.client.get('/tasks/1')['ETag'], response['ETag'])
+
+    def test_if_match_edits_in_sequence(self):
+        """
+        Logged in user editing two tasks in turn, each with the ETag read
+        before either edit, makes both changes
+        """
+        other = Task.objects.create(
+            owner=User.objects.get(username='FirstTester'), name='Other')
+        first_etag = self.client.get('/tasks/1')['ETag']
+        other_etag = self.client.get(f'/tasks/{other.id}')['ETag']
+        response = self.client.patch(
+            '/tasks/1', {'name': 'first change'}, HTTP_IF_MATCH=first_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.patch(
+            f'/tasks/{other.id}', {'name': 'other change'},
+            HTTP_IF_MATCH=other_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Task.objects.get(id=other.id).name, 'other change')
+
+    def test_etags_same_without_cache(self):
+        """
+        ETags don't depend on the cache, so a process that never saw the
+        user's data gives the same ones
+        """
+        detail_etag = self.client.get('/tasks/1')['ETag']
+        list_etag = self.client.get('/tasks/?cursor=')['ETag']
+        get_cache().clear()
+        self.assertEqual(self.client.get('/tasks/1')['ETag'], detail_etag)
+        self.assertEqual(
+            self.client.get('/tasks/?cursor=')['ETag'], list_etag)
+        response = self.client.patch(
+            '/tasks/1', {'name': 'changed'}, HTTP_IF_MATCH=detail_etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_label_changes_move_task_etags(self):
+        """
+        Renaming or deleting a label changes the ETags of its tasks and
+        their list, as each task shows its labels
+        """
+        task = Task.objects.get(id=1)
+        label = Label.objects.create(
+            owner=task.owner, name='Lime', colour='lime')
+        task.labels.add(label)
+        for change in (
+                lambda: self.client.put(
+                    f'/labels/{label.id}', {'name': 'Pink', 'colour': 'pink'}),
+                lambda: self.client.delete(f'/labels/{label.id}')):
+            detail_etag = self.client.get('/tasks/1')['ETag']
+            list_etag = self.client.get('/tasks/')['ETag']
+            change()
+            response = self.client.get(
+                '/tasks/1', HTTP_IF_NONE_MATCH=detail_etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response = self.client.get(
+                '/tasks/', HTTP_IF_NONE_MATCH=list_etag)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_deletion_moves_cursor_page_etag(self):
+        """
+        A cursor page, which has no count, gets a new ETag when one of the
+        user's tasks is deleted
+        """
+        Task.objects.create(
+            owner=User.objects.get(username='FirstTester'), name='Newer')
+        etag = self.client.get('/tasks/?cursor=')['ETag']
+        self.client.delete('/tasks/1')
+        response = self.client.get('/tasks/?cursor=', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_task_dont_own_still_denied(self):
+        """
+        Logged in user sending a conditional request for a task they don't
+        own should return 404 not found as if it didn't exist
+        """
+        response = self.client.get('/tasks/2', HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TaskBulkViewTests(APITestCase):
+    """
+    Tests for the Task bulk view
+    """
+    def setUp(self):
+        """
+        Create two users, the first with a focus, a goal, a label and
+        50 tasks and the second with a focus and a task
+        """
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        self.focus = Focus.objects.create(
+            owner=self.tester, name="Focus", why="Why")
+        self.goal = Goal.objects.create(
+            owner=self.tester, title='Goal', focus=self.focus)
+        self.label = Label.objects.create(
+            owner=self.tester, name='Label', colour='lime')
+        Task.objects.bulk_create([
+            Task(owner=self.tester, name=f'Task {i}') for i in range(50)
+        ])
+        second_tester = User.objects.create_user(
+            username='SecondTester', password='word')
+        self.other_focus = Focus.objects.create(
+            owner=second_tester, name="Other focus", why="Why")
+        self.other_task = Task.objects.create(
+            owner=second_tester, name="Other task")
+        self.ids = list(
+            self.tester.task.values_list('id', flat=True))
+
+    def test_logged_out_no_bulk_update(self):
+        """
+        Not logged in user sending a bulk patch request,
+        should return 403 error
+        """
+        response = self.client.patch(
+            '/tasks/bulk/',
+            {'ids': self.ids, 'changes': {'today': True}},
+            format='json')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_bulk_update_in_few_queries(self):
+        """
+        Logged in user can move 50 tasks to today in one request
+        using a fixed number of queries
+        """
+        self.client.login(username='FirstTester', password='pass')
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(
+                '/tasks/bulk/',
+                {'ids': self.ids, 'changes': {'today': True}},
+                format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['updated'], 50)
+        self.assertEqual(self.tester.task.filter(today=True).count(), 50)
+        queries = [
+            query for query in context.captured_queries
+            if 'SAVEPOINT' not in query['sql']
+        ]
+        self.assertLessEqual(len(queries), 5)
+
+    def test_bulk_update_links_goal(self):
+        """
+        Logged in user can link many tasks to one of their goals
+        """
+        self.client.login(username='FirstTester', password='pass')
+        response = self.client.patch(
+            '/tasks/bulk/',
+            {'ids': self.ids[:3], 'changes': {'goal': self.goal.id}},
+            format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.goal.task_for_goal.count(), 3)
+
+    def test_bulk_update_rolled_back_on_failed_recount(self):
+        """
+        When the counters can't be recounted the tasks aren't moved, so
+        the stored counts still match them
+        """
+        self.client.login(username='FirstTester', password='pass')
+        with mock.patch.object(
+                TaskBulk, 'recount', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.client.patch(
+                    '/tasks/bulk/',
+                    {'ids': self.ids[:3], 'changes': {'goal': self.goal.id}},
+                    format='json')
+        self.assertEqual(self.goal.task_for_goal.count(), 0)
+
+    def test_bulk_update_denied_task_dont_own(self):
+        """
+        Logged in user including a task they don't own should return 400
+        and no tasks are changed
+        """
+        self.client.login(username='FirstTester', password='pass')
+        response = self.client.patch(
+            '/tasks/bulk/',
+            {'ids': self.ids + [self.other_task.id],
+             'changes': {'achieved': True}},
+            format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Task.objects.filter(achieved=True).count(), 0)
+
+    def test_bulk_update_no_changes_throws_error(self):
+        """
+        Logged in user sending a bulk patch without changes should return
+        400 error
+        """
+        self.client.login(username='FirstTester', password='pass')
+        response = self.client.patch(
+            '/tasks/bulk/', {'ids': self.ids, 'changes': {}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_create(self):
+        """
+        Logged in user can create many tasks in one request, taking the
+        image from the linked focus and adding labels
+        """
+        self.client.login(username='FirstTester', password='pass')
+        response = self.client.post(
+            '/tasks/bulk/',
+            [
+                {'name': 'New focus task', 'focus': self.focus.id,
+                 'labels': [self.label.id]},
+                {'name': 'New goal task', 'goal': self.goal.id,
+                 'today': True},
+            ],
+            format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 2)
+        task = Task.objects.get(id=response.data['ids'][0])
+        self.assertEqual(task.image, self.focus.image)
+        self.assertEqual(list(task.labels.all()), [self.label])
+        self.assertEqual(self.tester.task.count(), 52)
+
+    def test_bulk_create_denied_focus_dont_own(self):
+        """
+        Logged in user creating tasks linked to a focus they don't own
+        should return 400 and no tasks are created
+        """
+        self.client.login(username='FirstTester', password='pass')
+        response = self.client.post(
+            '/tasks/bulk/',
+            [
+                {'name': 'Fine task'},
+                {'name': 'Other focus task', 'focus': self.other_focus.id},
+            ],
+            format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.tester.task.count(), 50)
+
+    def test_bulk_update_shows_in_cached_list(self):
+        """
+        Logged in user listing tasks after a bulk update receives the
+        changes rather than a cached list
+        """
+        self.client.login(username='FirstTester', password='pass')
+        self.client.get('/tasks/?today=True')
+        self.client.patch(
+            '/tasks/bulk/',
+            {'ids': self.ids, 'changes': {'today': True}},
+            format='json')
+        response = self.client.get('/tasks/?today=True')
+        self.assertEqual(response.data['count'], 50)
+
+
+class TaskSearchTests(APITestCase):
+    """
+    Tests for full text search of tasks
+    """
+    def setUp(self):
+        """
+        Create two users, the first with a focus, a goal and three tasks
+        and the second with a task sharing a word with the first user's
+        """
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        self.focus = Focus.objects.create(
+            owner=self.tester, name="Fitness", why="Why")
+        self.goal = Goal.objects.create(
+            owner=self.tester, title='Marathon', focus=self.focus)
+        Task.objects.create(
+            owner=self.tester, name='Buy running shoes')
+        self.both = Task.objects.create(
+            owner=self.tester, name='Running plan for running club')
+        self.linked = Task.objects.create(
+            owner=self.tester, name='Book entry', goal=self.goal)
+        second_tester = User.objects.create_user(
+            username='SecondTester', password='word')
+        Task.objects.create(owner=second_tester, name='Running errands')
+        self.client.login(username='FirstTester', password='pass')
+
+    def search(self, term):
+        response = self.client.get(f'/tasks/?search={term}')
+        return [task['name'] for task in response.data['results']]
+
+    def test_search_ranks_best_match_first(self):
+        """
+        The task using the word most often is returned first and other
+        users' tasks are left out
+        """
+        names = self.search('running')
+        self.assertEqual(names, [
+            'Running plan for running club', 'Buy running shoes'])
+
+    def test_search_matches_partial_words(self):
+        """
+        The start of a word finds tasks containing the whole word
+        """
+        self.assertEqual(self.search('sho'), ['Buy running shoes'])
+
+    def test_search_matches_every_word(self):
+        """
+        Only tasks containing every word searched for are returned
+        """
+        self.assertEqual(
+            self.search('running shoes'), ['Buy running shoes'])
+
+    def test_search_matches_linked_goal_and_focus(self):
+        """
+        Tasks are found by their goal's title and the title is reindexed
+        when the goal is renamed
+        """
+        self.assertEqual(self.search('marathon'), ['Book entry'])
+        self.goal.title = 'Triathlon'
+        self.goal.save()
+        self.assertEqual(self.search('marathon'), [])
+        self.assertEqual(self.search('triathlon'), ['Book entry'])
+
+    def test_tasks_reindexed_only_for_new_title_or_name(self):
+        """
+        Saving a goal or focus reindexes its tasks only when its title or
+        name has changed
+        """
+        with mock.patch('take_control_api.search.index_tasks') as index:
+            self.goal.description = 'Description'
+            self.goal.save()
+            self.focus.why = 'Because'
+            self.focus.save()
+            index.assert_not_called()
+            self.goal.title = 'Triathlon'
+            self.goal.save()
+            self.focus.name = 'Health'
+            self.focus.save()
+        self.assertEqual(index.call_count, 2)
+
+    def test_search_after_bulk_goal_change(self):
+        """
+        Moving tasks to a goal in bulk makes them searchable by its title
+        """
+        self.client.patch('/tasks/bulk/', {
+            'ids': [self.both.id], 'changes': {'goal': self.goal.id}
+        }, format='json')
+        self.assertEqual(
+            sorted(self.search('marathon')),
+            ['Book entry', 'Running plan for running club'])
+
+    def test_deleted_task_not_found(self):
+        """
+        A deleted task is removed from the search index
+        """
+        self.linked.delete()
+        self.assertEqual(self.search('entry'), [])
+
+    def test_search_with_ordering(self):
+        """
+        Search results follow an ordering when one is given
+        """
+        response = self.client.get('/tasks/?search=running&ordering=name')
+        names = [task['name'] for task in response.data['results']]
+        self.assertEqual(names, [
+            'Buy running shoes', 'Running plan for running club'])
+
+    def test_search_without_words(self):
+        """
+        A search containing no words returns no tasks
+        """
+        self.assertEqual(self.search('%2A%2A'), [])
+
+    def test_migration_indexes_existing_data(self):
+        """
+        The migration creating the index fills it with the tasks and goals
+        already saved
+        """
+        remove_objects('task', self.tester.task.values_list('id', flat=True))
+        self.assertEqual(self.search('running'), [])
+        migration = import_module('tasks.migrations.0008_search_index')
+        migration.fill_search_index(apps, None)
+        self.assertEqual(self.search('run'), [
+            'Running plan for running club', 'Buy running shoes'])
+
+    def test_search_returns_every_match(self):
+        """
+        Every matching task is counted and can be paged to, however many
+        there are, with the index joined in the list's own query
+        """
+        Task.objects.bulk_create([
+            Task(owner=self.tester, name=f'Weekly report {i}')
+            for i in range(600)
+        ])
+        index_tasks(self.tester.task.filter(name__startswith='Weekly'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/tasks/?search=report&page=20')
+        self.assertEqual(response.data['count'], 600)
+        self.assertEqual(len(response.data['results']), 30)
+        self.assertFalse(any(
+            query['sql'].startswith('SELECT "search_index"')
+            for query in queries.captured_queries))
+
+
+class DashboardSummaryTests(APITestCase):
+    """
+    Tests for the dashboard summary view
+    """
+    def setUp(self):
+        """
+        Create two users, the first with two focus areas, a goal and
+        tasks linked to each, plus an unlinked task, and the second with
+        a task of their own
+        """
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        self.focus = Focus.objects.create(
+            owner=self.tester, name="Health", why="Why", rank=1)
+        self.empty_focus = Focus.objects.create(
+            owner=self.tester, name="Career", why="Why", rank=2)
+        self.goal = Goal.objects.create(
+            owner=self.tester, title='Marathon', focus=self.focus)
+        now = datetime.now(timezone.utc)
+        Task.objects.create(
+            owner=self.tester, name='Stretch', focus=self.focus,
+            today=True)
+        Task.objects.create(
+            owner=self.tester, name='Buy shoes', goal=self.goal,
+            achieved=True)
+        Task.objects.create(
+            owner=self.tester, name='Book entry', goal=self.goal,
+            deadline=now - timedelta(days=3))
+        Task.objects.create(
+            owner=self.tester, name='Long run', goal=self.goal,
+            deadline=now.replace(hour=23, minute=59))
+        Task.objects.create(
+            owner=self.tester, name='Shopping',
+            deadline=now - timedelta(days=5), achieved=True)
+        second_tester = User.objects.create_user(
+            username='SecondTester', password='word')
+        Task.objects.create(owner=second_tester, name='Other task')
+
+    def test_logged_out_no_dashboard(self):
+        """
+        Not logged in user requesting the dashboard, should return 403
+        """
+        response = self.client.get('/dashboard/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_dashboard_counts(self):
+        """
+        Logged in user receives counts of only their own tasks overall,
+        for each focus area, for each goal and for unlinked tasks
+        """
+        self.client.login(username='FirstTester', password='pass')
+        response = self.client.get('/dashboard/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['tasks'], {
+            'total': 5, 'achieved': 2, 'open': 3, 'today': 1,
+            'due_today': 1, 'overdue': 1})
+        self.assertEqual(response.data['unlinked'], {
+            'total': 1, 'achieved': 1, 'open': 0, 'today': 0,
+            'due_today': 0, 'overdue': 0})
+        health, career = response.data['focus']
+        self.assertEqual(health['name'], 'Health')
+        self.assertEqual(health['total'], 4)
+        self.assertEqual(health['open'], 3)
+        self.assertEqual(health['progress'], 25)
+        self.assertEqual(career['total'], 0)
+        self.assertEqual(career['progress'], 0)
+        goal, = response.data['goals']
+        self.assertEqual(goal['title'], 'Marathon')
+        self.assertEqual(goal['focus_id'], self.focus.id)
+        self.assertEqual(goal['total'], 3)
+        self.assertEqual(goal['overdue'], 1)
+        self.assertEqual(goal['due_today'], 1)
+        self.assertEqual(goal['progress'], 33)
+
+    def test_dashboard_query_count(self):
+        """
+        The dashboard is built with a fixed number of queries however many
+        tasks there are
+        """
+        Task.objects.bulk_create([
+            Task(owner=self.tester, name=f'Task {i}', goal=self.goal)
+            for i in range(50)
+        ])
+        self.client.login(username='FirstTester', password='pass')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/dashboard/')
+        task_queries = [
+            query for query in queries.captured_queries
+            if 'tasks_task' in query['sql']
+        ]
+        self.assertEqual(len(task_queries), 2)
+        self.assertEqual(response.data['tasks']['total'], 55)
+
+    def test_dashboard_cached_until_change(self):
+        """
+        A repeated request is served from the cache without querying tasks
+        and a change to the user's tasks rebuilds the summary
+        """
+        self.client.login(username='FirstTester', password='pass')
+        response = self.client.get('/dashboard/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/dashboard/')
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertFalse(any(
+            'tasks_task' in query['sql']
+            for query in queries.captured_queries))
+        Task.objects.create(owner=self.tester, name='New task')
+        response = self.client.get('/dashboard/')
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['tasks']['total'], 6)
+
+
+class TaskCounterTests(APITestCase):
+    """
+    Tests for the task counters stored on focus areas and goals
+    """
+    def setUp(self):
+        """
+        Create a user with a focus and two goals
+        """
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        self.focus = Focus.objects.create(
+            owner=self.tester, name="Focus", why="Why")
+        self.goal = Goal.objects.create(
+            owner=self.tester, title='Goal', focus=self.focus)
+        self.other_goal = Goal.objects.create(
+            owner=self.tester, title='Other goal', focus=self.focus)
+        self.client.login(username='FirstTester', password='pass')
+
+    def counts(self, obj):
+        obj.refresh_from_db()
+        return (
+            obj.task_count, obj.active_task_count, obj.achieved_task_count)
+
+    def test_creating_tasks_counts_them(self):
+        """
+        Creating tasks linked to a focus or goal adds to its counters
+        """
+        self.client.post(
+            '/tasks/', {'name': 'Task', 'goal': self.goal.id}, format='json')
+        Task.objects.create(
+            owner=self.tester, name='Done', goal=self.goal, achieved=True)
+        Task.objects.create(
+            owner=self.tester, name='Paused', focus=self.focus,
+            active=False)
+        self.assertEqual(self.counts(self.goal), (2, 2, 1))
+        self.assertEqual(self.counts(self.focus), (1, 0, 0))
+
+    def test_migrations_fill_existing_counts(self):
+        """
+        The migrations adding the counters fill them from the tasks
+        already saved, using the models as they were at the time
+        """
+        Task.objects.create(owner=self.tester, name='Task', goal=self.goal)
+        Task.objects.create(
+            owner=self.tester, name='Done', focus=self.focus, achieved=True)
+        Focus.objects.update(task_count=0, achieved_task_count=0)
+        Goal.objects.update(task_count=0, active_task_count=0)
+        loader = MigrationLoader(connection)
+        for app, name in (('focus', '0005_task_counts'),
+                          ('goals', '0006_task_counts')):
+            state = loader.project_state((app, name))
+            migration = import_module(f'{app}.migrations.{name}')
+            migration.fill_task_counts(state.apps, None)
+        self.assertEqual(self.counts(self.goal), (1, 1, 0))
+        self.assertEqual(self.counts(self.focus), (1, 1, 1))
+
+    def test_changing_task_moves_counts(self):
+        """
+        Achieving a task and moving it to another goal updates the
+        counters of both goals
+        """
+        task = Task.objects.create(
+            owner=self.tester, name='Task', goal=self.goal)
+        response = self.client.patch(
+            f'/tasks/{task.id}', {'achieved': True})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.counts(self.goal), (1, 1, 1))
+        self.client.patch(f'/tasks/{task.id}', {'goal': self.other_goal.id})
+        self.assertEqual(self.counts(self.goal), (0, 0, 0))
+        self.assertEqual(self.counts(self.other_goal), (1, 1, 1))
+
+    def test_deleting_task_uncounts_it(self):
+        """
+        Deleting a task takes it off its goal's counters
+        """
+        task = Task.objects.create(
+            owner=self.tester, name='Task', goal=self.goal, achieved=True)
+        self.client.delete(f'/tasks/{task.id}')
+        self.assertEqual(self.counts(self.goal), (0, 0, 0))
+
+    def test_bulk_writes_recount(self):
+        """
+        Creating and moving tasks in bulk keeps the counters correct
+        """
+        response = self.client.post('/tasks/bulk/', [
+            {'name': f'Task {i}', 'goal': self.goal.id} for i in range(3)
+        ], format='json')
+        self.assertEqual(self.counts(self.goal), (3, 3, 0))
+        self.client.patch('/tasks/bulk/', {
+            'ids': response.data['ids'][:2],
+            'changes': {'goal': self.other_goal.id, 'achieved': True}
+        }, format='json')
+        self.assertEqual(self.counts(self.goal), (1, 1, 0))
+        self.assertEqual(self.counts(self.other_goal), (2, 2, 2))
+
+    def test_counters_in_responses(self):
+        """
+        The counters are returned with goals and focus areas
+        """
+        Task.objects.create(owner=self.tester, name='Task', goal=self.goal)
+        goal = self.client.get(f'/goals/{self.goal.id}').data
+        self.assertEqual(goal['task_count'], 1)
+        self.assertEqual(goal['active_task_count'], 1)
+        self.assertEqual(goal['achieved_task_count'], 0)
+        focus = self.client.get(f'/focus/{self.focus.id}').data
+        self.assertEqual(focus['task_count'], 0)
+        self.assertIn('overdue_task_count', focus)
+
+    def test_counters_read_only(self):
+        """
+        Logged in user sending a task count is ignored
+        """
+        self.client.patch(f'/goals/{self.goal.id}', {'task_count': 10})
+        self.assertEqual(self.counts(self.goal), (0, 0, 0))
+
+    def test_sync_task_counts_command(self):
+        """
+        The sync_task_counts command repairs drifted counters and counts
+        overdue tasks
+        """
+        Task.objects.bulk_create([
+            Task(owner=self.tester, name='Late', goal=self.goal,
+                 deadline=datetime.now(timezone.utc) - timedelta(days=2)),
+            Task(owner=self.tester, name='Done', goal=self.goal,
+                 achieved=True),
+        ])
+        Focus.objects.filter(pk=self.focus.pk).update(task_count=7)
+        out = StringIO()
+        call_command('sync_task_counts', stdout=out)
+        self.assertIn('Updated 1 focus areas and 2 goals', out.getvalue())
+        self.assertEqual(self.counts(self.goal), (2, 2, 1))
+        self.assertEqual(self.counts(self.focus), (0, 0, 0))
+        self.assertEqual(self.goal.overdue_task_count, 1)
+        self.assertIsNotNone(self.goal.overdue_checked_at)
+
+
+class TaskSparseFieldsTests(APITestCase):
+    """
+    Tests for choosing the task fields returned with fields and omit
+    """
+    def setUp(self):
+        """
+        Create a user with a goal and a task linked to it
+        """
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        focus = Focus.objects.create(
+            owner=self.tester, name="Focus", why="Why")
+        goal = Goal.objects.create(
+            owner=self.tester, title='Goal', focus=focus)
+        self.task = Task.objects.create(
+            owner=self.tester, name='Task', goal=goal,
+            deadline=datetime.now(timezone.utc))
+        self.client.login(username='FirstTester', password='pass')
+
+    def test_fields_returns_only_fields_listed(self):
+        """
+        Logged in user listing tasks with fields receives only those fields
+        """
+        response = self.client.get('/tasks/?fields=id,name,achieved')
+        self.assertEqual(response.data['results'], [
+            {'id': self.task.id, 'name': 'Task', 'achieved': False}])
+
+    def test_omit_leaves_out_fields_listed(self):
+        """
+        Logged in user getting a task with omit receives every other field
+        """
+        response = self.client.get(
+            f'/tasks/{self.task.id}?omit=image,context,unknown')
+        self.assertNotIn('image', response.data)
+        self.assertNotIn('context', response.data)
+        self.assertIn('deadline_info', response.data)
+
+    def test_method_fields_not_run_when_left_out(self):
+        """
+        Computed fields which aren't requested are never worked out
+        """
+        with mock.patch(
+                'tasks.serializers.TaskSerializer.get_context') as context:
+            with mock.patch(
+                    'tasks.serializers.deadline_info') as info:
+                response = self.client.get('/tasks/?fields=id,name')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        context.assert_not_called()
+        info.assert_not_called()
+
+    def test_fields_ignored_when_editing(self):
+        """
+        Logged in user editing a task receives every field whatever is
+        given in fields
+        """
+        response = self.client.patch(
+            f'/tasks/{self.task.id}?fields=id', {'name': 'Renamed'})
+        self.assertEqual(response.data['name'], 'Renamed')
+        self.assertIn('context', response.data)
+
+
+class TaskFastListTests(APITestCase):
+    """
+    Tests that the fast task list gives exactly the same JSON as the
+    standard serializer
+    """
+    def setUp(self):
+        """
+        Create a user with focus areas, goals, labels and a mix of linked,
+        unlinked, achieved and labelled tasks with deadlines in the past,
+        today, tomorrow, the future and none
+        """
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        focus = Focus.objects.create(
+            owner=self.tester, name="Focus", why="Why")
+        now = datetime.now(timezone.utc)
+        goal = Goal.objects.create(
+            owner=self.tester, title='Goal', focus=focus,
+            deadline=now + timedelta(days=1))
+        undated_goal = Goal.objects.create(
+            owner=self.tester, title='Undated goal', focus=focus)
+        labels = [
+            Label.objects.create(
+                owner=self.tester, name=f'Label {i}', colour='lime')
+            for i in range(2)
+        ]
+        deadlines = [None, -3, 0, 1, 10]
+        for i in range(35):
+            days = deadlines[i % 5]
+            task = Task.objects.create(
+                owner=self.tester, name=f'Run {i}',
+                focus=focus if i % 3 == 1 else None,
+                goal=[goal, undated_goal][i % 2] if i % 3 == 2 else None,
+                deadline=None if days is None
+                else now + timedelta(days=days),
+                achieved=i % 4 == 0,
+                image='images/custom.jpg' if i % 7 == 0 else
+                '../miscellaneous-tasks_b6f2gl')
+            task.labels.set(labels[:i % 3])
+        self.client.login(username='FirstTester', password='pass')
+
+    def assertSameAsStandard(self, url):
+        get_cache().clear()
+        fast = self.client.get(url)
+        get_cache().clear()
+        with mock.patch.object(TaskList, 'fast_list', False):
+            standard = self.client.get(url)
+        self.assertEqual(fast.status_code, status.HTTP_200_OK)
+        self.assertEqual(fast.content, standard.content)
+        return fast
+
+    def test_fast_list_matches_standard(self):
+        """
+        The first and second pages match the standard list byte for byte
+        """
+        response = self.assertSameAsStandard('/tasks/')
+        self.assertEqual(len(response.data['results']), 30)
+        self.assertSameAsStandard('/tasks/?page=2')
+
+    def test_fast_list_matches_with_options(self):
+        """
+        Filters, ordering, search, cursor pages and field choices match
+        the standard list
+        """
+        for url in [
+            '/tasks/?achieved=False&ordering=-name',
+            '/tasks/?search=run',
+            '/tasks/?cursor=',
+            '/tasks/?fields=id,labels,context,goal_deadline_info',
+            '/tasks/?fields=id,label_details',
+            '/tasks/?labels=1,2&labels_match=all',
+            '/tasks/?omit=image,deadline_info',
+        ]:
+            with self.subTest(url=url):
+                self.assertSameAsStandard(url)
+
+    def test_fast_list_queries(self):
+        """
+        A page of the fast list takes one query for the tasks and one for
+        their labels
+        """
+        get_cache().clear()
+        with CaptureQueriesContext(connection) as context:
+            self.client.get('/tasks/')
+        task_queries = [
+            query['sql'] for query in context.captured_queries
+            if 'tasks_task' in query['sql'] and 'COUNT' not in query['sql']
+            and 'MAX' not in query['sql']
+        ]
+        self.assertEqual(len(task_queries), 2)
+
+    def test_benchmark_lists_command(self):
+        """
+        The benchmark_lists command times both paths and finds the fast
+        output matches
+        """
+        out = StringIO()
+        call_command('benchmark_lists', rows=[5], repeat=1, stdout=out)
+        self.assertIn('tasks', out.getvalue())
+        self.assertEqual(len(out.getvalue().splitlines()), 4)
+
+
+class TaskJSONRendererTests(APITestCase):
+    """
+    Tests for the fast JSON renderer and parser
+    """
+    def setUp(self):
+        """
+        Create a user with a focus, a goal and tasks with deadlines, an
+        image url and text needing escaping
+        """
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        focus = Focus.objects.create(
+            owner=self.tester, name="Focus é", why="Why")
+        goal = Goal.objects.create(
+            owner=self.tester, title='Goal', focus=focus,
+            deadline=datetime.now(timezone.utc))
+        Task.objects.create(
+            owner=self.tester, name='Line\u2028break "quoted" \u2713',
+            goal=goal, deadline=datetime.now(timezone.utc))
+        Task.objects.create(
+            owner=self.tester, name='Photo', focus=focus,
+            image='images/photo.jpg')
+        self.client.login(username='FirstTester', password='pass')
+
+    def test_renderer_matches_standard(self):
+        """
+        A task page, including dates, image urls and escaped text, renders
+        to the same bytes as the standard renderer
+        """
+        data = self.client.get('/tasks/').data
+        fast = FastJSONRenderer().render(data)
+        self.assertEqual(fast, JSONRenderer().render(data))
+        self.assertIn(b'\\u2028', fast)
+        self.assertIn(b'https://res.cloudinary.com/', fast)
+
+    def test_renderer_encodes_other_types_as_standard(self):
+        """
+        Raw datetimes, decimals, integer keys and lazy text are encoded as
+        the standard renderer does
+        """
+        data = {
+            'now': datetime(2024, 5, 1, 9, 30, 15, 123456, timezone.utc),
+            'amount': Decimal('1.50'),
+            1: gettext_lazy('Not found.'),
+        }
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_renderer_falls_back(self):
+        """
+        Indented output, integers too large for orjson and a missing orjson
+        use the standard renderer
+        """
+        renderer = FastJSONRenderer()
+        data = {'big': 2 ** 70, 'name': 'Task'}
+        self.assertEqual(renderer.render(data), JSONRenderer().render(data))
+        indented = 'application/json; indent=4'
+        self.assertEqual(
+            renderer.render({'name': 'Task'}, indented),
+            JSONRenderer().render({'name': 'Task'}, indented))
+        with mock.patch('take_control_api.renderers.orjson', None):
+            self.assertEqual(
+                renderer.render({'name': 'Task'}), b'{"name":"Task"}')
+
+    def test_api_responses_use_fast_renderer(self):
+        """
+        Responses are rendered by the fast renderer selected in settings
+        """
+        with mock.patch(
+                'take_control_api.renderers.orjson.dumps',
+                wraps=orjson.dumps) as dumps:
+            response = self.client.get('/tasks/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        dumps.assert_called_once()
+
+    def test_parser(self):
+        """
+        JSON bodies are parsed by the fast parser, falling back to the
+        standard parser, and invalid JSON returns 400
+        """
+        parser = FastJSONParser()
+        self.assertEqual(
+            parser.parse(BytesIO('{"name": "Tâsk"}'.encode())),
+            {'name': 'Tâsk'})
+        self.assertEqual(
+            parser.parse(BytesIO(b'{"big": 1180591620717411303424}')),
+            {'big': 2 ** 70})
+        response = self.client.post(
+            '/tasks/', '{"name": ', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(
+            '/tasks/', {'name': 'Parsed'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_benchmark_json_command(self):
+        """
+        The benchmark_json command times rendering and parsing task pages
+        """
+        out = StringIO()
+        call_command('benchmark_json', rows=[5], repeat=1, stdout=out)
+        self.assertIn('render', out.getvalue())
+        self.assertIn('parse', out.getvalue())
+
+
+class TaskCompressionTests(APITestCase):
+    """
+    Tests for response compression
+    """
+    def setUp(self):
+        """
+        Create a user with enough tasks for the task list to be compressed
+        """
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        Task.objects.bulk_create([
+            Task(owner=self.tester, name=f'Task {i}') for i in range(20)
+        ])
+        self.task = self.tester.task.first()
+        self.client.login(username='FirstTester', password='pass')
+
+    def test_large_list_compressed(self):
+        """
+        A task list is gzipped for a client accepting gzip and matches the
+        uncompressed list
+        """
+        plain = self.client.get('/tasks/')
+        response = self.client.get('/tasks/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(
+            int(response['Content-Length']), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertIn('Accept-Encoding', plain['Vary'])
+
+    def test_encoding_choice(self):
+        """
+        Encodings refused with q=0 aren't used and the preferred installed
+        encoding is chosen
+        """
+        response = self.client.get(
+            '/tasks/', HTTP_ACCEPT_ENCODING='gzip;q=0, identity')
+        self.assertNotIn('Content-Encoding', response)
+        response = self.client.get(
+            '/tasks/', HTTP_ACCEPT_ENCODING='br, zstd, gzip')
+        self.assertIn(
+            response['Content-Encoding'], available_compressors())
+
+    def test_small_response_not_compressed(self):
+        """
+        A response smaller than the minimum size is sent as it is
+        """
+        response = self.client.get(
+            f'/tasks/{self.task.id}', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+
+    @override_settings(COMPRESSION_CONTENT_TYPES=['text/csv'])
+    def test_content_type_not_allowed(self):
+        """
+        Content types missing from the allowlist aren't compressed
+        """
+        response = self.client.get('/tasks/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', response)
+
+    @override_settings(COMPRESSION_MIN_SIZE=0)
+    def test_login_not_compressed(self):
+        """
+        The login response holding the JWT cookie is never compressed
+        """
+        self.client.logout()
+        response = self.client.post(
+            '/dj-rest-auth/login/',
+            {'username': 'FirstTester', 'password': 'pass'},
+            HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('my-app-auth', response.cookies)
+        self.assertNotIn('Content-Encoding', response)
+
+    @override_settings(COMPRESSION_MIN_SIZE=0)
+    def test_conditional_requests_with_encoded_etag(self):
+        """
+        The ETag of a compressed response names the encoding and can be
+        sent back in If-None-Match and If-Match
+        """
+        url = f'/tasks/{self.task.id}'
+        response = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        etag = response['ETag']
+        self.assertTrue(etag.endswith('-gzip"'))
+        response = self.client.get(
+            url, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        response = self.client.patch(
+            url, {'name': 'Renamed'}, HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_streaming_response_compressed_in_chunks(self):
+        """
+        A streaming response is compressed chunk by chunk, each chunk
+        being sent as soon as it is ready
+        """
+        chunks = [b'{"id":%d}\n' % i * 200 for i in range(3)]
+        middleware = CompressionMiddleware(
+            lambda request: StreamingHttpResponse(
+                iter(chunks), content_type='application/x-ndjson'))
+        request = RequestFactory().get(
+            '/tasks/export/', HTTP_ACCEPT_ENCODING='gzip')
+        response = middleware(request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        compressed = list(response.streaming_content)
+        self.assertGreaterEqual(len(compressed), len(chunks))
+        self.assertEqual(
+            gzip.decompress(b''.join(compressed)), b''.join(chunks))
+
+    def test_benchmark_compression_command(self):
+        """
+        The benchmark_compression command shows the size and time of each
+        encoding and level on task pages
+        """
+        out = StringIO()
+        call_command(
+            'benchmark_compression', rows=[5], repeat=1, stdout=out)
+        self.assertIn('gzip', out.getvalue())
+
+
+class DataExportTests(APITestCase):
+    """
+    Tests for the streaming export of a user's data
+    """
+    def setUp(self):
+        """
+        Create a user with a focus, nested goals, labels and tasks, and
+        a second user with a task
+        """
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        self.other = User.objects.create_user(
+            username='SecondTester', password='pass')
+        self.focus = Focus.objects.create(owner=self.tester, name='Focus')
+        self.parent = Goal.objects.create(
+            owner=self.tester, focus=self.focus, title='Parent')
+        self.child = Goal.objects.create(
+            owner=self.tester, focus=self.focus, title='Child',
+            parent=self.parent)
+        self.lime = Label.objects.create(
+            owner=self.tester, name='Lime', colour='lime')
+        self.pink = Label.objects.create(
+            owner=self.tester, name='Pink', colour='pink')
+        self.tasks = [
+            Task.objects.create(
+                owner=self.tester, name=f'Task {i}', goal=self.child)
+            for i in range(5)
+        ]
+        self.tasks[0].labels.add(self.lime, self.pink)
+        self.tasks[3].labels.add(self.pink)
+        Task.objects.create(owner=self.other, name='Not mine')
+        self.client.login(username='FirstTester', password='pass')
+
+    def read_ndjson(self, response):
+        body = b''.join(response.streaming_content)
+        return [orjson.loads(line) for line in body.splitlines()]
+
+    def asgi_get(self, application, path, query_string=b''):
+        """
+        Sends a GET from the logged in user to an ASGI application, keeping
+        database connections open as the test client does. Returns the
+        status and the whole body.
+        """
+        for signal in (signals.request_started, signals.request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+        cookie = self.client.cookies['sessionid'].value
+        scope = {
+            'type': 'http', 'method': 'GET', 'path': path,
+            'query_string': query_string, 'headers': [
+                (b'host', b'testserver'),
+                (b'cookie', f'sessionid={cookie}'.encode()),
+            ],
+        }
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b''}
+
+        async def send(message):
+            messages.append(message)
+
+        async_to_sync(application)(scope, receive, send)
+        body = b''.join(
+            message.get('body', b'') for message in messages
+            if message['type'] == 'http.response.body')
+        self.assertFalse(messages[-1].get('more_body', False))
+        return messages[0]['status'], body
+
+    def test_export_ndjson(self):
+        """
+        The export streams every one of the user's records as NDJSON, goals
+        parent first and tasks with their label ids
+        """
+        response = self.client.get('/export/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('take-control.ndjson', response['Content-Disposition'])
+        records = self.read_ndjson(response)
+        self.assertEqual(
+            [record['type'] for record in records],
+            ['focus', 'label', 'label', 'goal', 'goal'] + ['task'] * 5)
+        self.assertEqual(
+            [record['id'] for record in records[3:5]],
+            [self.parent.id, self.child.id])
+        tasks = {record['id']: record for record in records[5:]}
+        self.assertNotIn('Not mine', [task['name'] for task in tasks.values()])
+        self.assertEqual(
+            tasks[self.tasks[0].id]['labels'], [self.lime.id, self.pink.id])
+        self.assertEqual(tasks[self.tasks[1].id]['labels'], [])
+        self.assertEqual(tasks[self.tasks[3].id]['labels'], [self.pink.id])
+        self.assertEqual(tasks[self.tasks[2].id]['goal_id'], self.child.id)
+
+    def test_export_csv(self):
+        """
+        CSV is streamed when asked for by format or Accept header, with a
+        column for every field
+        """
+        for kwargs in ({'path': '/export/?format=csv'},
+                       {'path': '/export/', 'HTTP_ACCEPT': 'text/csv'}):
+            response = self.client.get(**kwargs)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response['Content-Type'].startswith('text/csv'))
+            body = b''.join(response.streaming_content).decode()
+            rows = list(csv.DictReader(StringIO(body)))
+            self.assertEqual(len(rows), 10)
+            task = next(row for row in rows if row['type'] == 'task'
+                        and row['id'] == str(self.tasks[0].id))
+            self.assertEqual(
+                task['labels'], f'{self.lime.id} {self.pink.id}')
+            self.assertEqual(rows[0]['title'], '')
+
+    def test_export_logged_out(self):
+        """
+        Logged out users can't export and are told so in the format asked for
+        """
+        self.client.logout()
+        response = self.client.get('/export/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertIn('detail', orjson.loads(response.content))
+
+    @mock.patch('take_control_api.export.EXPORT_BUFFER_SIZE', 100)
+    def test_export_under_asgi(self):
+        """
+        Under ASGI the export is read in a sync thread as it is sent, so its
+        queries run and the whole body arrives
+        """
+        status_code, body = self.asgi_get(StreamingASGIHandler(), '/export/')
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        records = [orjson.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(records), 10)
+        self.assertEqual(records[-1]['type'], 'task')
+
+    @mock.patch('take_control_api.export.EXPORT_BUFFER_SIZE', 100)
+    def test_export_through_asgi_application(self):
+        """
+        The ASGI application the Procfile serves sends the whole export in
+        both formats
+        """
+        with mock.patch.dict('os.environ'):
+            from take_control_api.asgi import application
+        status_code, body = self.asgi_get(application, '/export/')
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        self.assertEqual(len(body.splitlines()), 10)
+        status_code, body = self.asgi_get(
+            application, '/export/', b'format=csv')
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        rows = list(csv.DictReader(StringIO(body.decode())))
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(rows[-1]['type'], 'task')
+
+    @mock.patch('take_control_api.export.EXPORT_BUFFER_SIZE', 100)
+    def test_export_streams_in_chunks(self):
+        """
+        Rows are read a chunk at a time and the output sent in pieces, with
+        label links still matched to their tasks
+        """
+        chunks = list(export_stream(self.tester, 'ndjson', chunk_size=2))
+        self.assertGreater(len(chunks), 1)
+        records = [
+            orjson.loads(line) for line in b''.join(chunks).splitlines()]
+        self.assertEqual(
+            sum(len(record.get('labels', [])) for record in records), 3)
+
+    def test_export_data_command(self):
+        """
+        The export_data command writes a file for each user
+        """
+        with tempfile.TemporaryDirectory() as output:
+            call_command(
+                'export_data', output, format='csv', stdout=StringIO())
+            files = sorted(path.name for path in Path(output).iterdir())
+            self.assertEqual(files, [
+                f'{self.tester.id}-firsttester.csv',
+                f'{self.other.id}-secondtester.csv'])
+            text = (Path(output) / files[1]).read_text()
+            self.assertIn('Not mine', text)
+
+
+class DataImportTests(APITestCase):
+    """
+    Tests for importing a user's data in the format of the export
+    """
+    def setUp(self):
+        """
+        Create a user with a focus, nested goals, labels and tasks to
+        export, and a second user to import them
+        """
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        self.other = User.objects.create_user(
+            username='SecondTester', password='pass')
+        self.focus = Focus.objects.create(
+            owner=self.tester, name='Focus', image='../focus-image')
+        self.parent = Goal.objects.create(
+            owner=self.tester, focus=self.focus, title='Parent')
+        self.child = Goal.objects.create(
+            owner=self.tester, focus=self.focus, title='Child',
+            parent=self.parent)
+        self.label = Label.objects.create(
+            owner=self.tester, name='Lime', colour='lime')
+        self.tasks = [
+            Task.objects.create(
+                owner=self.tester, name=f'Task {i}', goal=self.child,
+                focus=self.focus if i % 2 else None)
+            for i in range(4)
+        ]
+        self.tasks[0].labels.add(self.label)
+        self.client.login(username='SecondTester', password='pass')
+
+    def export(self, export_format='ndjson'):
+        return b''.join(export_stream(self.tester, export_format))
+
+    def post(self, body, content_type='application/x-ndjson'):
+        return self.client.generic(
+            'POST', '/import/', body, content_type=content_type)
+
+    def check_imported(self):
+        focus = self.other.focus.get()
+        parent, child = self.other.goal.order_by('path')
+        self.assertEqual(focus.name, 'Focus')
+        self.assertEqual(parent.parent_id, None)
+        self.assertEqual(child.parent_id, parent.id)
+        self.assertEqual(child.path, f'{parent.id}/{child.id}/')
+        self.assertEqual((parent.child_count, parent.children), (1, True))
+        self.assertEqual(child.focus_id, focus.id)
+        tasks = self.other.task.order_by('name')
+        self.assertEqual(
+            [task.name for task in tasks], [f'Task {i}' for i in range(4)])
+        self.assertEqual(
+            [task.image.name for task in tasks],
+            ['../miscellaneous-tasks_b6f2gl', '../focus-image'] * 2)
+        self.assertEqual(
+            list(tasks[0].labels.values_list('name', flat=True)), ['Lime'])
+        child.refresh_from_db()
+        focus.refresh_from_db()
+        self.assertEqual(child.task_count, 4)
+        self.assertEqual(focus.task_count, 2)
+
+    def test_import_ndjson(self):
+        """
+        An NDJSON export imports for another user with every link
+        pointing at the new records and counts and paths set
+        """
+        response = self.post(self.export())
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], {
+            'focus': 1, 'label': 1, 'goal': 2, 'task': 4})
+        self.check_imported()
+        response = self.client.get('/tasks/?search=task')
+        self.assertEqual(response.data['count'], 4)
+        response = self.client.get('/goals/?search=child')
+        self.assertEqual(response.data['count'], 1)
+
+    def test_import_csv(self):
+        """
+        A CSV export imports in the same way
+        """
+        response = self.post(self.export('csv'), 'text/csv')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.check_imported()
+
+    def test_import_links_to_own_data(self):
+        """
+        Records can link to the user's existing data, but not to
+        another user's
+        """
+        focus = Focus.objects.create(owner=self.other, name='Mine')
+        body = (
+            b'{"type":"goal","id":1,"focus_id":%d,"title":"Goal"}\n'
+            b'{"type":"task","goal_id":1,"focus_id":%d,"name":"Task"}\n'
+            % (focus.id, focus.id))
+        response = self.post(body)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        task = self.other.task.get()
+        self.assertEqual(task.focus_id, focus.id)
+        self.assertEqual(task.goal.title, 'Goal')
+        response = self.post(
+            b'{"type":"task","goal_id":%d,"name":"Task"}\n' % self.child.id)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('goal', response.data['records'][1])
+        self.assertEqual(self.other.task.count(), 1)
+
+    def test_import_invalid_records(self):
+        """
+        Invalid records, unknown types, goals nested inside themselves and
+        invalid JSON are reported by line and nothing is imported
+        """
+        body = (
+            b'{"type":"focus","id":1,"name":"Focus"}\n'
+            b'{"type":"task","name":""}\n'
+            b'{"type":"habit","name":"Run"}\n')
+        response = self.post(body)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.data['records']), [2, 3])
+        self.assertIn('name', response.data['records'][2])
+        self.assertIn('type', response.data['records'][3])
+        body = (
+            b'{"type":"focus","id":1,"name":"Focus"}\n'
+            b'{"type":"goal","id":1,"focus_id":1,"parent_id":2,"title":"A"}\n'
+            b'{"type":"goal","id":2,"focus_id":1,"parent_id":1,"title":"B"}\n')
+        response = self.post(body)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(response.data['records']), [2, 3])
+        response = self.post(b'{"type":"focus","name":"Focus"}\n{"type"\n')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Line 2', response.data['detail'])
+        self.assertFalse(self.other.focus.exists())
+
+    @mock.patch('take_control_api.views.IMPORT_LIMIT', 5)
+    def test_import_limit(self):
+        """
+        The endpoint takes no more than IMPORT_LIMIT records
+        """
+        response = self.post(self.export())
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(self.other.task.exists())
+
+    def test_import_query_count(self):
+        """
+        The number of queries doesn't grow with the number of records
+        """
+        query_counts = []
+        for count in (10, 40):
+            body = b'{"type":"focus","id":1,"name":"Focus"}\n' + b''.join(
+                b'{"type":"task","focus_id":1,"labels":[],"name":"T%d"}\n' % i
+                for i in range(count))
+            with CaptureQueriesContext(connection) as queries:
+                response = self.post(body)
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            query_counts.append(len(queries))
+        self.assertEqual(query_counts[0], query_counts[1])
+
+    def test_import_logged_out(self):
+        """
+        Not logged in users can't import
+        """
+        self.client.logout()
+        response = self.post(self.export())
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_import_data_command(self):
+        """
+        The import_data command imports a file for a user and reports
+        progress
+        """
+        with tempfile.TemporaryDirectory() as output:
+            path = Path(output) / 'export.ndjson'
+            path.write_bytes(self.export())
+            out = StringIO()
+            call_command('import_data', 'SecondTester', str(path), stdout=out)
+        self.assertIn('Created 4 of 4 task records', out.getvalue())
+        self.check_imported()
+
+
+class TaskFocusImageTests(APITestCase):
+    """
+    Tests for tasks taking their image from their focus and links being
+    limited to the user's own data
+    """
+    def setUp(self):
+        """
+        Create two users, each with a focus, goal and label
+        """
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        self.other = User.objects.create_user(
+            username='SecondTester', password='pass')
+        self.focus = Focus.objects.create(
+            owner=self.tester, name='Focus', image='images/first.jpg')
+        self.second_focus = Focus.objects.create(
+            owner=self.tester, name='Second', image='images/second.jpg')
+        self.goal = Goal.objects.create(
+            owner=self.tester, focus=self.focus, title='Goal')
+        self.label = Label.objects.create(
+            owner=self.tester, name='Label', colour='lime')
+        other_focus = Focus.objects.create(owner=self.other, name='Other')
+        self.other_links = {
+            'focus': other_focus.id,
+            'goal': Goal.objects.create(
+                owner=self.other, focus=other_focus, title='Other').id,
+            'labels': [Label.objects.create(
+                owner=self.other, name='Other', colour='pink').id],
+        }
+        self.client.login(username='FirstTester', password='pass')
+
+    def test_create_takes_focus_image_without_extra_query(self):
+        """
+        A new task takes its focus's image from the focus looked up when
+        the focus id is validated
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                '/tasks/', {'name': 'Task', 'focus': self.focus.id},
+                format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        task = Task.objects.get(pk=response.data['id'])
+        self.assertEqual(task.image.name, 'images/first.jpg')
+        focus_selects = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('SELECT')
+            and 'FROM "focus_focus"' in query['sql']]
+        self.assertEqual(len(focus_selects), 1)
+        response = self.client.post('/tasks/', {'name': 'Misc'}, format='json')
+        task = Task.objects.get(pk=response.data['id'])
+        self.assertEqual(task.image.name, '../miscellaneous-tasks_b6f2gl')
+
+    def test_links_to_other_users_refused(self):
+        """
+        Linking a task to a missing id or another user's focus, goal or
+        label returns 400 and nothing is created
+        """
+        links = dict(self.other_links, focus_missing=0)
+        for field, value in links.items():
+            with self.subTest(field=field):
+                field = field.replace('_missing', '')
+                response = self.client.post(
+                    '/tasks/', {'name': 'Task', field: value}, format='json')
+                self.assertEqual(
+                    response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertIn(field, response.data)
+        self.assertFalse(self.tester.task.exists())
+
+    def test_moving_task_changes_image(self):
+        """
+        Moving a task to another focus, or no focus, changes its image
+        and other changes leave it alone
+        """
+        task = Task.objects.create(
+            owner=self.tester, name='Task', focus=self.focus,
+            image='images/first.jpg')
+        url = f'/tasks/{task.id}'
+        self.client.patch(url, {'name': 'Renamed'}, format='json')
+        task.refresh_from_db()
+        self.assertEqual(task.image.name, 'images/first.jpg')
+        self.client.patch(url, {'focus': self.second_focus.id}, format='json')
+        task.refresh_from_db()
+        self.assertEqual(task.image.name, 'images/second.jpg')
+        self.client.patch(url, {'focus': None}, format='json')
+        task.refresh_from_db()
+        self.assertEqual(task.image.name, '../miscellaneous-tasks_b6f2gl')
+
+    def test_bulk_move_changes_image(self):
+        """
+        Moving tasks to another focus, or no focus, with the bulk endpoint
+        changes their image in the same update
+        """
+        tasks = [
+            Task.objects.create(
+                owner=self.tester, name=f'Task {i}', focus=self.focus,
+                image='images/first.jpg')
+            for i in range(2)
+        ]
+        ids = [task.id for task in tasks]
+        self.client.patch(
+            '/tasks/bulk/',
+            {'ids': ids, 'changes': {'focus': self.second_focus.id}},
+            format='json')
+        for task in tasks:
+            task.refresh_from_db()
+            self.assertEqual(task.image.name, 'images/second.jpg')
+        self.client.patch(
+            '/tasks/bulk/', {'ids': ids, 'changes': {'focus': None}},
+            format='json')
+        for task in tasks:
+            task.refresh_from_db()
+            self.assertEqual(task.image.name, '../miscellaneous-tasks_b6f2gl')
+
+    def test_focus_image_change_copied_to_tasks(self):
+        """
+        Changing a focus's image updates its tasks in a single query and
+        moves on their updated_at
+        """
+        tasks = [
+            Task.objects.create(
+                owner=self.tester, name=f'Task {i}', focus=self.focus,
+                image='images/first.jpg')
+            for i in range(3)
+        ]
+        other = Task.objects.create(
+            owner=self.tester, name='Other', focus=self.second_focus,
+            image='images/second.jpg')
+        focus = Focus.objects.get(pk=self.focus.id)
+        focus.why = 'Because'
+        with CaptureQueriesContext(connection) as queries:
+            focus.save()
+        self.assertFalse(any(
+            query['sql'].startswith('UPDATE "tasks_task"')
+            for query in queries.captured_queries))
+        focus.image = 'images/new.jpg'
+        with CaptureQueriesContext(connection) as queries:
+            focus.save()
+        task_updates = [
+            query for query in queries.captured_queries
+            if query['sql'].startswith('UPDATE "tasks_task"')]
+        self.assertEqual(len(task_updates), 1)
+        for task in tasks:
+            updated_at = task.updated_at
+            task.refresh_from_db()
+            self.assertEqual(task.image.name, 'images/new.jpg')
+            self.assertGreater(task.updated_at, updated_at)
+        other.refresh_from_db()
+        self.assertEqual(other.image.name, 'images/second.jpg')
+
+
+class TaskLabelFilterTests(APITestCase):
+    """
+    Tests for filtering tasks by label and the label names and colours
+    given with each task
+    """
+    def setUp(self):
+        """
+        Create a user with three labels and tasks with none, one or several
+        of them
+        """
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        self.home, self.work, self.gym = [
+            Label.objects.create(owner=self.tester, name=name, colour=colour)
+            for name, colour in [
+                ('Home', 'lime'), ('Work', 'pink'), ('Gym', 'gold')]
+        ]
+        self.tasks = {
+            name: Task.objects.create(owner=self.tester, name=name)
+            for name in ['None', 'Home', 'Work', 'Both', 'All']
+        }
+        self.tasks['Home'].labels.add(self.home)
+        self.tasks['Work'].labels.add(self.work)
+        self.tasks['Both'].labels.add(self.home, self.work)
+        self.tasks['All'].labels.add(self.home, self.work, self.gym)
+        self.client.login(username='FirstTester', password='pass')
+
+    def names(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(task['name'] for task in response.data['results'])
+
+    def test_filter_any_label(self):
+        """
+        labels keeps tasks with any of the labels given, each only once
+        """
+        self.assertEqual(
+            self.names(f'/tasks/?labels={self.home.id}'),
+            ['All', 'Both', 'Home'])
+        self.assertEqual(
+            self.names(f'/tasks/?labels={self.home.id},{self.work.id}'),
+            ['All', 'Both', 'Home', 'Work'])
+
+    def test_filter_all_labels(self):
+        """
+        labels_match=all keeps only tasks with every label given
+        """
+        self.assertEqual(
+            self.names(
+                f'/tasks/?labels={self.home.id},{self.work.id}'
+                '&labels_match=all'),
+            ['All', 'Both'])
+        self.assertEqual(
+            self.names(
+                f'/tasks/?labels={self.home.id},{self.gym.id},{self.gym.id}'
+                '&labels_match=all'),
+            ['All'])
+
+    def test_filter_other_users_label_or_bad_ids(self):
+        """
+        Another user's label matches none of the user's tasks and ids
+        that aren't numbers return no tasks
+        """
+        other = User.objects.create_user(
+            username='SecondTester', password='pass')
+        label = Label.objects.create(owner=other, name='Other', colour='plum')
+        Task.objects.create(owner=other, name='Other').labels.add(label)
+        self.assertEqual(self.names(f'/tasks/?labels={label.id}'), [])
+        self.assertEqual(self.names('/tasks/?labels=abc'), [])
+
+    def test_label_filter_single_query(self):
+        """
+        Filtering by all labels reads the label links in a subquery of the
+        task query rather than a query of its own
+        """
+        get_cache().clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(
+                f'/tasks/?labels={self.home.id},{self.work.id}'
+                '&labels_match=all')
+        link_queries = [
+            query['sql'] for query in queries.captured_queries
+            if ' FROM "tasks_task_labels"'
+            in query['sql'].partition(' WHERE ')[0]]
+        self.assertEqual(link_queries, [])
+        task_queries = [
+            query['sql'] for query in queries.captured_queries
+            if 'HAVING COUNT' in query['sql']]
+        self.assertTrue(task_queries)
+        self.assertTrue(all(
+            '"tasks_task"."id" IN (SELECT U0."task_id"' in sql
+            for sql in task_queries))
+
+    def test_label_details_embedded(self):
+        """
+        Each task gives the name and colour of its labels in the same
+        order as labels, from a single query for the whole page, and the
+        standard list gives the same
+        """
+        get_cache().clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/tasks/')
+        label_queries = [
+            query for query in queries.captured_queries
+            if 'FROM "labels_label"' in query['sql']]
+        self.assertEqual(len(label_queries), 1)
+        tasks = {task['name']: task for task in response.data['results']}
+        self.assertEqual(tasks['None']['label_details'], [])
+        both = tasks['Both']
+        self.assertEqual(
+            [label['id'] for label in both['label_details']], both['labels'])
+        self.assertEqual(
+            both['label_details'][0],
+            {'id': self.work.id, 'name': 'Work', 'colour': 'pink'})
+        get_cache().clear()
+        with mock.patch.object(TaskList, 'fast_list', False):
+            standard = self.client.get('/tasks/')
+        self.assertEqual(response.content, standard.content)
+        detail = self.client.get(f'/tasks/{both["id"]}')
+        self.assertEqual(detail.data['label_details'], both['label_details'])
+
+    def test_label_rename_shows_in_cached_list(self):
+        """
+        Renaming a label changes the cached task list's label details
+        """
+        self.client.get('/tasks/')
+        self.client.patch(f'/labels/{self.home.id}', {'name': 'House'})
+        response = self.client.get(f'/tasks/?labels={self.home.id}')
+        names = {
+            label['name'] for task in response.data['results']
+            for label in task['label_details']}
+        self.assertIn('House', names)
+        self.assertNotIn('Home', names)
+
+
+@override_settings(SYNC_SETTLE_SECONDS=0)
+class SyncTests(APITestCase):
+    """
+    Tests for the sync endpoint, sending what has changed since a cursor
+    and the ids of what has been deleted
+    """
+    def setUp(self):
+        """
+        Create a user with a focus, a goal in it, a label and a task on
+        the goal with the label, and another user with a task
+        """
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        self.focus = Focus.objects.create(owner=self.tester, name='Focus')
+        self.goal = Goal.objects.create(
+            owner=self.tester, focus=self.focus, title='Goal')
+        self.label = Label.objects.create(
+            owner=self.tester, name='Label', colour='lime')
+        self.task = Task.objects.create(
+            owner=self.tester, name='Task', goal=self.goal)
+        self.task.labels.add(self.label)
+        other = User.objects.create_user(
+            username='SecondTester', password='pass')
+        Task.objects.create(owner=other, name='Other')
+        self.client.login(username='FirstTester', password='pass')
+
+    def sync(self, cursor=None):
+        response = self.client.get(
+            '/sync/', {'cursor': cursor} if cursor else {})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def ids(self, data):
+        return {
+            kind: [row['id'] for row in rows]
+            for kind, rows in data['changed'].items()
+        }
+
+    def test_full_sync_sends_everything(self):
+        """
+        Without a cursor every one of the user's records is sent, the same
+        as from its detail view, and no deletions
+        """
+        data = self.sync()
+        self.assertEqual(self.ids(data), {
+            'focus': [self.focus.id], 'goal': [self.goal.id],
+            'label': [self.label.id], 'task': [self.task.id]})
+        self.assertEqual(
+            data['deleted'],
+            {'focus': [], 'goal': [], 'label': [], 'task': []})
+        self.assertFalse(data['more'])
+        task = self.client.get(f'/tasks/{self.task.id}').data
+        self.assertEqual(
+            orjson.dumps(data['changed']['task'][0]), orjson.dumps(task))
+
+    def test_sync_sends_only_changes(self):
+        """
+        With a cursor only records saved since are sent, with the tasks
+        showing a renamed label, and nothing when nothing has changed
+        """
+        cursor = self.sync()['cursor']
+        self.client.patch(
+            f'/labels/{self.label.id}', {'name': 'Renamed'}, format='json')
+        data = self.sync(cursor)
+        self.assertEqual(self.ids(data), {
+            'focus': [], 'goal': [], 'label': [self.label.id],
+            'task': [self.task.id]})
+        self.assertEqual(data['changed']['label'][0]['name'], 'Renamed')
+        data = self.sync(data['cursor'])
+        self.assertEqual(
+            self.ids(data), {'focus': [], 'goal': [], 'label': [], 'task': []})
+
+    def test_linked_changes_sent(self):
+        """
+        A new task sends its focus and goal, whose counters change, and a
+        new goal title or focus name sends the tasks showing it
+        """
+        cursor = self.sync()['cursor']
+        self.client.post(
+            '/tasks/', {'name': 'New', 'goal': self.goal.id}, format='json')
+        data = self.sync(cursor)
+        self.assertEqual(data['changed']['goal'][0]['task_count'], 2)
+        self.assertEqual(len(data['changed']['task']), 1)
+        self.client.patch(
+            f'/goals/{self.goal.id}', {'title': 'Renamed'}, format='json')
+        data = self.sync(data['cursor'])
+        self.assertEqual(len(data['changed']['task']), 2)
+        self.assertEqual(
+            data['changed']['task'][0]['context'], 'A step towards Renamed')
+        Task.objects.create(
+            owner=self.tester, name='In focus', focus=self.focus)
+        data = self.sync(data['cursor'])
+        self.client.patch(
+            f'/focus/{self.focus.id}', {'name': 'Renamed'}, format='json')
+        data = self.sync(data['cursor'])
+        self.assertEqual(
+            [task['name'] for task in data['changed']['task']], ['In focus'])
+
+    def test_deletions_sent_with_cascade(self):
+        """
+        Deleting a focus sends its id and those of the goal and task
+        deleted with it, and the records are no longer sent as changed
+        """
+        cursor = self.sync()['cursor']
+        self.client.delete(f'/focus/{self.focus.id}')
+        data = self.sync(cursor)
+        self.assertEqual(data['deleted'], {
+            'focus': [self.focus.id], 'goal': [self.goal.id],
+            'label': [], 'task': [self.task.id]})
+        self.assertEqual(
+            self.ids(data),
+            {'focus': [], 'goal': [], 'label': [], 'task': []})
+        self.assertEqual(
+            self.sync(data['cursor'])['deleted']['focus'], [])
+
+    def test_more_pages(self):
+        """
+        When a type has more rows than the limit, more is true and the
+        next cursor carries on after the last row sent, leaving none out
+        """
+        for i in range(4):
+            Task.objects.create(owner=self.tester, name=f'Task {i}')
+        seen = []
+        cursor = None
+        with mock.patch('take_control_api.sync.SYNC_LIMIT', 2):
+            for _ in range(3):
+                data = self.sync(cursor)
+                seen += self.ids(data)['task']
+                cursor = data['cursor']
+                if not data['more']:
+                    break
+        self.assertFalse(data['more'])
+        self.assertEqual(
+            seen, list(self.tester.task.order_by(
+                'updated_at', 'id').values_list('id', flat=True)))
+
+    def test_recount_sends_only_changed_counters(self):
+        """
+        Recounting every focus and goal only sends those whose counters
+        changed
+        """
+        cursor = self.sync()['cursor']
+        call_command('sync_task_counts', stdout=StringIO())
+        self.assertEqual(self.ids(self.sync(cursor))['goal'], [])
+        Goal.objects.filter(pk=self.goal.pk).update(task_count=5)
+        cursor = self.sync()['cursor']
+        call_command('sync_task_counts', stdout=StringIO())
+        data = self.sync(cursor)
+        self.assertEqual(self.ids(data)['goal'], [self.goal.id])
+        self.assertEqual(data['changed']['goal'][0]['task_count'], 1)
+
+    @override_settings(SYNC_SETTLE_SECONDS=2)
+    def test_recent_saves_wait_to_settle(self):
+        """
+        A save less than SYNC_SETTLE_SECONDS old is left for the next sync,
+        so one still being committed can't be skipped
+        """
+        cursor = self.sync()['cursor']
+        self.task.name = 'Renamed'
+        self.task.save()
+        self.assertEqual(self.ids(self.sync(cursor))['task'], [])
+        later = datetime.now(timezone.utc) + timedelta(seconds=3)
+        with mock.patch(
+                'take_control_api.sync.timezone.now', return_value=later):
+            self.assertEqual(
+                self.ids(self.sync(cursor))['task'], [self.task.id])
+
+    def test_bad_and_expired_cursors(self):
+        """
+        A cursor that wasn't made by sync returns 400 and one older than
+        the deletions kept returns 410 Gone
+        """
+        for cursor in ['abc', encode_cursor(datetime.now(), {})[:-4]]:
+            response = self.client.get('/sync/', {'cursor': cursor})
+            self.assertEqual(
+                response.status_code, status.HTTP_400_BAD_REQUEST)
+        old = datetime.now(timezone.utc) - timedelta(days=91)
+        response = self.client.get(
+            '/sync/', {'cursor': encode_cursor(old, {})})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_logged_out_no_sync(self):
+        """
+        Not logged in user requesting sync returns 403
+        """
+        self.client.logout()
+        response = self.client.get('/sync/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_sync_query_count(self):
+        """
+        A sync takes 8 queries however many records there are: the
+        session, the user, one for each type, one for the labels of the
+        tasks and one for deletions
+        """
+        cursor = self.sync()['cursor']
+        for i in range(20):
+            Task.objects.create(owner=self.tester, name=f'Task {i}')
+        with CaptureQueriesContext(connection) as queries:
+            data = self.sync(cursor)
+        self.assertEqual(len(data['changed']['task']), 20)
+        self.assertEqual(len(queries), 8)
+
+    def test_deleting_user_records_nothing(self):
+        """
+        Deleting a user removes their data without recording deletions for
+        it, and the prune_deletions command removes old records
+        """
+        self.task.delete()
+        self.assertEqual(Deletion.objects.count(), 1)
+        Deletion.objects.update(
+            deleted_at=datetime.now(timezone.utc) - timedelta(days=91))
+        out = StringIO()
+        call_command('prune_deletions', stdout=out)
+        self.assertIn('Removed 1', out.getvalue())
+        self.tester.delete()
+        self.assertFalse(Deletion.objects.exists())
+
+
+class EventStreamTests(APITestCase):
+    """
+    Tests for the server-sent event stream served by the ASGI application
+    """
+    def setUp(self):
+        """
+        Create two users with a task each and keep database connections
+        open across the stream's authentication, as the test client does
+        """
+        self.tester = User.objects.create_user(
+            username='FirstTester', password='pass')
+        self.other = User.objects.create_user(
+            username='SecondTester', password='pass')
+        self.task = Task.objects.create(owner=self.tester, name='Task')
+        self.other_task = Task.objects.create(owner=self.other, name='Other')
+        for signal in (signals.request_started, signals.request_finished):
+            signal.disconnect(close_old_connections)
+            self.addCleanup(signal.connect, close_old_connections)
+
+    def scope(self, logged_in=True, method='GET'):
+        headers = [(b'origin', b'http://localhost:3000')]
+        if logged_in:
+            self.client.login(username='FirstTester', password='pass')
+            cookie = self.client.cookies['sessionid'].value
+            headers.append((b'cookie', f'sessionid={cookie}'.encode()))
+        return {
+            'type': 'http', 'method': method, 'path': '/events/',
+            'query_string': b'', 'headers': headers,
+        }
+
+    def stream(self, scope, action=None, bodies=1):
+        """
+        Opens the stream and, once it is subscribed, runs action. Returns
+        the messages sent once bodies parts of the body have been sent or
+        the stream has ended.
+        """
+        async def run():
+            messages = []
+            disconnect = asyncio.Event()
+
+            async def receive():
+                await disconnect.wait()
+                return {'type': 'http.disconnect'}
+
+            async def send(message):
+                messages.append(message)
+
+            def body_count():
+                return sum(
+                    message['type'] == 'http.response.body'
+                    for message in messages)
+
+            stream = asyncio.ensure_future(
+                EventStreamRouter(None)(scope, receive, send))
+            while not (stream.done() or get_broker().subscriptions):
+                await asyncio.sleep(0.001)
+            if action is not None and not stream.done():
+                await sync_to_async(action)()
+            for _ in range(1000):
+                if stream.done() or body_count() >= bodies:
+                    break
+                await asyncio.sleep(0.001)
+            disconnect.set()
+            await asyncio.wait_for(stream, 1)
+            return messages
+        return async_to_sync(run)()
+
+    def body(self, messages):
+        return b''.join(
+            message.get('body', b'') for message in messages
+            if message['type'] == 'http.response.body')
+
+    def test_logged_out_refused(self):
+        """
+        Opening the stream without logging in returns 403 and other
+        methods return 405
+        """
+        messages = self.stream(self.scope(logged_in=False))
+        self.assertEqual(messages[0]['status'], 403)
+        messages = self.stream(self.scope(method='POST'))
+        self.assertEqual(messages[0]['status'], 405)
+
+    def test_changes_streamed(self):
+        """
+        Saving and deleting the user's tasks sends an event for each once
+        committed, and another user's changes send nothing
+        """
+        def action():
+            with self.captureOnCommitCallbacks(execute=True):
+                self.other_task.name = 'Renamed'
+                self.other_task.save()
+                self.task.name = 'Renamed'
+                self.task.save()
+                Task.objects.get(pk=self.task.pk).delete()
+
+        messages = self.stream(self.scope(), action, bodies=3)
+        start = messages[0]
+        self.assertEqual(start['status'], 200)
+        headers = dict(start['headers'])
+        self.assertEqual(headers[b'content-type'], b'text/event-stream')
+        self.assertEqual(
+            headers[b'access-control-allow-origin'],
+            b'http://localhost:3000')
+        body = self.body(messages).decode()
+        self.assertTrue(body.startswith('retry: 5000\n\n'))
+        events = [
+            orjson.loads(line[len('data: '):])
+            for line in body.splitlines() if line.startswith('data: ')]
+        self.assertEqual(
+            [(event['type'], event['id'], event['action'])
+             for event in events],
+            [('task', self.task.id, 'saved'),
+             ('task', self.task.id, 'deleted')])
+        self.assertFalse(get_broker().subscriptions)
+
+    @override_settings(EVENTS_HEARTBEAT_SECONDS=0.01)
+    def test_heartbeat(self):
+        """
+        A comment is sent when there have been no events for
+        EVENTS_HEARTBEAT_SECONDS
+        """
+        messages = self.stream(self.scope(), bodies=3)
+        self.assertIn(b': heartbeat\n\n', self.body(messages))
+
+    @override_settings(EVENTS_MAX_STREAMS=1)
+    def test_stream_limit(self):
+        """
+        A user with EVENTS_MAX_STREAMS streams open can't open another
+        """
+        async def subscribe():
+            return get_broker().subscribe(self.tester.pk)
+
+        subscription = async_to_sync(subscribe)()
+        try:
+            messages = self.stream(self.scope())
+        finally:
+            subscription.close()
+        self.assertEqual(messages[0]['status'], 429)
+
+    @override_settings(EVENTS_QUEUE_SIZE=3)
+    def test_slow_client_gets_sync_event(self):
+        """
+        When more events are published than a client's queue holds, the
+        waiting events are replaced by a single sync event
+        """
+        async def publish():
+            broker = LocalBroker()
+            subscription = broker.subscribe(self.tester.pk)
+            for i in range(5):
+                broker.publish(self.tester.pk, {'id': i})
+            await asyncio.sleep(0)
+            events = []
+            while not subscription.queue.empty():
+                events.append(await subscription.get())
+            subscription.close()
+            return events, broker.subscriptions
+
+        events, subscriptions = async_to_sync(publish)()
+        self.assertEqual(events, [SYNC_EVENT, {'id': 4}])
+        self.assertFalse(subscriptions)
+
+    def test_bulk_changes_publish_sync(self):
+        """
+        Changing tasks with the bulk endpoint publishes a single sync event
+        """
+        self.client.login(username='FirstTester', password='pass')
+        with mock.patch.object(LocalBroker, 'publish') as publish:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.patch(
+                    '/tasks/bulk/',
+                    {'ids': [self.task.id], 'changes': {'today': True}},
+                    format='json')
+        publish.assert_called_once_with(self.tester.pk, SYNC_EVENT)
+
+    def test_other_paths_passed_to_django(self):
+        """
+        The ASGI application passes every other path to Django
+        """
+        seen = []
+
+        async def django_app(scope, receive, send):
+            seen.append(scope['path'])
+
+        scope = dict(self.scope(logged_in=False), path='/tasks/')
+        async_to_sync(EventStreamRouter(django_app))(scope, None, None)
+        self.assertEqual(seen, ['/tasks/'])
+
+
+class AsyncListViewTests(APITransactionTestCase):
+    """
+    Tests for the async list views served by the ASGI application. Their
+    work runs in other threads with their own database connections, so the
+    data is committed rather than kept in a transaction.
+    """
+    def setUp(self):
+        self.tester = User.objects.create_user(username='FirstTester')
+        self.focus = Focus.objects.create(
+            owner=self.tester, name='Focus', why='Why')
+        self.goal = Goal.objects.create(
+            owner=self.tester, focus=self.focus, title='Goal',
+            description='Description', value='Value', criteria='Criteria')
+        Task.objects.create(owner=self.tester, name='Task', goal=self.goal)
+        Task.objects.create(owner=self.tester, name='Other', today=True)
+
+    def request(self, method='get', path='/tasks/', data=None):
+        request = getattr(APIRequestFactory(), method)(
+            path, data, format='json')
+        force_authenticate(request, self.tester)
+        return request
+
+    def test_async_lists_match_sync_lists(self):
+        """
+        Each async list view gives the same response as its sync view
+        """
+        lists = [
+            (FocusList, AsyncFocusList, '/focus/'),
+            (GoalList, AsyncGoalList, '/goals/'),
+            (TaskList, AsyncTaskList, '/tasks/?today=True'),
+        ]
+        for sync_view, async_view, path in lists:
+            with self.subTest(path=path):
+                view = async_view.as_view()
+                self.assertTrue(asyncio.iscoroutinefunction(view))
+                response = async_to_sync(view)(self.request(path=path))
+                expected = sync_view.as_view()(self.request(path=path))
+                expected.render()
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.content, expected.content)
+                self.assertEqual(response['ETag'], expected['ETag'])
+
+    def test_view_runs_in_pool_thread(self):
+        """
+        The view runs in one of the async view threads, not the event
+        loop's, and its response is rendered there
+        """
+        threads = []
+
+        class View(AsyncTaskList):
+            def list(self, request, *args, **kwargs):
+                threads.append(threading.current_thread().name)
+                return super().list(request, *args, **kwargs)
+
+        response = async_to_sync(View.as_view())(self.request())
+        self.assertTrue(response.is_rendered)
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith('async-view'))
+        self.assertEqual(len(orjson.loads(response.content)['results']), 2)
+
+    def test_requests_run_concurrently(self):
+        """
+        Two requests are served at once, each waiting for the other to
+        start, where sync views under ASGI would run one after the other
+        """
+        barrier = threading.Barrier(2, timeout=5)
+
+        class View(AsyncTaskList):
+            def list(self, request, *args, **kwargs):
+                barrier.wait()
+                return super().list(request, *args, **kwargs)
+
+        view = View.as_view()
+
+        async def run():
+            return await asyncio.gather(
+                view(self.request()), view(self.request()))
+
+        responses = async_to_sync(run)()
+        self.assertEqual(
+            [response.status_code for response in responses],
+            [status.HTTP_200_OK, status.HTTP_200_OK])
+        self.assertFalse(barrier.broken)
+
+    def test_create_through_async_view(self):
+        """
+        Creating a task through the async view saves it and updates the
+        goal's task count
+        """
+        response = async_to_sync(AsyncTaskList.as_view())(self.request(
+            'post', data={'name': 'New', 'goal': self.goal.id}))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Task.objects.filter(name='New').exists())
+        self.goal.refresh_from_db()
+        self.assertEqual(self.goal.task_count, 2)
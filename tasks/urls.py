@@ -1,7 +1,11 @@
+from django.conf import settings
 from django.urls import path
 from tasks import views
 
+list_view = views.AsyncTaskList if settings.ASYNC_VIEWS else views.TaskList
+
 urlpatterns = [
-    path('tasks/', views.TaskList.as_view()),
+    path('tasks/', list_view.as_view()),
     path('tasks/<int:pk>', views.TaskDetail.as_view()),
+    path('tasks/bulk/', views.TaskBulk.as_view()),
 ]
@@ -1,14 +1,39 @@
-from .models import Task, Focus
-from .serializers import TaskSerializer
-from rest_framework import generics, filters
-from take_control_api.permissions import OwnerOnly
+from django.db import connection, transaction
+from django.utils import timezone
+from .models import (
+    Task, Focus, MISCELLANEOUS_IMAGE, labelled_task_ids, recount_tasks
+)
+from goals.models import Goal, goal_path
+from .serializers import (
+    BULK_LIMIT,
+    TaskSerializer,
+    TaskBulkUpdateSerializer,
+    TaskBulkCreateSerializer,
+)
+from rest_framework import generics, filters, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from take_control_api.asyncviews import AsyncViewMixin
+from take_control_api.cache import CachedListMixin, bump_data_version
+from take_control_api.conditional import (
+    ConditionalListMixin, ConditionalDetailMixin
+)
+from take_control_api.events import publish_sync
+from take_control_api.fast import FastListMixin
+from take_control_api.pagination import KeysetPaginationMixin
+from take_control_api.permissions import OwnedQuerysetMixin, OwnerOnly
+from take_control_api.search import FullTextSearchFilter, index_tasks
 
 
 class ListFilter(filters.BaseFilterBackend):
     """
     Custom filter to filter the task list by:
     active, today, achieved, miscellaneous tasks,
-    focus day-to-day tasks and goal.
+    focus day-to-day tasks, goal, goal_subtree
+    (a goal and all the goals nested under it) and labels.
+    labels takes comma separated label ids and keeps tasks with any of
+    them, or all of them with labels_match=all.
     """
     def filter_queryset(self, request, queryset, view):
         active = request.query_params.get('active')
@@ -38,19 +63,42 @@ class ListFilter(filters.BaseFilterBackend):
                 queryset = queryset.filter(goal=None)
             else:
                 queryset = queryset.filter(goal=goal)
+        goal_subtree = request.query_params.get('goal_subtree')
+        if goal_subtree:
+            path = goal_path(request.user, goal_subtree)
+            if path is None:
+                return queryset.none()
+            queryset = queryset.filter(goal__path__startswith=path)
+        labels = request.query_params.get('labels')
+        if labels:
+            label_ids = {
+                int(label) for label in labels.split(',')
+                if label.strip().isdigit()
+            }
+            if not label_ids:
+                return queryset.none()
+            match_all = request.query_params.get('labels_match') == 'all'
+            queryset = queryset.filter(
+                id__in=labelled_task_ids(label_ids, match_all))
         return queryset
 
 
-class TaskList(generics.ListCreateAPIView):
+class TaskList(
+        ConditionalListMixin,
+        CachedListMixin,
+        KeysetPaginationMixin,
+        FastListMixin,
+        generics.ListCreateAPIView):
     """
     View to return a list of tasks for the logged in user
     and also to create a new task
     """
     serializer_class = TaskSerializer
+    keyset_ordering = ['deadline', 'goal__deadline']
     filter_backends = [
         ListFilter,
         filters.OrderingFilter,
-        filters.SearchFilter,
+        FullTextSearchFilter,
     ]
     ordering_fields = [
         'updated_at',
@@ -64,34 +112,180 @@ class TaskList(generics.ListCreateAPIView):
         'focus__name',
         'goal__title'
     ]
+    search_kind = 'task'
 
     def perform_create(self, serializer):
         """
-        Adds owner data to the object before it is saved
+        Adds owner data to the object before it is saved. The serializer
+        takes the image from the focus it has already looked up.
         """
-        owner = self.request.user
-        focus_id = self.request.data.get('focus')
-        if focus_id:
-            focus = Focus.objects.get(pk=focus_id)
-            image = focus.image
-        else:
-            image = '../miscellaneous-tasks_b6f2gl'
-        serializer.save(image=image, owner=owner)
+        serializer.save(owner=self.request.user)
 
     def get_queryset(self):
         """
         Pulls all of the task instances that are owned by the user
         and only those owned by the user. Within this order by
-        deadline and then created_by
+        deadline and then created_by. The linked goal and focus are joined
+        and labels prefetched so a page is loaded in a fixed number of queries
         """
-        return self.request.user.task.all().order_by(
-            'deadline', 'goal__deadline')
+        return self.request.user.task.select_related(
+            'goal', 'focus'
+        ).prefetch_related('labels').order_by('deadline', 'goal__deadline')
 
 
-class TaskDetail(generics.RetrieveUpdateDestroyAPIView):
+class AsyncTaskList(AsyncViewMixin, TaskList):
+    """
+    The list of tasks as an async view, for the ASGI application
+    """
+
+
+class TaskDetail(
+        OwnedQuerysetMixin,
+        ConditionalDetailMixin,
+        generics.RetrieveUpdateDestroyAPIView):
     """
     View to return a specific task where pk will be the id of the task
     """
     serializer_class = TaskSerializer
-    permission_classes = [OwnerOnly]
+    permission_classes = [IsAuthenticated, OwnerOnly]
+    queryset = Task.objects.select_related(
+        'owner', 'goal', 'focus'
+    ).prefetch_related('labels')
+
+
+def report_missing(field_name, ids, found):
+    """
+    Raises a validation error naming any of the ids that weren't found
+    """
+    missing = set(ids) - set(found)
+    if missing:
+        raise ValidationError(
+            {field_name: [f'Not found: {sorted(missing)}']})
+
+
+def check_owned(queryset, ids, field_name):
+    """
+    Checks in a single query that every id given is in the user's queryset
+    """
+    found = queryset.filter(id__in=set(ids)).values_list('id', flat=True)
+    report_missing(field_name, ids, found)
+
+
+class TaskBulk(OwnedQuerysetMixin, generics.GenericAPIView):
+    """
+    View to create or change many of the logged in user's tasks in one
+    request. Ownership of every task, focus, goal and label given is
+    checked with one query per model.
+    """
+    serializer_class = TaskBulkUpdateSerializer
     queryset = Task.objects.all()
+
+    def check_links(self, rows):
+        """
+        Checks that every focus, goal and label linked to belongs to the
+        user. Returns the image of each linked focus.
+        """
+        user = self.request.user
+        focus_ids = {row['focus'] for row in rows if row.get('focus')}
+        goal_ids = {row['goal'] for row in rows if row.get('goal')}
+        label_ids = {
+            label for row in rows for label in row.get('labels', [])
+        }
+        focus_images = dict(
+            user.focus.filter(id__in=focus_ids).values_list('id', 'image'))
+        report_missing('focus', focus_ids, focus_images)
+        check_owned(user.goal.all(), goal_ids, 'goal')
+        check_owned(user.label.all(), label_ids, 'labels')
+        return focus_images
+
+    def recount(self, focus_ids, goal_ids):
+        """
+        Recalculates the task counters of the focus areas and goals given,
+        as bulk writes skip the task's save
+        """
+        recount_tasks(Focus, Focus.objects.filter(id__in=focus_ids - {None}))
+        recount_tasks(Goal, Goal.objects.filter(id__in=goal_ids - {None}))
+
+    def patch(self, request, *args, **kwargs):
+        """
+        Makes the same changes to every task in ids. Moving them to
+        another focus, or no focus, gives them its image. The tasks are
+        locked while their old links are read, so the counters recounted
+        in the same transaction can't be left wrong by another change.
+        """
+        serializer = TaskBulkUpdateSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ids = serializer.validated_data['ids']
+        changes = serializer.validated_data['changes']
+        check_owned(self.get_queryset(), ids, 'ids')
+        focus_images = self.check_links([changes])
+        changes = {
+            f'{field}_id' if field in ('focus', 'goal') else field: value
+            for field, value in changes.items()
+        }
+        if 'focus_id' in changes:
+            changes['image'] = focus_images.get(
+                changes['focus_id'], MISCELLANEOUS_IMAGE)
+        tasks = self.get_queryset().filter(id__in=ids)
+        counted = {'focus_id', 'goal_id', 'active', 'achieved'} & set(changes)
+        with transaction.atomic():
+            if counted:
+                old_links = list(tasks.select_for_update().values_list(
+                    'focus_id', 'goal_id'))
+            updated = tasks.update(updated_at=timezone.now(), **changes)
+            if counted:
+                self.recount(
+                    {focus for focus, _ in old_links}
+                    | {changes.get('focus_id')},
+                    {goal for _, goal in old_links}
+                    | {changes.get('goal_id')})
+            if 'focus_id' in changes or 'goal_id' in changes:
+                index_tasks(tasks)
+            bump_data_version(request.user.pk)
+        publish_sync(request.user.pk)
+        return Response({'updated': updated, 'ids': sorted(set(ids))})
+
+    def post(self, request, *args, **kwargs):
+        """
+        Creates every task in the list given
+        """
+        serializer = TaskBulkCreateSerializer(
+            data=request.data, many=True, allow_empty=False,
+            max_length=BULK_LIMIT)
+        serializer.is_valid(raise_exception=True)
+        rows = serializer.validated_data
+        focus_images = self.check_links(rows)
+        tasks = []
+        for row in rows:
+            row = dict(row)
+            labels = row.pop('labels', [])
+            focus_id = row.pop('focus', None)
+            goal_id = row.pop('goal', None)
+            image = focus_images.get(focus_id, MISCELLANEOUS_IMAGE)
+            tasks.append((labels, Task(
+                owner=request.user,
+                focus_id=focus_id,
+                goal_id=goal_id,
+                image=image,
+                **row)))
+        with transaction.atomic():
+            if connection.features.can_return_rows_from_bulk_insert:
+                Task.objects.bulk_create([task for _, task in tasks])
+                index_tasks(Task.objects.filter(
+                    id__in=[task.id for _, task in tasks]))
+                self.recount(
+                    {task.focus_id for _, task in tasks},
+                    {task.goal_id for _, task in tasks})
+            else:
+                for _, task in tasks:
+                    task.save()
+            Task.labels.through.objects.bulk_create([
+                Task.labels.through(task_id=task.id, label_id=label)
+                for labels, task in tasks
+                for label in set(labels)
+            ])
+        bump_data_version(request.user.pk)
+        publish_sync(request.user.pk)
+        return Response(
+            {'created': len(tasks), 'ids': [task.id for _, task in tasks]},
+            status=status.HTTP_201_CREATED)